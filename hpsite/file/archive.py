@@ -0,0 +1,174 @@
+import os
+import tarfile
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+from urllib.parse import quote
+
+from django.http import StreamingHttpResponse
+from rest_framework import status
+
+from .define import ArchiveFormat, check_parameter_follow_defined
+
+BLOCK_SIZE = 64 * 1024
+
+ARCHIVE_CONTENT_TYPE_MAP = {
+    ArchiveFormat.ZIP.value: 'application/zip',
+    ArchiveFormat.TAR.value: 'application/x-tar',
+    ArchiveFormat.TAR_GZ.value: 'application/gzip',
+}
+
+
+def parse_archive_format(query, listing_query) -> Optional[str]:
+    """
+    The `?archive=` format, None without one.
+    Raise ValueError with the client-facing message on an unavailable format or combination.
+    """
+    archive_format = query.get('archive')
+    if archive_format is None:
+        return None
+    if not check_parameter_follow_defined(archive_format, ArchiveFormat):
+        raise ValueError(f'archive: {archive_format} is not available')
+    if listing_query.limit is not None:
+        raise ValueError('limit is not available with archive')
+    return archive_format
+
+
+class _DrainBuffer:
+    """
+    Write-only file object collecting what an archive writer emits until the generator drains it.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data) -> int:
+        if data:
+            self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _iter_block(fp, size: int = None) -> Iterator[bytes]:
+    remaining = size
+    while remaining is None or remaining > 0:
+        data = fp.read(BLOCK_SIZE if remaining is None else min(BLOCK_SIZE, remaining))
+        if not data:
+            return
+        if remaining is not None:
+            remaining -= len(data)
+        yield data
+
+
+def iter_zip(root: Path, names: Iterable[str]) -> Iterator[bytes]:
+    """
+    Deflated zip of `names` (relative to `root`), written for an unseekable stream: sizes and CRCs
+    follow each member in a data descriptor, and zip64 records are used for members over 2 GiB.
+    """
+    buffer = _DrainBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for name in names:
+            try:
+                fp = open(root / name, 'rb')
+            except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+                continue
+
+            with fp:
+                zip_info = zipfile.ZipInfo.from_file(fp.name, name)
+                zip_info.compress_type = zipfile.ZIP_DEFLATED
+                with zip_file.open(zip_info, 'w') as member:
+                    for data in _iter_block(fp):
+                        member.write(data)
+                        yield buffer.drain()
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def iter_tar(root: Path, names: Iterable[str]) -> Iterator[bytes]:
+    """
+    POSIX (pax) tar of `names`, emitted header by header and block by block. A member that changes
+    size while archived is cut or zero-padded to the size written in its header.
+    """
+    written = 0
+    for name in names:
+        try:
+            fp = open(root / name, 'rb')
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            continue
+
+        with fp:
+            stat_result = os.fstat(fp.fileno())
+            tar_info = tarfile.TarInfo(name)
+            tar_info.size = stat_result.st_size
+            tar_info.mtime = int(stat_result.st_mtime)
+            tar_info.mode = stat_result.st_mode & 0o7777
+
+            header = tar_info.tobuf(tarfile.PAX_FORMAT, tarfile.ENCODING, 'surrogateescape')
+            yield header
+            written += len(header)
+
+            remaining = tar_info.size
+            for data in _iter_block(fp, tar_info.size):
+                remaining -= len(data)
+                yield data
+            if remaining:
+                yield bytes(remaining)
+
+        padding = -tar_info.size % tarfile.BLOCKSIZE
+        yield bytes(padding)
+        written += tar_info.size + padding
+
+    # two zero blocks close the archive, then pad to a whole record like tarfile does
+    end = 2 * tarfile.BLOCKSIZE
+    yield bytes(end + -(written + end) % tarfile.RECORDSIZE)
+
+
+def iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_archive(root: Path, names: Iterable[str], archive_format: str) -> Iterator[bytes]:
+    """
+    Build the archive while it is sent: files are read block by block and no member is buffered
+    whole, so memory stays constant whatever the size of the directory.
+    """
+    if archive_format == ArchiveFormat.ZIP.value:
+        chunks = iter_zip(root, names)
+    elif archive_format == ArchiveFormat.TAR.value:
+        chunks = iter_tar(root, names)
+    else:
+        chunks = iter_gzip(iter_tar(root, names))
+
+    return (chunk for chunk in chunks if chunk)
+
+
+def archive_content_disposition(root: Path, archive_format: str) -> str:
+    file_name = f'{root.name}.{archive_format}'
+    try:
+        file_name.encode('ascii')
+    except UnicodeEncodeError:
+        return f"attachment; filename*=utf-8''{quote(file_name)}"
+    return 'attachment; filename="{}"'.format(file_name.replace('"', '\\"'))
+
+
+def archive_response(root: Path, names: Iterable[str], archive_format: str) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(
+        iter_archive(root, names, archive_format),
+        content_type=ARCHIVE_CONTENT_TYPE_MAP[archive_format],
+        status=status.HTTP_200_OK,
+    )
+    response['Content-Disposition'] = archive_content_disposition(root, archive_format)
+    return response
@@ -0,0 +1,804 @@
+import asyncio
+import functools
+import io
+import os
+import secrets
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Iterator, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import DisallowedHost, PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, QueryDict
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+
+from .archive import ARCHIVE_CONTENT_TYPE_MAP, archive_content_disposition, iter_archive, parse_archive_format
+from .cache import directory_validator, file_content_cache, file_validator, listing_cache
+from .compression import choose_encoding, compressed_etag, compression_cache, is_compressible
+from .conditional import file_etag, file_last_modified, guess_content_type, if_range_matches, listing_etag
+from .download import cached_file_content, offload_header
+from .index import get_indexed_directory, query_index
+from .listing import (
+    ListingQuery,
+    iter_file_key_under_path,
+    iter_file_under_path,
+    listing_entries,
+    need_stat_for_order,
+    sort_file_list,
+    stat_listing_entries,
+)
+from .locks import PathLock, path_locks
+from .mapped import open_download
+from .metrics import COUNT_BUCKETS, StageTimer, metrics, observe_request
+from .pagination import paginated_listing, select_top_k
+from .ranges import content_range, multipart_byteranges, parse_range_header
+from .renderers import JSON_CONTENT_TYPE, NDJSON_CONTENT_TYPE, NDJSONRenderer, wants_ndjson
+from .streaming import iter_listing_json, iter_listing_ndjson
+from .tree import TreeQuery, iter_tree_file_names
+from .views import FileView, WatchView
+from .watch import (
+    EVENT_STREAM_CONTENT_TYPE,
+    KEEPALIVE,
+    format_event,
+    format_events,
+    parse_watch_timeout,
+    watch_payload,
+    watch_registry,
+)
+
+# ASGI extension of servers that send a file descriptor themselves, with `sendfile`
+ZERO_COPY_SEND = 'http.response.zerocopysend'
+
+CONDITIONAL_HEADERS = (b'if-match', b'if-unmodified-since', b'if-none-match', b'if-modified-since')
+
+# middleware of MIDDLEWARE whose `process_request` may answer or refuse a GET of the file API
+REQUEST_MIDDLEWARE = ('django.middleware.security.SecurityMiddleware', 'django.middleware.common.CommonMiddleware')
+# middleware of MIDDLEWARE whose `process_response` adds headers to every response
+RESPONSE_MIDDLEWARE = (
+    'django.middleware.security.SecurityMiddleware', 'django.middleware.clickjacking.XFrameOptionsMiddleware'
+)
+
+_io_executor = None
+
+
+def io_executor() -> ThreadPoolExecutor:
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(
+            max_workers=settings.FILE_ASYNC_IO_WORKERS, thread_name_prefix='file-io'
+        )
+    return _io_executor
+
+
+async def run_io(func, *args):
+    """
+    Run blocking filesystem work on the bounded I/O pool instead of the event loop.
+    """
+    return await asyncio.get_running_loop().run_in_executor(io_executor(), functools.partial(func, *args))
+
+
+def _take(iterator: Iterator, count: int) -> list:
+    return list(islice(iterator, count))
+
+
+async def iter_batches(iterator: Iterator, batch_size: int):
+    """
+    Advance a blocking iterator (e.g. a scandir pass) on the I/O pool, `batch_size` items per hop,
+    so the event loop serves other requests between batches.
+    """
+    while True:
+        batch = await run_io(_take, iterator, batch_size)
+        if batch:
+            yield batch
+        if len(batch) < batch_size:
+            return
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def _middleware_headers(request: ASGIRequest) -> Optional[list[tuple[bytes, bytes]]]:
+    """
+    The headers the middleware of MIDDLEWARE add to a response of `request` (nosniff, Referrer-Policy,
+    X-Frame-Options...), or None when Django would answer it otherwise: a host outside ALLOWED_HOSTS,
+    an HTTPS or `www.` redirect, a disallowed user agent.
+    """
+    response = HttpResponse()
+    try:
+        request.get_host()
+        for middleware_path in settings.MIDDLEWARE:
+            if middleware_path not in REQUEST_MIDDLEWARE and middleware_path not in RESPONSE_MIDDLEWARE:
+                continue
+            middleware = import_string(middleware_path)(lambda request: response)
+            if middleware_path in REQUEST_MIDDLEWARE and middleware.process_request(request) is not None:
+                return None
+            if middleware_path in RESPONSE_MIDDLEWARE:
+                middleware.process_response(request, response)
+    except (DisallowedHost, PermissionDenied):
+        return None
+
+    del response['Content-Type']
+    return [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in response.items()]
+
+
+def _view_checks_pass(view_class, request: ASGIRequest) -> bool:
+    """
+    Whether the DRF permission and throttle classes of `view_class` let `request` through. Authenticators
+    may query the database, so this runs on a Django thread.
+    """
+    view = view_class()
+    drf_request = view.initialize_request(request)
+    view.request = drf_request
+    try:
+        view.check_permissions(drf_request)
+        view.check_throttles(drf_request)
+    except APIException:
+        return False
+    return True
+
+
+async def _view_allows(view_class, request: ASGIRequest) -> bool:
+    if not view_class.throttle_classes and all(permission is AllowAny for permission in view_class.permission_classes):
+        return True
+    return await sync_to_async(_view_checks_pass)(view_class, request)
+
+
+def _open_version(full_file_path, stat_result: os.stat_result, opener=open_download):
+    """
+    `opener(full_file_path)`, or None if the file opened is no longer the version of `stat_result`.
+    """
+    fp = opener(full_file_path)
+    if file_validator(os.fstat(fp.fileno())) != file_validator(stat_result):
+        fp.close()
+        return None
+    return fp
+
+
+def _precondition_status(scope, headers: dict, etag: str, last_modified: float = None) -> Optional[int]:
+    """
+    304 or 412 in the precondition order of RFC 9110 section 13.2.2, from the same
+    `get_conditional_response` as the Django views, or None to serve the request.
+    """
+    if not any(name in headers for name in CONDITIONAL_HEADERS):
+        return None
+    response = get_conditional_response(
+        ASGIRequest(scope, io.BytesIO()), etag=etag, last_modified=None if last_modified is None else int(last_modified)
+    )
+    return None if response is None else response.status_code
+
+
+class _SendRecorder:
+    """
+    ASGI `send` wrapper keeping the response status and body size for the request metrics, and adding
+    the headers of the middleware to the response. With FILE_METRICS_ENABLED, the stages timed before
+    the response starts are sent in `Server-Timing` and recorded, like `StageTimingMixin` does for the
+    Django views; sending the body is not a stage.
+    """
+
+    def __init__(self, send, timer: StageTimer, view: str, extra_headers: list):
+        self.send = send
+        self.timer = timer
+        self.view = view
+        self.extra_headers = extra_headers
+        self.status = None
+        self.sent = 0
+
+    async def __call__(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+            message = {**message, 'headers': [*message['headers'], *self.extra_headers]}
+            if settings.FILE_METRICS_ENABLED:
+                server_timing = self.timer.server_timing(self.timer.elapsed())
+                message = {**message, 'headers': [*message['headers'], (b'server-timing', server_timing.encode())]}
+                for name, seconds in self.timer.stages:
+                    metrics.observe('file_api_stage_seconds', seconds, view=self.view, stage=name)
+        elif message['type'] == 'http.response.body':
+            self.sent += len(message.get('body', b''))
+        await self.send(message)
+
+
+class AsyncFileApplication:
+    """
+    ASGI application serving GET/HEAD of `FileView` and GET of `WatchView` natively on the event loop.
+
+    Every blocking `stat`/`open`/`read`/`scandir` runs on a bounded thread pool
+    (FILE_ASYNC_IO_WORKERS), so a slow client only costs a coroutine and threads are held
+    for one block read at a time; watch subscribers wait without holding a thread at all.
+    Blocking body iterators, such as archive writers, compressors and multipart bodies, are advanced on
+    the same pool (`send_body`). Writes and every other route are passed to the wrapped Django application.
+
+    The Django middleware do not run here: a request that the host validation, the security and common
+    middleware or the DRF permission and throttle classes of the view would answer differently is passed
+    to Django, and the headers of the security and clickjacking middleware are added to the responses.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            resolved = self._resolve(scope)
+            if resolved is not None:
+                view_class, file_path = resolved
+                handler = self.handle if view_class is FileView else self.handle_watch
+                timer = StageTimer()
+                request = ASGIRequest(scope, io.BytesIO())
+                middleware_headers = _middleware_headers(request)
+                if middleware_headers is not None and await _view_allows(view_class, request):
+                    recorder = _SendRecorder(send, timer, type(self).__name__, middleware_headers)
+                    if await handler(scope, receive, recorder, file_path, timer):
+                        if settings.FILE_METRICS_ENABLED:
+                            observe_request(
+                                recorder.view, scope['method'], recorder.status, timer.elapsed(), recorder.sent, 0
+                            )
+                        return
+
+        await self.application(scope, receive, send)
+
+    @staticmethod
+    def _resolve(scope):
+        path = scope['path']
+        root_path = scope.get('root_path', '')
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        try:
+            resolver_match = resolve(path)
+        except Resolver404:
+            return None
+
+        view_class = getattr(resolver_match.func, 'view_class', None)
+        if view_class is not FileView and view_class is not WatchView:
+            return None
+        return view_class, resolver_match.kwargs['file_path']
+
+    async def handle(self, scope, receive, send, file_path, timer: StageTimer) -> bool:
+        """
+        Serve the request, or return False to leave it to Django.
+        """
+        full_file_path = FileView.PROJECT_ROOT_PATH / file_path
+        head = scope['method'] == 'HEAD'
+
+        reading = path_locks.try_reading(full_file_path)
+        if reading is None:
+            # a write is in progress: wait for it on a Django thread, never in the event loop
+            return False
+        with reading:
+            try:
+                stat_result = await run_io(os.stat, full_file_path)
+            except (FileNotFoundError, NotADirectoryError):
+                stat_result = None
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                return await self.handle_file(
+                    scope, receive, send, full_file_path, stat_result, reading, timer, head
+                )
+
+        if stat_result is not None and stat.S_ISDIR(stat_result.st_mode):
+            query_dict = QueryDict(scope['query_string'])
+            if 'since' in query_dict or (head and ('depth' in query_dict or 'archive' in query_dict)):
+                # delta listings run on the Django path and its thread pools
+                return False
+            if 'depth' in query_dict:
+                return await self.handle_tree(scope, receive, send, full_file_path, query_dict, timer)
+            if 'archive' in query_dict:
+                return await self.handle_archive(receive, send, full_file_path, query_dict, timer)
+            await self.handle_directory(scope, send, full_file_path, stat_result, timer, head)
+            return True
+
+        await self.send_json(send, status.HTTP_404_NOT_FOUND, f'/{file_path} not exist', head=head)
+        return True
+
+    async def handle_watch(self, scope, receive, send, file_path, timer: StageTimer) -> bool:
+        if scope['method'] != 'GET':
+            return False
+        headers = dict(scope['headers'])
+        query_dict = QueryDict(scope['query_string'])
+        full_file_path = WatchView.PROJECT_ROOT_PATH / file_path
+        try:
+            timeout = parse_watch_timeout(query_dict)
+        except ValueError:
+            # errors are rendered by the Django view, per the negotiated format
+            return False
+        if not await run_io(full_file_path.is_dir):
+            return False
+
+        cursor = query_dict.get('cursor') or headers.get(b'last-event-id', b'').decode('latin1') or None
+        watch = await run_io(watch_registry.subscribe, full_file_path)
+        try:
+            if EVENT_STREAM_CONTENT_TYPE in headers.get(b'accept', b'').decode('latin1'):
+                await self.send_event_stream(receive, send, watch, cursor)
+                return True
+
+            if cursor is None:
+                events, cursor = [], watch.cursor
+            else:
+                events, cursor = await watch.wait_async(cursor, timeout)
+        finally:
+            await run_io(watch_registry.unsubscribe, watch)
+
+        await self.send_json(send, status.HTTP_200_OK, watch_payload(events, cursor))
+        return True
+
+    @staticmethod
+    async def send_event_stream(receive, send, watch, cursor):
+        disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': status.HTTP_200_OK,
+                'headers': [
+                    (b'content-type', EVENT_STREAM_CONTENT_TYPE.encode()),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            if cursor is None:
+                cursor = watch.cursor
+            ready = format_event('ready', {'cursor': cursor}, cursor)
+            await send({'type': 'http.response.body', 'body': ready, 'more_body': True})
+
+            deadline = time.monotonic() + settings.FILE_WATCH_STREAM_MAX_SECONDS
+            while (remaining := deadline - time.monotonic()) > 0:
+                waiting = asyncio.ensure_future(watch.wait_async(cursor, min(settings.FILE_WATCH_HEARTBEAT, remaining)))
+                await asyncio.wait((waiting, disconnected), return_when=asyncio.FIRST_COMPLETED)
+                if not waiting.done():
+                    waiting.cancel()
+                    return
+
+                events, current = waiting.result()
+                body = format_events(watch, events, current) if events != [] else KEEPALIVE
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+                cursor = current
+
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+
+    async def handle_directory(self, scope, send, full_file_path, stat_result, timer: StageTimer, head: bool):
+        headers = dict(scope['headers'])
+        query_dict = QueryDict(scope['query_string'])
+        ndjson = wants_ndjson(query_dict.get('format'), headers.get(b'accept', b'').decode('latin1'))
+        try:
+            query = ListingQuery(query_dict)
+        except ValueError as e:
+            await self.send_json(send, status.HTTP_400_BAD_REQUEST, str(e), head=head, ndjson=ndjson)
+            return
+
+        # the Django view varies on Accept too, for its renderer negotiation
+        listing_headers = [(b'vary', b'Accept')]
+        if query.directory_validated:
+            with timer.stage('validate'):
+                directory_stat = directory_validator(full_file_path, stat_result)
+                etag = listing_etag(
+                    directory_stat, listing_cache.generation(full_file_path), query_dict,
+                    NDJSON_CONTENT_TYPE if ndjson else JSON_CONTENT_TYPE,
+                )
+                listing_headers.append((b'etag', etag.encode()))
+            precondition_status = _precondition_status(scope, headers, etag)
+            if precondition_status is not None:
+                await self.send_empty(send, precondition_status, listing_headers)
+                return
+        if head:
+            # the headers of a listing do not depend on the scan
+            content_type = NDJSON_CONTENT_TYPE if ndjson else JSON_CONTENT_TYPE
+            await self.send_empty(
+                send, status.HTTP_200_OK, [(b'content-type', content_type.encode()), *listing_headers]
+            )
+            return
+
+        batch_size = settings.FILE_ASYNC_SCAN_BATCH_SIZE
+
+        indexed_directory = None
+        if settings.FILE_LISTING_USE_INDEX:
+            # the ORM is not usable from the event loop, it runs on Django's thread like in the view
+            indexed_directory = await sync_to_async(get_indexed_directory)(full_file_path)
+
+        if query.limit is not None:
+            if indexed_directory is not None:
+                with timer.stage('index'):
+                    page = await sync_to_async(query_index)(indexed_directory, query)
+            else:
+                with timer.stage('scan'):
+                    page = []
+                    keys = iter_file_key_under_path(full_file_path, query.file_filter, query.order_by)
+                    async for batch in iter_batches(keys, batch_size):
+                        page = select_top_k(
+                            chain(page, batch), query.order_by_direction, query.limit + 1, query.after
+                        )
+            metrics.observe('file_api_listing_entries', len(page), COUNT_BUCKETS)
+
+            payload = paginated_listing(page, query)
+            if query.fields:
+                with timer.stage('stat'):
+                    payload['files'] = await run_io(
+                        stat_listing_entries, full_file_path, payload['files'], query.fields
+                    )
+            await self.send_json(send, status.HTTP_200_OK, payload, listing_headers, ndjson=ndjson)
+            return
+
+        entries = None
+        if query.directory_validated:
+            with timer.stage('cache'):
+                entries = listing_cache.get_listing(full_file_path, query.cache_params, directory_stat)
+        if entries is None:
+            if indexed_directory is not None and not query.fields:
+                with timer.stage('index'):
+                    entries = [name for _, name in await sync_to_async(query_index)(indexed_directory, query)]
+            else:
+                with timer.stage('scan'):
+                    file_list = []
+                    files = iter_file_under_path(full_file_path, query.file_filter, with_stat=query.with_stat)
+                    async for batch in iter_batches(files, batch_size):
+                        file_list.extend(batch)
+                with timer.stage('sort'):
+                    await run_io(sort_file_list, file_list, query.order_by, query.order_by_direction)
+                    entries = listing_entries(file_list, query.fields)
+            if query.directory_validated:
+                listing_cache.set_listing(full_file_path, query.cache_params, directory_stat, entries)
+        metrics.observe('file_api_listing_entries', len(entries), COUNT_BUCKETS)
+
+        if ndjson:
+            content_type, chunks = NDJSON_CONTENT_TYPE, iter_listing_ndjson(entries)
+        else:
+            content_type, chunks = JSON_CONTENT_TYPE, iter_listing_json(entries)
+        await send({
+            'type': 'http.response.start',
+            'status': status.HTTP_200_OK,
+            'headers': [(b'content-type', content_type.encode()), *listing_headers],
+        })
+        # the entries are in memory, encoding them does not block
+        for chunk in chunks:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def handle_tree(self, scope, receive, send, full_file_path, query_dict, timer: StageTimer) -> bool:
+        """
+        Recursive listing (`?depth=`), or its archive: the tree walk is a blocking generator, advanced
+        on the I/O pool by `send_body` as the body is sent.
+        """
+        try:
+            query = ListingQuery(query_dict)
+            archive_format = parse_archive_format(query_dict, query)
+            tree_query = TreeQuery(query_dict, query)
+        except ValueError:
+            # errors are rendered by the Django view, per the negotiated format
+            return False
+        if query.fields:
+            return False
+
+        names = iter_tree_file_names(full_file_path, query, tree_query)
+        if archive_format is not None:
+            await self.send_archive(receive, send, full_file_path, names, archive_format)
+            return True
+
+        accept = dict(scope['headers']).get(b'accept', b'').decode('latin1')
+        if wants_ndjson(query_dict.get('format'), accept):
+            content_type, chunks = NDJSON_CONTENT_TYPE, iter_listing_ndjson(names)
+        else:
+            content_type, chunks = JSON_CONTENT_TYPE, iter_listing_json(names)
+        await send({
+            'type': 'http.response.start',
+            'status': status.HTTP_200_OK,
+            'headers': [(b'content-type', content_type.encode()), (b'vary', b'Accept')],
+        })
+        await self.send_body(receive, send, chunks)
+        return True
+
+    async def handle_archive(self, receive, send, full_file_path, query_dict, timer: StageTimer) -> bool:
+        try:
+            query = ListingQuery(query_dict)
+            archive_format = parse_archive_format(query_dict, query)
+        except ValueError:
+            # errors are rendered by the Django view, per the negotiated format
+            return False
+        if query.fields:
+            return False
+
+        with timer.stage('scan'):
+            file_list = []
+            files = iter_file_under_path(
+                full_file_path, query.file_filter, with_stat=need_stat_for_order(query.order_by)
+            )
+            async for batch in iter_batches(files, settings.FILE_ASYNC_SCAN_BATCH_SIZE):
+                file_list.extend(batch)
+        with timer.stage('sort'):
+            await run_io(sort_file_list, file_list, query.order_by, query.order_by_direction)
+
+        names = (file.name for file in file_list)
+        await self.send_archive(receive, send, full_file_path, names, archive_format)
+        return True
+
+    async def send_archive(self, receive, send, full_file_path, names, archive_format: str):
+        await send({
+            'type': 'http.response.start',
+            'status': status.HTTP_200_OK,
+            'headers': [
+                (b'content-type', ARCHIVE_CONTENT_TYPE_MAP[archive_format].encode()),
+                (b'content-disposition', archive_content_disposition(full_file_path, archive_format).encode()),
+            ],
+        })
+        await self.send_body(receive, send, iter_archive(full_file_path, names, archive_format))
+
+    async def handle_file(
+            self, scope, receive, send, full_file_path, stat_result, reading: PathLock, timer: StageTimer, head: bool
+    ) -> bool:
+        """
+        Called with the read lock of the file held; it is released once the file is open and checked
+        against `stat_result`, like in `serve_file`, and before anything is sent. A file changed outside
+        the API since the `stat` is left to Django.
+        """
+        if offload_header(full_file_path) is not None:
+            # the fronting proxy sends the body, from the response of the Django view
+            return False
+
+        headers = dict(scope['headers'])
+        size = stat_result.st_size
+        content_type = guess_content_type(full_file_path)
+        etag = file_etag(stat_result)
+
+        encoding = None
+        if b'range' not in headers:
+            accept_encoding = headers.get(b'accept-encoding', b'').decode('latin1')
+            encoding = choose_encoding(accept_encoding, full_file_path, content_type, size)
+            if encoding is not None:
+                etag = compressed_etag(etag, encoding)
+
+        validator_headers = [
+            (b'etag', etag.encode()),
+            (b'last-modified', file_last_modified(stat_result).encode()),
+        ]
+        if is_compressible(full_file_path, content_type):
+            validator_headers.append((b'vary', b'Accept-Encoding'))
+
+        precondition_status = _precondition_status(scope, headers, etag, stat_result.st_mtime)
+        if precondition_status is not None:
+            reading.release()
+            await self.send_empty(send, precondition_status, validator_headers)
+            return True
+
+        if encoding is not None:
+            return await self.send_compressed(
+                scope, receive, send, full_file_path, stat_result, reading, timer, encoding,
+                [(b'content-type', content_type.encode()), (b'accept-ranges', b'bytes'), *validator_headers], head
+            )
+
+        ranges = None
+        range_header = headers.get(b'range')
+        if_range = headers.get(b'if-range')
+        if range_header and (not if_range or if_range_matches(if_range.decode('latin1'), etag, stat_result)):
+            ranges = parse_range_header(range_header.decode('latin1'), size)
+
+        if ranges == []:
+            reading.release()
+            await self.send_empty(
+                send,
+                status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                [(b'content-range', f'bytes */{size}'.encode()), (b'accept-ranges', b'bytes')],
+            )
+            return True
+
+        if ranges is not None and len(ranges) > 1:
+            return await self.send_multipart(
+                receive, send, full_file_path, stat_result, reading, timer, ranges, content_type, validator_headers,
+                head,
+            )
+
+        if ranges:
+            (start, end), status_code = ranges[0], status.HTTP_206_PARTIAL_CONTENT
+        else:
+            start, end, status_code = 0, size - 1, status.HTTP_200_OK
+
+        response_headers = [
+            (b'content-type', content_type.encode()),
+            (b'content-length', str(end - start + 1).encode()),
+            (b'accept-ranges', b'bytes'),
+            *validator_headers,
+        ]
+        if status_code == status.HTTP_206_PARTIAL_CONTENT:
+            response_headers.append((b'content-range', content_range(start, end, size).encode()))
+
+        with timer.stage('file'):
+            data = None
+            if status_code == status.HTTP_200_OK and not head and file_content_cache.admits(size):
+                data = file_content_cache.get_content(full_file_path, stat_result)
+                if data is None:
+                    data = await run_io(cached_file_content, full_file_path, stat_result)
+
+            fp = None
+            if not head and end >= start and data is None:
+                fp = await run_io(_open_version, full_file_path, stat_result)
+                if fp is None:
+                    return False
+        reading.release()
+
+        await send({'type': 'http.response.start', 'status': status_code, 'headers': response_headers})
+        if fp is None:
+            await send({'type': 'http.response.body', 'body': data if data is not None and not head else b''})
+            return True
+
+        await self.send_file(scope, receive, send, fp, start, end)
+        return True
+
+    async def send_compressed(
+            self, scope, receive, send, full_file_path, stat_result, reading: PathLock, timer: StageTimer,
+            encoding: str, response_headers: list, head: bool,
+    ) -> bool:
+        """
+        A compressed representation, from the content cache, a sidecar, or compressed while it is sent
+        (its length is then unknown). Called with the read lock of the file held, like `handle_file`.
+        """
+        response_headers = [*response_headers, (b'content-encoding', encoding.encode())]
+        if head:
+            reading.release()
+            await self.send_empty(send, status.HTTP_200_OK, response_headers)
+            return True
+
+        with timer.stage('file'):
+            data = await run_io(cached_file_content, full_file_path, stat_result, encoding)
+            sidecar_fp = fp = None
+            if data is None:
+                sidecar_fp = await run_io(compression_cache.open, full_file_path, stat_result, encoding)
+            if data is None and sidecar_fp is None:
+                fp = await run_io(_open_version, full_file_path, stat_result, functools.partial(open, mode='rb'))
+                if fp is None:
+                    return False
+        reading.release()
+
+        if data is not None:
+            await send({
+                'type': 'http.response.start',
+                'status': status.HTTP_200_OK,
+                'headers': [*response_headers, (b'content-length', str(len(data)).encode())],
+            })
+            await send({'type': 'http.response.body', 'body': data})
+            return True
+
+        if sidecar_fp is not None:
+            length = (await run_io(os.fstat, sidecar_fp.fileno())).st_size
+            await send({
+                'type': 'http.response.start',
+                'status': status.HTTP_200_OK,
+                'headers': [*response_headers, (b'content-length', str(length).encode())],
+            })
+            await self.send_file(scope, receive, send, sidecar_fp, 0, length - 1)
+            return True
+
+        await send({'type': 'http.response.start', 'status': status.HTTP_200_OK, 'headers': response_headers})
+        await self.send_body(
+            receive, send, compression_cache.iter_compress(fp, full_file_path, stat_result, encoding)
+        )
+        return True
+
+    async def send_multipart(
+            self, receive, send, full_file_path, stat_result, reading: PathLock, timer: StageTimer, ranges,
+            content_type: str, validator_headers: list, head: bool,
+    ) -> bool:
+        """
+        `multipart/byteranges` of several ranges. Called with the read lock of the file held, like
+        `handle_file`: the file is opened and checked before the lock is released.
+        """
+        boundary = secrets.token_hex(16)
+        fp = None
+        try:
+            if not head:
+                with timer.stage('file'):
+                    fp = await run_io(_open_version, full_file_path, stat_result)
+        finally:
+            reading.release()
+        if not head and fp is None:
+            return False
+
+        content_length, body = multipart_byteranges(fp, ranges, stat_result.st_size, content_type, boundary)
+        response_headers = [
+            (b'content-type', f'multipart/byteranges; boundary={boundary}'.encode()),
+            (b'content-length', str(content_length).encode()),
+            (b'accept-ranges', b'bytes'),
+            *validator_headers,
+        ]
+        if head:
+            await self.send_empty(send, status.HTTP_206_PARTIAL_CONTENT, response_headers)
+            return True
+
+        await send({
+            'type': 'http.response.start',
+            'status': status.HTTP_206_PARTIAL_CONTENT,
+            'headers': response_headers,
+        })
+        try:
+            await self.send_body(receive, send, body)
+        finally:
+            await run_io(fp.close)
+        return True
+
+    async def send_file(self, scope, receive, send, fp, start: int, end: int):
+        """
+        Bytes `start`-`end` of the open `fp`, handed to the server with the zero-copy extension when it
+        has one; `fp` is closed.
+        """
+        if ZERO_COPY_SEND in scope.get('extensions', {}):
+            try:
+                await send({'type': ZERO_COPY_SEND, 'file': fp, 'offset': start, 'count': end - start + 1})
+            finally:
+                await run_io(fp.close)
+            return
+
+        await self.send_file_range(receive, send, fp, start, end)
+
+    @staticmethod
+    async def send_file_range(receive, send, fp, start: int, end: int):
+        disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+        try:
+            await run_io(fp.seek, start)
+            remaining = end - start + 1
+            block_size = settings.FILE_ASYNC_READ_BLOCK_SIZE
+
+            while remaining > 0 and not disconnected.done():
+                data = await run_io(fp.read, min(block_size, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                await send({'type': 'http.response.body', 'body': data, 'more_body': remaining > 0})
+
+            if remaining > 0 and not disconnected.done():
+                # file shrank while streaming, close the body anyway
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            await run_io(fp.close)
+
+    @staticmethod
+    async def send_body(receive, send, chunks: Iterator[bytes]):
+        """
+        Send the body produced by a blocking iterator (an archive writer, a compressor, a multipart body),
+        advancing it on the I/O pool one chunk per hop and closing it there; Django would iterate it on
+        the event loop. Stops early when the client goes away.
+        """
+        chunks = iter(chunks)
+        disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+        try:
+            while not disconnected.done():
+                chunk = await run_io(next, chunks, None)
+                if chunk is None:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    return
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            disconnected.cancel()
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                await run_io(close)
+
+    @staticmethod
+    async def send_json(send, status_code: int, data, extra_headers=(), head: bool = False, ndjson: bool = False):
+        if ndjson:
+            content_type, body = NDJSON_CONTENT_TYPE, NDJSONRenderer().render(data)
+        else:
+            content_type, body = JSON_CONTENT_TYPE, JSONRenderer().render(data)
+        await send({
+            'type': 'http.response.start',
+            'status': status_code,
+            'headers': [
+                (b'content-type', content_type.encode()),
+                (b'content-length', str(len(body)).encode()),
+                *extra_headers,
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'' if head else body})
+
+    @staticmethod
+    async def send_empty(send, status_code: int, extra_headers=()):
+        await send({'type': 'http.response.start', 'status': status_code, 'headers': list(extra_headers)})
+        await send({'type': 'http.response.body', 'body': b''})
@@ -0,0 +1,100 @@
+import base64
+import binascii
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework import status
+
+from .define import BatchOperation, check_parameter_follow_defined
+from .operations import create_file, delete_file, path_under_root, read_file, update_file
+
+_batch_executor = None
+
+
+def batch_executor() -> ThreadPoolExecutor:
+    global _batch_executor
+    if _batch_executor is None:
+        _batch_executor = ThreadPoolExecutor(max_workers=settings.FILE_BATCH_WORKERS, thread_name_prefix='file-batch')
+    return _batch_executor
+
+
+def _operation_content(operation: dict) -> bytes:
+    if 'contentBase64' in operation:
+        try:
+            return base64.b64decode(operation['contentBase64'], validate=True)
+        except (binascii.Error, TypeError):
+            raise ValueError('contentBase64 is not available')
+
+    content = operation.get('content', '')
+    if not isinstance(content, str):
+        raise ValueError('content is not available')
+    return content.encode()
+
+
+def run_operation(root_path: Path, operation, inline_max_bytes: int) -> dict:
+    """
+    Run one batch item with the same semantics as the matching `FileView` handler.
+    """
+    if not isinstance(operation, dict):
+        return {'status': status.HTTP_400_BAD_REQUEST, 'data': 'operation is not available'}
+
+    op = operation.get('op')
+    file_path = operation.get('path')
+    result = {'op': op, 'path': file_path}
+
+    if not isinstance(op, str) or not check_parameter_follow_defined(op, BatchOperation):
+        return {**result, 'status': status.HTTP_400_BAD_REQUEST, 'data': f'op: {op} is not available'}
+    if not isinstance(file_path, str) or not file_path.strip('/'):
+        return {**result, 'status': status.HTTP_400_BAD_REQUEST, 'data': f'path: {file_path} is not available'}
+
+    file_path = file_path.strip('/')
+    full_file_path = path_under_root(root_path, file_path)
+    if full_file_path is None:
+        return {**result, 'status': status.HTTP_400_BAD_REQUEST, 'data': f'path: {file_path} is not available'}
+
+    try:
+        if op == BatchOperation.GET.value:
+            status_code, data = read_file(full_file_path, file_path, inline_max_bytes)
+        elif op == BatchOperation.CREATE.value:
+            status_code, data = create_file(full_file_path, file_path, [_operation_content(operation)])
+        elif op == BatchOperation.UPDATE.value:
+            status_code, data, _ = update_file(full_file_path, file_path, [_operation_content(operation)])
+        else:
+            status_code, data = delete_file(full_file_path, file_path)
+    except ValueError as e:
+        status_code, data = status.HTTP_400_BAD_REQUEST, str(e)
+    except OSError as e:
+        status_code, data = status.HTTP_500_INTERNAL_SERVER_ERROR, f'/{file_path}: {e.strerror}'
+
+    return {**result, 'status': status_code, 'data': data}
+
+
+def _path_key(index: int, operation):
+    file_path = operation.get('path') if isinstance(operation, dict) else None
+    if not isinstance(file_path, str):
+        # rejected by `run_operation` without touching a file
+        return index
+    return os.path.normpath(file_path.strip('/'))
+
+
+def run_batch(root_path: Path, operations: list, inline_max_bytes: int = 0) -> list[dict]:
+    """
+    Run the operations on the shared batch pool (FILE_BATCH_WORKERS threads) and return one
+    result per operation, in request order. Operations on the same path run one after another in
+    request order, operations on different paths run concurrently.
+    """
+    groups = {}
+    for index, operation in enumerate(operations):
+        groups.setdefault(_path_key(index, operation), []).append(index)
+
+    results = [None] * len(operations)
+
+    def run_group(indexes: list[int]) -> None:
+        for index in indexes:
+            results[index] = run_operation(root_path, operations[index], inline_max_bytes)
+
+    # consumed for the exceptions of the workers
+    list(batch_executor().map(run_group, groups.values()))
+    return results
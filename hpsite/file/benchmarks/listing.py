@@ -0,0 +1,152 @@
+"""
+Compare the legacy listdir-based listing with the scandir listing engine.
+
+Usage (in `hpsite/`):
+    python -m file.benchmarks.listing --entries 10000 --repeat 5
+"""
+import argparse
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from file.listing import File, filter_file_under_path
+
+
+def legacy_filter_file_under_path(path: Path, filter_name: str = '') -> list[File]:
+    return [
+        File(
+            last_modify_time=os.path.getmtime(path / file_name),
+            size=os.path.getsize(path / file_name),
+            name=file_name,
+        )
+        for file_name in os.listdir(path)
+        if re.compile(rf'{filter_name}').search(file_name) and os.path.isfile(path / file_name)
+    ]
+
+
+class _CountingDirEntry:
+    def __init__(self, entry: os.DirEntry, counter: dict):
+        self._entry = entry
+        self._counter = counter
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_file(self, *, follow_symlinks=True):
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def stat(self, *, follow_symlinks=True):
+        self._counter['stat'] += 1
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+
+class _CountingScandir:
+    def __init__(self, scandir, counter: dict, path):
+        self._iterator = scandir(path)
+        self._counter = counter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._iterator.close()
+
+    def __iter__(self):
+        for entry in self._iterator:
+            yield _CountingDirEntry(entry, self._counter)
+
+
+@contextmanager
+def count_stat_calls():
+    """
+    Count `stat` calls (one syscall each) made through `os.stat` and `DirEntry.stat`.
+    `DirEntry.is_file` answers from the readdir `d_type` on Linux and is not counted.
+    """
+    counter = {'stat': 0, 'readdir': 0}
+    original_stat, original_listdir, original_scandir = os.stat, os.listdir, os.scandir
+
+    def stat(*args, **kwargs):
+        counter['stat'] += 1
+        return original_stat(*args, **kwargs)
+
+    def listdir(*args, **kwargs):
+        counter['readdir'] += 1
+        return original_listdir(*args, **kwargs)
+
+    def scandir(path='.'):
+        counter['readdir'] += 1
+        return _CountingScandir(original_scandir, counter, path)
+
+    os.stat, os.listdir, os.scandir = stat, listdir, scandir
+    try:
+        yield counter
+    finally:
+        os.stat, os.listdir, os.scandir = original_stat, original_listdir, original_scandir
+
+
+def make_synthetic_dir(root: Path, entries: int) -> Path:
+    path = root / f'listing_{entries}'
+    path.mkdir()
+    for i in range(entries):
+        with open(path / f'file_{i:08d}.log', 'wb') as fp:
+            fp.write(b'x' * (i % 512))
+    return path
+
+
+def _best_time(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(entries: int = 10000, repeat: int = 5, filter_name: str = 'file_') -> list[dict]:
+    root = Path(tempfile.mkdtemp(prefix='hpsite-bench-'))
+    try:
+        path = make_synthetic_dir(root, entries)
+        cases = [
+            ('legacy listdir', lambda: legacy_filter_file_under_path(path, filter_name)),
+            ('scandir', lambda: filter_file_under_path(path, filter_name)),
+            ('scandir without stat', lambda: filter_file_under_path(path, filter_name, with_stat=False)),
+        ]
+
+        results = []
+        for name, func in cases:
+            with count_stat_calls() as counter:
+                func()
+            seconds = _best_time(func, repeat)
+            per_10k = 10000 / entries
+            results.append({
+                'case': name,
+                'entries': entries,
+                'stat_calls_per_10k': counter['stat'] * per_10k,
+                'seconds_per_10k': seconds * per_10k,
+            })
+        return results
+    finally:
+        shutil.rmtree(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filter', default='file_')
+    args = parser.parse_args()
+
+    print(f'{"case":<24}{"stat calls / 10k":>18}{"ms / 10k":>12}')
+    for result in run(args.entries, args.repeat, args.filter):
+        print(
+            f'{result["case"]:<24}'
+            f'{result["stat_calls_per_10k"]:>18.0f}'
+            f'{result["seconds_per_10k"] * 1000:>12.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare full sort (`File` list + `sort_file_list` + slice) with bounded-heap top-k selection.
+
+Entries are synthetic and kept in memory, so only the selection cost is measured.
+
+Usage (in `hpsite/`):
+    python -m file.benchmarks.sorting --entries 1000000 --limit 50
+"""
+import argparse
+import random
+import time
+
+from file.define import FileAttr, OrderDirection
+from file.listing import SORT_ATTR_MAP, File, sort_file_list
+from file.pagination import select_top_k
+
+
+def make_synthetic_entries(entries: int, seed: int = 0) -> list[tuple]:
+    rand = random.Random(seed)
+    now = time.time()
+    return [
+        (now - rand.random() * 86400 * 365, int(rand.paretovariate(1.2) * 1024), f'file_{i:08d}.log')
+        for i in range(entries)
+    ]
+
+
+def full_sort(entries: list[tuple], sort_by: str, sort_dir: str, limit: int) -> list[str]:
+    file_list = [File(last_modify_time, size, name) for last_modify_time, size, name in entries]
+    sort_file_list(file_list, sort_by, sort_dir)
+    return [file.name for file in file_list[:limit]]
+
+
+def top_k(entries: list[tuple], sort_by: str, sort_dir: str, limit: int) -> list[str]:
+    index = {FileAttr.LAST_MODIFY.value: 0, FileAttr.SIZE.value: 1, FileAttr.NAME.value: 2}[sort_by]
+    keys = ((entry[index], entry[2]) for entry in entries)
+    return [name for _, name in select_top_k(keys, sort_dir, limit)]
+
+
+def _best_time(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(entries: int = 1000000, limit: int = 50, repeat: int = 3) -> list[dict]:
+    synthetic_entries = make_synthetic_entries(entries)
+
+    results = []
+    for sort_by in SORT_ATTR_MAP:
+        for sort_dir in (OrderDirection.ASCENDING.value, OrderDirection.DESCENDING.value):
+            for name, func in (('full sort', full_sort), ('top-k', top_k)):
+                results.append({
+                    'case': name,
+                    'orderBy': sort_by,
+                    'orderByDirection': sort_dir,
+                    'entries': entries,
+                    'limit': limit,
+                    'seconds': _best_time(lambda: func(synthetic_entries, sort_by, sort_dir, limit), repeat),
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=1000000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"case":<12}{"orderBy":<16}{"direction":<14}{"ms":>10}')
+    for result in run(args.entries, args.limit, args.repeat):
+        print(
+            f'{result["case"]:<12}{result["orderBy"]:<16}{result["orderByDirection"]:<14}'
+            f'{result["seconds"] * 1000:>10.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+Benchmark suite of the file API hot paths, run by `python manage.py benchmark`.
+
+Every case returns result dicts `{case, params, metric, unit, better, value}` so that a run can be
+saved as JSON and compared against a baseline run. Requests go through the whole Django stack
+with the test client, in process: concurrency is thread concurrency of one server process.
+"""
+import itertools
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from django.test import Client, override_settings
+
+from file.cache import file_content_cache, listing_cache
+from file.define import FileAttr, OrderDirection
+from file.listing import filter_file_under_path, sort_file_list
+from file.views import FileView
+
+from .listing import count_stat_calls
+
+MIB = 1024 * 1024
+
+SIZE_DISTRIBUTIONS = {
+    # bytes of the i-th synthetic file
+    'empty': lambda rand: 0,
+    'small': lambda rand: rand.randrange(0, 4096),
+    'uniform': lambda rand: rand.randrange(0, 1024 * 1024),
+    'pareto': lambda rand: min(int(rand.paretovariate(1.2) * 1024), 1024 * 1024 * 1024),
+}
+
+CASES = ('filter', 'sort', 'listing', 'download', 'upload')
+
+
+def make_synthetic_tree(root: Path, files: int, distribution: str = 'pareto', seed: int = 0) -> Path:
+    """
+    Flat directory of `files` files sized after `distribution`. Files are sparse (truncated to size),
+    so generating a million of them only costs metadata, and mtimes are spread over a year.
+    """
+    path = root / f'tree_{files}_{distribution}'
+    path.mkdir()
+    rand = random.Random(seed)
+    size_of = SIZE_DISTRIBUTIONS[distribution]
+    now = time.time()
+
+    for i in range(files):
+        file_path = path / f'file_{i:08d}.log'
+        with open(file_path, 'wb') as fp:
+            fp.truncate(size_of(rand))
+        mtime = now - rand.random() * 86400 * 365
+        os.utime(file_path, (mtime, mtime))
+    return path
+
+
+def best_time(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _result(case: str, params: dict, metric: str, unit: str, better: str, value: float) -> dict:
+    return {'case': case, 'params': params, 'metric': metric, 'unit': unit, 'better': better, 'value': value}
+
+
+@contextmanager
+def bench_root() -> Iterator[Path]:
+    # under the project root, so the synthetic trees are reachable through /file/
+    root = Path(tempfile.mkdtemp(prefix='.bench-', dir=FileView.PROJECT_ROOT_PATH))
+    try:
+        yield root
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_filter(path: Path, files: int, distribution: str, repeat: int) -> list[dict]:
+    results = []
+    for name, kwargs in (
+            ('all', {}),
+            ('all without stat', {'with_stat': False}),
+            ('regex', {'filter_name': r'_\d*7\.log$'}),
+            ('prefix', {'filter_name': '^file_0000'}),
+    ):
+        with count_stat_calls() as counter:
+            filter_file_under_path(path, **kwargs)
+        params = {'files': files, 'distribution': distribution, 'filter': name}
+        results.append(_result(
+            'filter_file_under_path', params, 'seconds', 's', 'lower',
+            best_time(lambda: filter_file_under_path(path, **kwargs), repeat),
+        ))
+        results.append(_result('filter_file_under_path', params, 'stat_calls', 'calls', 'lower', counter['stat']))
+    return results
+
+
+def bench_sort(path: Path, files: int, distribution: str, repeat: int) -> list[dict]:
+    file_list = filter_file_under_path(path)
+    results = []
+    for sort_by in (FileAttr.NAME.value, FileAttr.SIZE.value, FileAttr.LAST_MODIFY.value):
+        for sort_dir in (OrderDirection.ASCENDING.value, OrderDirection.DESCENDING.value):
+            def sort():
+                # sort a fresh copy, list.sort is much faster on already sorted input
+                sort_file_list(list(file_list), sort_by, sort_dir)
+
+            params = {'files': files, 'distribution': distribution, 'orderBy': sort_by, 'orderByDirection': sort_dir}
+            results.append(_result('sort_file_list', params, 'seconds', 's', 'lower', best_time(sort, repeat)))
+    return results
+
+
+def _consume(response) -> int:
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def bench_listing(client: Client, url: str, files: int, distribution: str, repeat: int) -> list[dict]:
+    results = []
+    for query in ({}, {'orderBy': FileAttr.SIZE.value}, {'orderBy': FileAttr.SIZE.value, 'limit': 100}):
+        def cold_request():
+            listing_cache.clear()
+            _consume(client.get(url, data=query))
+
+        def cached_request():
+            _consume(client.get(url, data=query))
+
+        params = {'files': files, 'distribution': distribution, **query}
+        results.append(_result('listing request', params, 'seconds', 's', 'lower', best_time(cold_request, repeat)))
+        cached_request()
+        results.append(_result(
+            'listing request (cached)', params, 'seconds', 's', 'lower', best_time(cached_request, repeat)
+        ))
+    return results
+
+
+def _throughput(total_bytes: int, seconds: float) -> float:
+    return total_bytes / MIB / seconds if seconds else 0.0
+
+
+def bench_download(root: Path, size_mib: int, concurrency: int, repeat: int) -> list[dict]:
+    file_path = root / 'download.bin'
+    block = random.Random(0).randbytes(MIB)
+    with open(file_path, 'wb') as fp:
+        for _ in range(size_mib):
+            fp.write(block)
+    url = f'/file/{file_path.relative_to(FileView.PROJECT_ROOT_PATH)}/'
+
+    def download(_):
+        return _consume(Client().get(url))
+
+    results = []
+    for clients in sorted({1, concurrency}):
+        file_content_cache.clear()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            seconds = best_time(lambda: list(executor.map(download, range(clients))), repeat)
+        params = {'sizeMiB': size_mib, 'clients': clients}
+        results.append(_result(
+            'download', params, 'throughput', 'MiB/s', 'higher', _throughput(size_mib * MIB * clients, seconds)
+        ))
+    return results
+
+
+def bench_upload(root: Path, size_mib: int, concurrency: int, repeat: int) -> list[dict]:
+    upload_dir = root / 'uploads'
+    upload_dir.mkdir()
+    body = random.Random(1).randbytes(size_mib * MIB)
+    url_prefix = f'/file/{upload_dir.relative_to(FileView.PROJECT_ROOT_PATH)}'
+    counter = itertools.count()
+    counter_lock = threading.Lock()
+
+    def upload(_):
+        with counter_lock:
+            index = next(counter)
+        response = Client().post(f'{url_prefix}/upload_{index}/', data=body, content_type='application/octet-stream')
+        if response.status_code != 201:
+            raise RuntimeError(f'upload failed: {response.status_code} {response.content[:200]!r}')
+
+    results = []
+    for clients in sorted({1, concurrency}):
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            seconds = best_time(lambda: list(executor.map(upload, range(clients))), repeat)
+        params = {'sizeMiB': size_mib, 'clients': clients}
+        results.append(_result(
+            'upload', params, 'throughput', 'MiB/s', 'higher', _throughput(size_mib * MIB * clients, seconds)
+        ))
+    return results
+
+
+def run(
+        files_list: list[int],
+        distribution: str = 'pareto',
+        cases: tuple = CASES,
+        repeat: int = 3,
+        concurrency: int = 4,
+        download_mib: int = 64,
+        upload_mib: int = 16,
+        seed: int = 0,
+        progress=None,
+) -> list[dict]:
+    results = []
+    with bench_root() as root, override_settings(ALLOWED_HOSTS=['testserver']):
+        client = Client()
+        for files in files_list if {'filter', 'sort', 'listing'} & set(cases) else ():
+            if progress:
+                progress(f'generating {files} files ({distribution})')
+            path = make_synthetic_tree(root, files, distribution, seed)
+
+            if 'filter' in cases:
+                results += bench_filter(path, files, distribution, repeat)
+            if 'sort' in cases:
+                results += bench_sort(path, files, distribution, repeat)
+            if 'listing' in cases:
+                url = f'/file/{path.relative_to(FileView.PROJECT_ROOT_PATH)}/'
+                results += bench_listing(client, url, files, distribution, repeat)
+            shutil.rmtree(path)
+
+        if 'download' in cases:
+            if progress:
+                progress(f'download of {download_mib} MiB')
+            results += bench_download(root, download_mib, concurrency, repeat)
+        if 'upload' in cases:
+            if progress:
+                progress(f'upload of {upload_mib} MiB')
+            results += bench_upload(root, upload_mib, concurrency, repeat)
+    return results
+
+
+def result_key(result: dict) -> tuple:
+    return result['case'], result['metric'], tuple(sorted(result['params'].items()))
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[dict]:
+    """
+    Relative change of every result found in `baseline`, positive being worse;
+    `regression` is set when it exceeds `threshold` (0.1 is 10 %).
+    """
+    baseline_map = {result_key(result): result for result in baseline}
+    comparisons = []
+    for result in results:
+        base = baseline_map.get(result_key(result))
+        if base is None or not base['value']:
+            continue
+
+        change = (result['value'] - base['value']) / base['value']
+        if result['better'] == 'higher':
+            change = -change
+        comparisons.append({
+            'case': result['case'],
+            'params': result['params'],
+            'metric': result['metric'],
+            'baseline': base['value'],
+            'value': result['value'],
+            'change': change,
+            'regression': change > threshold,
+        })
+    return comparisons
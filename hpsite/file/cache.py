@@ -0,0 +1,179 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable, Optional
+
+from django.conf import settings
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by entry count and by the total `size` reported on `set`.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, size: int) -> bool:
+        if size > self.max_bytes or self.max_entries <= 0:
+            return False
+
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evict_size) = self._entries.popitem(last=False)
+                self._bytes -= evict_size
+                self.evictions += 1
+        return True
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def pop_matching(self, predicate) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._pop(key)
+        return len(keys)
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'maxEntries': self.max_entries,
+                'maxBytes': self.max_bytes,
+            }
+
+
+def directory_validator(path: Path, stat_result: Optional[os.stat_result] = None) -> tuple:
+    if stat_result is None:
+        stat_result = os.stat(path)
+    return stat_result.st_dev, stat_result.st_ino, stat_result.st_mtime_ns
+
+
+class ListingCache(LRUCache):
+    """
+    Sorted directory listings keyed by (directory, filterByName, orderBy, orderByDirection).
+
+    Entries are only served while the directory's (dev, inode, mtime) is unchanged. Changing a file's
+    content does not touch the directory mtime, so our own write handlers call `invalidate_directory`,
+    which also bumps the directory generation used in listing ETags.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        super().__init__(max_entries, max_bytes)
+        self._generations = {}
+
+    def get_listing(self, directory: Path, params: tuple, validator: tuple) -> Optional[list[str]]:
+        key = (str(directory), *params)
+        entry = self.get(key)
+        if entry is None:
+            return None
+
+        entry_validator, names = entry
+        if entry_validator != validator:
+            self.pop(key)
+            return None
+        return names
+
+    def set_listing(self, directory: Path, params: tuple, validator: tuple, names: list[str]) -> None:
+        size = sys.getsizeof(names) + sum(map(sys.getsizeof, names))
+        self.set((str(directory), *params), (validator, names), size)
+
+    def generation(self, directory: Path) -> int:
+        return self._generations.get(str(directory), 0)
+
+    def invalidate_directory(self, directory: Path) -> None:
+        directory = str(directory)
+        with self._lock:
+            self._generations[directory] = self._generations.get(directory, 0) + 1
+        self.pop_matching(lambda key: key[0] == directory)
+
+
+def file_validator(stat_result: os.stat_result) -> tuple:
+    return stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns
+
+
+class FileContentCache(LRUCache):
+    """
+    Content of small, frequently read files keyed by (path, content coding), '' being identity.
+
+    Entries are only served while the file's (inode, size, mtime) is unchanged, which the caller
+    already has from its one `stat`; our own write handlers call `invalidate` as well.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, max_file_size: int):
+        super().__init__(max_entries, max_bytes)
+        self.max_file_size = max_file_size
+
+    def admits(self, size: int) -> bool:
+        return self.max_entries > 0 and size <= self.max_file_size
+
+    def get_content(self, path: Path, stat_result: os.stat_result, encoding: str = '') -> Optional[bytes]:
+        key = (str(path), encoding)
+        entry = self.get(key)
+        if entry is None:
+            return None
+
+        entry_validator, data = entry
+        if entry_validator != file_validator(stat_result):
+            self.pop(key)
+            return None
+        return data
+
+    def set_content(self, path: Path, stat_result: os.stat_result, encoding: str, data: bytes) -> None:
+        self.set((str(path), encoding), (file_validator(stat_result), data), sys.getsizeof(data))
+
+    def invalidate(self, path: Path) -> None:
+        path = str(path)
+        self.pop_matching(lambda key: key[0] == path)
+
+
+listing_cache = ListingCache(
+    max_entries=settings.FILE_LISTING_CACHE_MAX_ENTRIES,
+    max_bytes=settings.FILE_LISTING_CACHE_MAX_BYTES,
+)
+
+file_content_cache = FileContentCache(
+    max_entries=settings.FILE_CONTENT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.FILE_CONTENT_CACHE_MAX_BYTES,
+    max_file_size=settings.FILE_CONTENT_CACHE_MAX_FILE_SIZE,
+)
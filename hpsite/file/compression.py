@@ -0,0 +1,249 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from django.conf import settings
+
+BLOCK_SIZE = 64 * 1024
+
+# preferred first; `deflate` is the zlib format of RFC 9110, not raw deflate
+ENCODING_WBITS = {
+    'gzip': 31,
+    'deflate': 15,
+}
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    'text/',
+    'application/json',
+    'application/xml',
+    'application/javascript',
+    'application/x-ndjson',
+    'application/x-yaml',
+    'image/svg+xml',
+)
+
+# guessed as application/octet-stream, yet plain text
+COMPRESSIBLE_EXTENSIONS = {'.log', '.jsonl', '.ndjson', '.yaml', '.yml'}
+
+
+def is_compressible(path: Path, content_type: str) -> bool:
+    """
+    Text-like content; archives, images and media are left alone since they are compressed already.
+    """
+    return content_type.startswith(COMPRESSIBLE_CONTENT_TYPES) or path.suffix.lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content coding of `Accept-Encoding` we support with the highest q-value, None for identity.
+    """
+    if not accept_encoding:
+        return None
+
+    qvalues = {}
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        name = name.strip().lower()
+        qvalue = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                qvalue = float(params[2:])
+            except ValueError:
+                qvalue = 0.0
+        qvalues[name] = qvalue
+
+    candidates = [
+        (qvalues.get(encoding, qvalues.get('*', 0.0)), encoding)
+        for encoding in ENCODING_WBITS
+    ]
+    best_qvalue, best_encoding = max(candidates, key=lambda candidate: candidate[0])
+    return best_encoding if best_qvalue > 0 else None
+
+
+def choose_encoding(accept_encoding: Optional[str], path: Path, content_type: str, size: int) -> Optional[str]:
+    if size < settings.FILE_COMPRESSION_MIN_SIZE or not is_compressible(path, content_type):
+        return None
+    return negotiate_encoding(accept_encoding)
+
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    compressor = zlib.compressobj(settings.FILE_COMPRESSION_LEVEL, zlib.DEFLATED, ENCODING_WBITS[encoding])
+    return compressor.compress(data) + compressor.flush()
+
+
+def compressed_etag(etag: str, encoding: str) -> str:
+    # every representation gets its own strong validator
+    return f'{etag[:-1]}-{encoding}"'
+
+
+class CompressionCache:
+    """
+    Precompressed sidecars under FILE_COMPRESSION_CACHE_DIR/<sha1 of source path>/<ino-size-mtime_ns>.<encoding>.
+
+    A sidecar only matches the exact source version it was made from, so a changed mtime is a miss;
+    our own writes drop the source's directory at once. Sidecars are evicted oldest-used first
+    when the total exceeds FILE_COMPRESSION_CACHE_MAX_BYTES, which may be shared by processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bytes = None
+
+    @property
+    def root(self) -> Path:
+        return Path(settings.FILE_COMPRESSION_CACHE_DIR)
+
+    @property
+    def enabled(self) -> bool:
+        return settings.FILE_COMPRESSION_CACHE_MAX_BYTES > 0
+
+    def source_directory(self, source: Path) -> Path:
+        return self.root / hashlib.sha1(os.fsencode(os.path.normpath(source))).hexdigest()
+
+    def sidecar_path(self, source: Path, stat_result: os.stat_result, encoding: str) -> Path:
+        return self.source_directory(source) / f'{_version(stat_result)}.{encoding}'
+
+    def open(self, source: Path, stat_result: os.stat_result, encoding: str) -> Optional[BinaryIO]:
+        if not self.enabled:
+            return None
+
+        sidecar = self.sidecar_path(source, stat_result, encoding)
+        try:
+            fp = open(sidecar, 'rb')
+        except FileNotFoundError:
+            return None
+
+        # the sidecar mtime is its last use, for eviction
+        os.utime(fp.fileno())
+        return fp
+
+    def invalidate(self, source: Path) -> None:
+        shutil.rmtree(self.source_directory(source), ignore_errors=True)
+
+    def iter_compress(
+            self,
+            fp: BinaryIO,
+            source: Path,
+            stat_result: os.stat_result,
+            encoding: str,
+    ) -> Iterator[bytes]:
+        """
+        Compress the open source `fp` block by block, writing the output to a new sidecar alongside.
+        The sidecar is kept only if the whole source was compressed and did not change meanwhile.
+        """
+        compressor = zlib.compressobj(settings.FILE_COMPRESSION_LEVEL, zlib.DEFLATED, ENCODING_WBITS[encoding])
+
+        sidecar_fp = None
+        if self.enabled:
+            sidecar_directory = self.source_directory(source)
+            sidecar_directory.mkdir(parents=True, exist_ok=True)
+            sidecar_fp = tempfile.NamedTemporaryFile(dir=sidecar_directory, prefix='.tmp-', delete=False)
+        written = 0
+
+        try:
+            with fp:
+                for block in iter(lambda: fp.read(BLOCK_SIZE), b''):
+                    data = compressor.compress(block)
+                    if data:
+                        if sidecar_fp is not None:
+                            sidecar_fp.write(data)
+                            written += len(data)
+                        yield data
+
+                data = compressor.flush()
+                current_stat = os.fstat(fp.fileno())
+
+            if sidecar_fp is not None:
+                sidecar_fp.write(data)
+                written += len(data)
+                sidecar_fp.close()
+                complete = _same_version(stat_result, current_stat)
+                if complete and written <= settings.FILE_COMPRESSION_CACHE_MAX_BYTES:
+                    os.replace(sidecar_fp.name, self.sidecar_path(source, stat_result, encoding))
+                    sidecar_fp = None
+                    self._drop_stale_versions(source, stat_result)
+                    self._add_bytes(written)
+            yield data
+        finally:
+            if sidecar_fp is not None:
+                sidecar_fp.close()
+                try:
+                    os.remove(sidecar_fp.name)
+                except FileNotFoundError:
+                    pass
+
+    def _drop_stale_versions(self, source: Path, stat_result: os.stat_result) -> None:
+        # sidecars of a source changed outside the API
+        keep_prefixes = ('.tmp-', f'{_version(stat_result)}.')
+        for entry in os.scandir(self.source_directory(source)):
+            if not entry.name.startswith(keep_prefixes):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def _add_bytes(self, size: int) -> None:
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self.total_bytes()
+            else:
+                self._bytes += size
+            if self._bytes > settings.FILE_COMPRESSION_CACHE_MAX_BYTES:
+                self._bytes = self.evict(settings.FILE_COMPRESSION_CACHE_MAX_BYTES * 9 // 10)
+
+    def _iter_sidecars(self) -> Iterator[tuple[float, int, str]]:
+        if not self.root.is_dir():
+            return
+        with os.scandir(self.root) as directories:
+            for directory in directories:
+                if not directory.is_dir(follow_symlinks=False):
+                    continue
+                try:
+                    entries = list(os.scandir(directory.path))
+                except FileNotFoundError:
+                    continue
+                for entry in entries:
+                    if entry.name.startswith('.tmp-'):
+                        # still being written
+                        continue
+                    try:
+                        stat_result = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    yield stat_result.st_mtime, stat_result.st_size, entry.path
+
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._iter_sidecars())
+
+    def evict(self, max_bytes: int) -> int:
+        """
+        Remove the least recently used sidecars until at most `max_bytes` remain, return the total left.
+        """
+        sidecars = sorted(self._iter_sidecars())
+        total = sum(size for _, size, _ in sidecars)
+        for _, size, path in sidecars:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+
+def _version(stat_result: os.stat_result) -> str:
+    return f'{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}'
+
+
+def _same_version(stat_result: os.stat_result, current_stat: os.stat_result) -> bool:
+    return _version(stat_result) == _version(current_stat)
+
+
+compression_cache = CompressionCache()
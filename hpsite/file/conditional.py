@@ -0,0 +1,56 @@
+import hashlib
+import mimetypes
+import os
+from pathlib import Path
+
+from django.utils.http import http_date, parse_http_date_safe
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def file_last_modified(stat_result: os.stat_result) -> str:
+    return http_date(stat_result.st_mtime)
+
+
+def guess_content_type(path: Path) -> str:
+    # same guess as django.http.FileResponse
+    content_type, encoding = mimetypes.guess_type(path.name)
+    content_type = {
+        'bzip2': 'application/x-bzip',
+        'gzip': 'application/gzip',
+        'xz': 'application/x-xz',
+    }.get(encoding, content_type)
+    return content_type or 'application/octet-stream'
+
+
+def if_range_matches(if_range: str, etag: str, stat_result: os.stat_result) -> bool:
+    """
+    `If-Range` holds either a strong entity-tag or the exact Last-Modified date of the representation.
+    """
+    if_range = if_range.strip()
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+
+    if_range_time = parse_http_date_safe(if_range)
+    return if_range_time is not None and if_range_time == int(stat_result.st_mtime)
+
+
+def if_match_matches(if_match: str, etag: str) -> bool:
+    """
+    `If-Match` holds `*` or a list of entity-tags, compared strongly: a weak tag never matches.
+    """
+    tags = [tag.strip() for tag in if_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+def listing_etag(directory_validator: tuple, generation: int, query_params, media_type: str) -> str:
+    """
+    Validator of a directory listing: the directory (dev, inode, mtime_ns), our own write generation
+    for that directory, every query parameter that shapes the listing and the negotiated media type,
+    so the JSON and NDJSON representations never share an ETag.
+    """
+    params = sorted(query_params.lists())
+    digest = hashlib.sha1(repr((directory_validator, generation, params, media_type)).encode()).hexdigest()
+    return f'"{digest}"'
@@ -7,11 +7,46 @@ class FileAttr(Enum):
     NAME = 'fileName'
 
 
+class ListingField(Enum):
+    SIZE = 'size'
+    LAST_MODIFY = 'lastModified'
+    TYPE = 'type'
+
+
 class OrderDirection(Enum):
     DESCENDING = 'Descending'
     ASCENDING = 'Ascending'
 
 
+class BatchOperation(Enum):
+    GET = 'get'
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+
+class SortScope(Enum):
+    DIRECTORY = 'directory'
+    GLOBAL = 'global'
+
+
+class ArchiveFormat(Enum):
+    ZIP = 'zip'
+    TAR = 'tar'
+    TAR_GZ = 'tar.gz'
+
+
+class WatchEventType(Enum):
+    CREATED = 'created'
+    MODIFIED = 'modified'
+    DELETED = 'deleted'
+
+
+class DownloadOffload(Enum):
+    X_ACCEL_REDIRECT = 'x-accel-redirect'
+    X_SENDFILE = 'x-sendfile'
+
+
 def check_parameter_follow_defined(param: str, define_cls: type(Enum)):
     define_param_list = [e.value for e in define_cls]
 
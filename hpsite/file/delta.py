@@ -0,0 +1,135 @@
+"""
+Delta listings: `GET /file/<dir>/?since=<token>` returns the names added, modified and removed since
+the listing that returned `token`, so syncing a mirror costs the size of the changes.
+"""
+import secrets
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+from .cache import LRUCache
+from .define import WatchEventType
+from .watch import diff_snapshot, scan_snapshot
+
+# rough bytes of one snapshot entry or change record besides its name
+ENTRY_OVERHEAD = 120
+
+
+class DirectoryHistory:
+    """
+    Current `{name: (size, mtime_ns)}` snapshot of a directory and the log of its last `max_changes`
+    changes, numbered from 1. A token `<epoch>.<number>` is the state after change `number`; the epoch
+    changes whenever the history is rebuilt, so tokens of a dropped history are detected.
+    """
+
+    def __init__(self, snapshot: dict, max_changes: int):
+        self.epoch = secrets.token_hex(4)
+        self.entries = snapshot
+        self.last_number = 0
+        self.log = deque()
+        self.max_changes = max_changes
+        self.lock = threading.Lock()
+
+    @property
+    def token(self) -> str:
+        return f'{self.epoch}.{self.last_number}'
+
+    def size(self) -> int:
+        return (
+            sys.getsizeof(self.entries)
+            + sum(map(sys.getsizeof, self.entries))
+            + (len(self.entries) + len(self.log)) * ENTRY_OVERHEAD
+        )
+
+    def update(self, snapshot: dict) -> None:
+        for event_type, name in diff_snapshot(self.entries, snapshot):
+            self.last_number += 1
+            self.log.append((self.last_number, event_type, name))
+        while len(self.log) > self.max_changes:
+            self.log.popleft()
+        self.entries = snapshot
+
+    def changes_since(self, token: str) -> Optional[tuple[list[str], list[str], list[str]]]:
+        """
+        `(added, modified, removed)` names since `token`, sorted; None when the token is unknown or
+        older than the retained log.
+        """
+        epoch, _, number = token.partition('.')
+        if epoch != self.epoch or not number.isdigit():
+            return None
+
+        number = int(number)
+        oldest_number = self.log[0][0] if self.log else self.last_number + 1
+        if not oldest_number - 1 <= number <= self.last_number:
+            return None
+
+        # first change of every name after the token, walking the log backwards
+        first_change = {}
+        for change_number, event_type, name in reversed(self.log):
+            if change_number <= number:
+                break
+            first_change[name] = event_type
+
+        added, modified, removed = [], [], []
+        for name in sorted(first_change):
+            existed = first_change[name] != WatchEventType.CREATED.value
+            exists = name in self.entries
+            if existed and exists:
+                modified.append(name)
+            elif exists:
+                added.append(name)
+            elif existed:
+                removed.append(name)
+        return added, modified, removed
+
+
+class DeltaStore(LRUCache):
+    """
+    `DirectoryHistory` of the directories synced with `since`, bounded by directory count and bytes.
+    """
+
+    def delta_listing(self, directory: Path, since: str) -> dict:
+        """
+        Rescan `directory` and return its changes since `since`. An empty, unknown or expired token
+        gets every name in `added` with `reset`: the client replaces its mirror instead of patching it.
+        """
+        key = str(directory)
+        history = self.get(key)
+        if history is None:
+            history = DirectoryHistory(scan_snapshot(directory), settings.FILE_DELTA_MAX_CHANGES)
+        else:
+            with history.lock:
+                # scanned under the lock, so concurrent syncs apply their snapshots in order
+                history.update(scan_snapshot(directory))
+
+        with history.lock:
+            changes = history.changes_since(since) if since else None
+            if changes is None:
+                payload = {
+                    'isDirectory': True,
+                    'token': history.token,
+                    'reset': True,
+                    'added': sorted(history.entries),
+                    'modified': [],
+                    'removed': [],
+                }
+            else:
+                added, modified, removed = changes
+                payload = {
+                    'isDirectory': True,
+                    'token': history.token,
+                    'added': added,
+                    'modified': modified,
+                    'removed': removed,
+                }
+            size = history.size()
+
+        self.set(key, history, size)
+        return payload
+
+
+delta_store = DeltaStore(settings.FILE_DELTA_MAX_DIRECTORIES, settings.FILE_DELTA_MAX_BYTES)
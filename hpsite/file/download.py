@@ -0,0 +1,240 @@
+import io
+import os
+import secrets
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework import status
+
+from .cache import file_content_cache, file_validator
+from .compression import choose_encoding, compress_bytes, compressed_etag, compression_cache, is_compressible
+from .conditional import file_etag, file_last_modified, guess_content_type, if_range_matches
+from .define import DownloadOffload
+from .mapped import open_download
+from .ranges import content_range, iter_file_ranges, multipart_byteranges, parse_range_header
+
+
+def _requested_ranges(request, stat_result: os.stat_result, etag: str):
+    range_header = request.META.get('HTTP_RANGE')
+    if not range_header or request.method not in ('GET', 'HEAD'):
+        return None
+
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and not if_range_matches(if_range, etag, stat_result):
+        return None
+
+    return parse_range_header(range_header, stat_result.st_size)
+
+
+def cached_file_content(full_file_path: Path, stat_result: os.stat_result, encoding: str = '') -> Optional[bytes]:
+    """
+    Content of a small file in the given coding from the content cache, else read once and admitted.
+    None if the file is over FILE_CONTENT_CACHE_MAX_FILE_SIZE or no longer the version of `stat_result`.
+    """
+    if not file_content_cache.admits(stat_result.st_size):
+        return None
+
+    data = file_content_cache.get_content(full_file_path, stat_result, encoding)
+    if data is not None:
+        return data
+
+    with open(full_file_path, 'rb') as fp:
+        if file_validator(os.fstat(fp.fileno())) != file_validator(stat_result):
+            return None
+        data = fp.read(stat_result.st_size + 1)
+    if len(data) != stat_result.st_size:
+        return None
+
+    if encoding:
+        data = compress_bytes(data, encoding)
+    file_content_cache.set_content(full_file_path, stat_result, encoding, data)
+    return data
+
+
+def _content_response(full_file_path: Path, content_type: str, data: bytes) -> FileResponse:
+    # same headers as a FileResponse of the file itself
+    return FileResponse(io.BytesIO(data), filename=full_file_path.name, content_type=content_type)
+
+
+def _file_response(fp) -> FileResponse:
+    response = FileResponse(fp)
+    # only used when the server has no `wsgi.file_wrapper` to `sendfile` the file with
+    response.block_size = settings.FILE_DOWNLOAD_CHUNK_SIZE
+    return response
+
+
+def _ranges_response(fp, ranges: list[tuple[int, int]], size: int, content_type: str) -> StreamingHttpResponse:
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(
+            iter_file_ranges(fp, ranges),
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type=content_type,
+        )
+        response['Content-Range'] = content_range(start, end, size)
+        response['Content-Length'] = end - start + 1
+    else:
+        boundary = secrets.token_hex(16)
+        content_length, body = multipart_byteranges(fp, ranges, size, content_type, boundary)
+        response = StreamingHttpResponse(
+            body,
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response['Content-Length'] = content_length
+
+    # the body closes `fp` once sent, this closes it when the body is never iterated
+    response._resource_closers.append(fp.close)
+    return response
+
+
+def offload_header(full_file_path: Path) -> Optional[tuple[str, str]]:
+    """
+    `(header, value)` handing the body of `full_file_path` to the fronting proxy per FILE_DOWNLOAD_OFFLOAD,
+    None when offloading is off or the file is outside FILE_DOWNLOAD_OFFLOAD_ROOT.
+    """
+    offload = settings.FILE_DOWNLOAD_OFFLOAD
+    if offload == DownloadOffload.X_SENDFILE.value:
+        return 'X-Sendfile', os.path.abspath(full_file_path)
+
+    if offload == DownloadOffload.X_ACCEL_REDIRECT.value:
+        try:
+            relative_path = Path(os.path.abspath(full_file_path)).relative_to(settings.FILE_DOWNLOAD_OFFLOAD_ROOT)
+        except ValueError:
+            return None
+        location = settings.FILE_DOWNLOAD_ACCEL_REDIRECT_LOCATION.rstrip('/')
+        return 'X-Accel-Redirect', f'{location}/{quote(relative_path.as_posix())}'
+
+    return None
+
+
+def _offload_response(full_file_path: Path, content_type: str, header: tuple[str, str]) -> FileResponse:
+    # headers of a FileResponse of the file, the proxy sends the body and answers `Range` itself
+    response = _content_response(full_file_path, content_type, b'')
+    del response['Content-Length']
+    response[header[0]] = header[1]
+    return response
+
+
+def _compressed_response(request, full_file_path: Path, stat_result: os.stat_result, content_type: str, encoding: str):
+    data = cached_file_content(full_file_path, stat_result, encoding)
+    sidecar_fp = None
+    if data is None:
+        sidecar_fp = compression_cache.open(full_file_path, stat_result, encoding)
+
+    if data is not None:
+        response = _content_response(full_file_path, content_type, data)
+    elif sidecar_fp is not None:
+        response = FileResponse(sidecar_fp, filename=full_file_path.name, content_type=content_type)
+    else:
+        if request.method == 'HEAD':
+            body = ()
+        else:
+            body = compression_cache.iter_compress(open(full_file_path, 'rb'), full_file_path, stat_result, encoding)
+        response = StreamingHttpResponse(body, content_type=content_type)
+
+    response['Content-Encoding'] = encoding
+    return response
+
+
+def head_file(request, full_file_path: Path, stat_result: os.stat_result) -> HttpResponseBase:
+    """
+    Headers of `serve_file` without a `Range`, from the `stat` of the view: the file is neither opened nor
+    compressed. A compressed representation has no known length, so it is sent without `Content-Length`.
+    """
+    size = stat_result.st_size
+    content_type = guess_content_type(full_file_path)
+    etag = file_etag(stat_result)
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'), full_file_path, content_type, size)
+    if encoding is not None:
+        etag = compressed_etag(etag, encoding)
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat_result.st_mtime))
+    if response is None:
+        response = HttpResponse(content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
+        if encoding is None:
+            response['Content-Length'] = size
+        else:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    response['Last-Modified'] = file_last_modified(stat_result)
+    if is_compressible(full_file_path, content_type):
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def serve_file(request, full_file_path: Path, stat_result: os.stat_result) -> HttpResponseBase:
+    """
+    Serve a regular file, honouring conditional requests (RFC 7232) and single and multiple
+    byte `Range` requests (RFC 7233). A 304/412 is answered from the `stat` of the view, taken under the
+    read lock of the file, without opening the file.
+
+    Text-like files are gzip/deflate compressed on the fly when `Accept-Encoding` allows it, except
+    for `Range` requests, which address the identity bytes; repeated downloads reuse a sidecar.
+    Small files are served from the in-process content cache, without opening them. Other identity
+    bodies are left to the fronting proxy with FILE_DOWNLOAD_OFFLOAD, else sent with `sendfile` or
+    read from a memory map (`open_download`); the file is opened before returning, so the caller's
+    lock covers it, and a file changed since `stat_result` is served as the version that was opened.
+    """
+    size = stat_result.st_size
+    content_type = guess_content_type(full_file_path)
+    compressible = is_compressible(full_file_path, content_type)
+    etag = file_etag(stat_result)
+
+    encoding = None
+    if 'HTTP_RANGE' not in request.META:
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'), full_file_path, content_type, size)
+        if encoding is not None:
+            etag = compressed_etag(etag, encoding)
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat_result.st_mtime))
+    if response is not None:
+        response['ETag'] = etag
+        response['Last-Modified'] = file_last_modified(stat_result)
+        if compressible:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    ranges = _requested_ranges(request, stat_result, etag)
+    offload = offload_header(full_file_path) if encoding is None else None
+
+    if offload is not None:
+        response = _offload_response(full_file_path, content_type, offload)
+
+    elif encoding is not None:
+        response = _compressed_response(request, full_file_path, stat_result, content_type, encoding)
+
+    elif ranges == []:
+        response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        response['Content-Range'] = f'bytes */{size}'
+
+    elif ranges is None and (data := cached_file_content(full_file_path, stat_result)) is not None:
+        response = _content_response(full_file_path, content_type, data)
+
+    else:
+        # opened here, under the read lock of the view, and never after the response is returned
+        fp = open_download(full_file_path)
+        open_stat = os.fstat(fp.fileno())
+        if file_validator(open_stat) != file_validator(stat_result):
+            # changed outside the API since the `stat` of the view: answer for the version that was opened
+            fp.close()
+            return serve_file(request, full_file_path, open_stat)
+
+        if ranges is None:
+            response = _file_response(fp)
+        else:
+            response = _ranges_response(fp, ranges, size, content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = file_last_modified(stat_result)
+    if compressible:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,198 @@
+import math
+import re
+from datetime import timezone
+from fnmatch import translate
+from functools import lru_cache
+from typing import Callable, Optional, Union
+
+from django.utils.dateparse import parse_datetime
+
+PATTERN_CACHE_SIZE = 256
+
+_REGEX_SPECIAL_CHARS = frozenset('.^$*+?{}[]\\|()')
+
+
+def _regex_literal(pattern: str) -> Optional[str]:
+    """
+    The string `pattern` matches literally, or None if it uses any regex syntax beyond escaped punctuation.
+    """
+    chars = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            if char.isalnum() or char == '_':
+                # \d, \b, \1 ...
+                return None
+            chars.append(char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char in _REGEX_SPECIAL_CHARS:
+            return None
+        else:
+            chars.append(char)
+    return None if escaped else ''.join(chars)
+
+
+def _ends_with_anchor(pattern: str) -> bool:
+    # `$` not escaped by an odd run of backslashes
+    if not pattern.endswith('$'):
+        return False
+    backslashes = len(pattern) - 1 - len(pattern[:-1].rstrip('\\'))
+    return backslashes % 2 == 0
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_name_pattern(pattern: str) -> Callable[[str], bool]:
+    """
+    Predicate equivalent to `re.search(pattern, name)`. Literal patterns, optionally anchored with
+    `^`/`$`, become plain string tests; anything else is compiled once and cached.
+    Raise re.error on an invalid pattern.
+    """
+    anchored_start = pattern.startswith('^')
+    body = pattern[1:] if anchored_start else pattern
+    anchored_end = _ends_with_anchor(body)
+    if anchored_end:
+        body = body[:-1]
+
+    literal = _regex_literal(body)
+    if literal is None:
+        return re.compile(pattern).search
+
+    # like re, `$` also matches right before a trailing newline
+    literal_newline = literal + '\n'
+    if anchored_start and anchored_end:
+        return lambda name: name == literal or name == literal_newline
+    if anchored_start:
+        return lambda name: name.startswith(literal)
+    if anchored_end:
+        return lambda name: name.endswith(literal) or name.endswith(literal_newline)
+    return lambda name: literal in name
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_glob_pattern(pattern: str) -> Callable[[str], bool]:
+    """
+    Predicate equivalent to `fnmatch.fnmatchcase(name, pattern)`. Globs made of literals and `*` only
+    (`name`, `prefix*`, `*suffix`, `prefix*suffix`, `*part*`) become plain string tests.
+    """
+    if '?' not in pattern and '[' not in pattern:
+        parts = pattern.split('*')
+        if len(parts) == 1:
+            return pattern.__eq__
+        if len(parts) == 2:
+            prefix, suffix = parts
+            min_length = len(prefix) + len(suffix)
+            return lambda name: len(name) >= min_length and name.startswith(prefix) and name.endswith(suffix)
+        if len(parts) == 3 and not parts[0] and not parts[2]:
+            part = parts[1]
+            return lambda name: part in name
+
+    return re.compile(translate(pattern)).match
+
+
+def glob_to_regex(pattern: str) -> str:
+    return '^' + translate(pattern)
+
+
+def _parse_size(query, param: str) -> Optional[int]:
+    value = query.get(param)
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise ValueError(f'{param}: {value} is not available')
+    return int(value)
+
+
+def _parse_time(query, param: str) -> Optional[float]:
+    """
+    A POSIX timestamp or an ISO 8601 date and time, UTC when it has no offset.
+    """
+    value = query.get(param)
+    if value is None:
+        return None
+
+    try:
+        timestamp = float(value)
+    except ValueError:
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValueError(f'{param}: {value} is not available')
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        timestamp = parsed.timestamp()
+
+    if not math.isfinite(timestamp):
+        raise ValueError(f'{param}: {value} is not available')
+    return timestamp
+
+
+class FileFilter:
+    """
+    Entry selection of a listing query dict: `filterByName` (regex search), `filterByGlob`,
+    `minSize`/`maxSize` (bytes, inclusive) and `modifiedAfter`/`modifiedBefore` (exclusive).
+    Raise ValueError with the client-facing message on an unavailable parameter.
+
+    `name_match` and `stat_match` are None when there is nothing to check, so a scan can test
+    names before any `stat` and drop entries before building a `File`.
+    """
+
+    def __init__(self, query):
+        self.filter_by_name = query.get('filterByName', '')
+        self.filter_by_glob = query.get('filterByGlob', '')
+        self.min_size = _parse_size(query, 'minSize')
+        self.max_size = _parse_size(query, 'maxSize')
+        self.modified_after = _parse_time(query, 'modifiedAfter')
+        self.modified_before = _parse_time(query, 'modifiedBefore')
+
+        name_predicates = []
+        if self.filter_by_name:
+            try:
+                name_predicates.append(compile_name_pattern(self.filter_by_name))
+            except re.error:
+                raise ValueError(f'filterByName: {self.filter_by_name} is not available')
+        if self.filter_by_glob:
+            name_predicates.append(compile_glob_pattern(self.filter_by_glob))
+        self.name_match = _all_of(name_predicates)
+
+        stat_predicates = []
+        if self.min_size is not None:
+            stat_predicates.append(lambda stat_result: stat_result.st_size >= self.min_size)
+        if self.max_size is not None:
+            stat_predicates.append(lambda stat_result: stat_result.st_size <= self.max_size)
+        if self.modified_after is not None:
+            stat_predicates.append(lambda stat_result: stat_result.st_mtime > self.modified_after)
+        if self.modified_before is not None:
+            stat_predicates.append(lambda stat_result: stat_result.st_mtime < self.modified_before)
+        self.stat_match = _all_of(stat_predicates)
+
+    @property
+    def cache_key(self) -> tuple:
+        return (
+            self.filter_by_name,
+            self.filter_by_glob,
+            self.min_size,
+            self.max_size,
+            self.modified_after,
+            self.modified_before,
+        )
+
+
+def _all_of(predicates: list[Callable]) -> Optional[Callable]:
+    if not predicates:
+        return None
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda value: all(predicate(value) for predicate in predicates)
+
+
+def as_file_filter(filter_name: Union[str, FileFilter]) -> FileFilter:
+    """
+    Accept the historical `filterByName` string wherever a `FileFilter` is expected.
+    """
+    if isinstance(filter_name, FileFilter):
+        return filter_name
+    return FileFilter({'filterByName': filter_name} if filter_name else {})
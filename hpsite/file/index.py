@@ -0,0 +1,124 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import Q
+
+from .define import OrderDirection
+from .filters import glob_to_regex
+from .listing import SORT_ATTR_MAP, ListingQuery, iter_file_under_path
+from .models import IndexedDirectory, IndexedFile
+
+BULK_BATCH_SIZE = 1000
+
+
+def index_path_key(path: Path) -> str:
+    return os.path.normpath(path)
+
+
+def get_indexed_directory(path: Path) -> Optional[IndexedDirectory]:
+    return IndexedDirectory.objects.filter(path=index_path_key(path)).first()
+
+
+def query_index(directory: IndexedDirectory, query: ListingQuery) -> list[tuple]:
+    """
+    Return (value, name) keys of the listing in (orderBy, name) order as an index range scan:
+    the cursor becomes a `>`/`<` bound on the (directory, orderBy, name) index and `limit` a LIMIT.
+    """
+    field = SORT_ATTR_MAP[query.order_by]
+    queryset = IndexedFile.objects.filter(directory=directory)
+
+    file_filter = query.file_filter
+    if file_filter.filter_by_name:
+        # the sqlite backend implements REGEXP with re.search, same as the filesystem filter
+        queryset = queryset.filter(name__regex=file_filter.filter_by_name)
+    if file_filter.filter_by_glob:
+        queryset = queryset.filter(name__regex=glob_to_regex(file_filter.filter_by_glob))
+    if file_filter.min_size is not None:
+        queryset = queryset.filter(size__gte=file_filter.min_size)
+    if file_filter.max_size is not None:
+        queryset = queryset.filter(size__lte=file_filter.max_size)
+    if file_filter.modified_after is not None:
+        queryset = queryset.filter(last_modify_time__gt=file_filter.modified_after)
+    if file_filter.modified_before is not None:
+        queryset = queryset.filter(last_modify_time__lt=file_filter.modified_before)
+
+    descending = query.order_by_direction == OrderDirection.DESCENDING.value
+    if query.after is not None:
+        value, name = query.after
+        lookup = 'lt' if descending else 'gt'
+        queryset = queryset.filter(Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'name__{lookup}': name}))
+
+    prefix = '-' if descending else ''
+    queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}name')
+    if query.limit is not None:
+        queryset = queryset[:query.limit + 1]
+
+    if field == 'name':
+        return [(name, name) for name in queryset.values_list('name', flat=True)]
+    return list(queryset.values_list(field, 'name'))
+
+
+def update_index_entry(path: Path) -> None:
+    """
+    Keep the index of `path`'s directory in sync after one of our own writes, if it is indexed.
+    """
+    directory = get_indexed_directory(path.parent)
+    if directory is None:
+        return
+
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        IndexedFile.objects.filter(directory=directory, name=path.name).delete()
+        return
+
+    IndexedFile.objects.update_or_create(
+        directory=directory,
+        name=path.name,
+        defaults={'size': stat_result.st_size, 'last_modify_time': stat_result.st_mtime},
+    )
+
+
+def rescan_directory(path: Path, quick: bool = False) -> dict:
+    """
+    Bring the index of one directory in line with the filesystem, writing only the differences.
+
+    With `quick=True` a directory whose mtime did not change since the last scan is skipped; this
+    misses in-place content changes made outside the API.
+    """
+    directory_mtime_ns = os.stat(path).st_mtime_ns
+    directory, _ = IndexedDirectory.objects.get_or_create(path=index_path_key(path))
+    if quick and directory.scanned_mtime_ns == directory_mtime_ns:
+        return {'added': 0, 'updated': 0, 'removed': 0}
+
+    indexed = {
+        name: (pk, size, last_modify_time)
+        for pk, name, size, last_modify_time in directory.files.values_list('pk', 'name', 'size', 'last_modify_time')
+    }
+
+    to_create = []
+    to_update = []
+    for file in iter_file_under_path(path):
+        indexed_file = indexed.pop(file.name, None)
+        if indexed_file is None:
+            to_create.append(IndexedFile(
+                directory=directory, name=file.name, size=file.size, last_modify_time=file.last_modify_time
+            ))
+        elif indexed_file[1:] != (file.size, file.last_modify_time):
+            to_update.append(IndexedFile(
+                pk=indexed_file[0], size=file.size, last_modify_time=file.last_modify_time
+            ))
+
+    with transaction.atomic():
+        IndexedFile.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+        IndexedFile.objects.bulk_update(to_update, ['size', 'last_modify_time'], batch_size=BULK_BATCH_SIZE)
+        removed_pks = [pk for pk, _, _ in indexed.values()]
+        for start in range(0, len(removed_pks), BULK_BATCH_SIZE):
+            IndexedFile.objects.filter(pk__in=removed_pks[start:start + BULK_BATCH_SIZE]).delete()
+
+        directory.scanned_mtime_ns = directory_mtime_ns
+        directory.save(update_fields=['scanned_mtime_ns', 'scanned_at'])
+
+    return {'added': len(to_create), 'updated': len(to_update), 'removed': len(removed_pks)}
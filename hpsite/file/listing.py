@@ -0,0 +1,216 @@
+import os
+from operator import attrgetter
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from .conditional import guess_content_type
+from .define import FileAttr, ListingField, OrderDirection, check_parameter_follow_defined
+from .filters import FileFilter, as_file_filter
+from .pagination import decode_cursor
+from .upload import is_upload_temp_name
+
+SORT_ATTR_MAP = {
+    FileAttr.LAST_MODIFY.value: 'last_modify_time',
+    FileAttr.SIZE.value: 'size',
+    FileAttr.NAME.value: 'name',
+}
+
+
+class File:
+    __slots__ = ('last_modify_time', 'size', 'name')
+
+    def __init__(self, last_modify_time: Optional[float], size: Optional[int], name: str):
+        self.last_modify_time = last_modify_time
+        self.size = size
+        self.name = name
+
+
+class ListingQuery:
+    """
+    Validated directory listing parameters of a query dict (`request.GET`).
+    Raise ValueError with the client-facing message on an unavailable parameter.
+    """
+
+    def __init__(self, query):
+        self.order_by = query.get('orderBy') or FileAttr.NAME.value
+        if not check_parameter_follow_defined(self.order_by, FileAttr):
+            raise ValueError(f'orderBy: {self.order_by} is not available')
+
+        self.order_by_direction = query.get('orderByDirection') or OrderDirection.ASCENDING.value
+        if not check_parameter_follow_defined(self.order_by_direction, OrderDirection):
+            raise ValueError(f'orderByDirection: {self.order_by_direction} is not available')
+
+        self.file_filter = FileFilter(query)
+
+        self.limit = query.get('limit')
+        if self.limit is not None:
+            if not self.limit.isdigit() or int(self.limit) <= 0:
+                raise ValueError(f'limit: {self.limit} is not available')
+            self.limit = int(self.limit)
+
+        # per-entry metadata, `files` becomes a list of `{name, ...}` objects
+        self.fields = ()
+        fields = query.get('fields')
+        if fields:
+            self.fields = tuple(dict.fromkeys(fields.split(',')))
+            for field in self.fields:
+                if not check_parameter_follow_defined(field, ListingField):
+                    raise ValueError(f'fields: {field} is not available')
+
+        cursor = query.get('cursor')
+        self.after = None
+        if cursor:
+            if self.limit is None:
+                raise ValueError('cursor is only available with limit')
+            self.after = decode_cursor(cursor, self.order_by, self.order_by_direction)
+
+    @property
+    def cache_params(self) -> tuple:
+        return self.file_filter.cache_key, self.order_by, self.order_by_direction, self.fields
+
+    @property
+    def directory_validated(self) -> bool:
+        """
+        Whether the listing only changes with its directory, so it may be cached and answered by the
+        directory ETag. Sizes and mtimes of `fields` change without touching the directory mtime.
+        """
+        return not need_stat_for_fields(self.fields)
+
+    @property
+    def with_stat(self) -> bool:
+        return need_stat_for_order(self.order_by) or need_stat_for_fields(self.fields)
+
+
+def need_stat_for_order(order_by: str) -> bool:
+    return order_by != FileAttr.NAME.value
+
+
+def need_stat_for_fields(fields: tuple) -> bool:
+    return ListingField.SIZE.value in fields or ListingField.LAST_MODIFY.value in fields
+
+
+def file_entry(file: File, fields: tuple) -> dict:
+    entry = {'name': file.name}
+    for field in fields:
+        if field == ListingField.SIZE.value:
+            entry[field] = file.size
+        elif field == ListingField.LAST_MODIFY.value:
+            entry[field] = file.last_modify_time
+        else:
+            entry[field] = guess_content_type(Path(file.name))
+    return entry
+
+
+def listing_entries(file_list: list[File], fields: tuple = ()) -> list:
+    """
+    The `files` of a listing: bare names, or `file_entry` objects when `fields` are requested.
+    """
+    if not fields:
+        return [file.name for file in file_list]
+    return [file_entry(file, fields) for file in file_list]
+
+
+def stat_listing_entries(path: Path, names: list[str], fields: tuple) -> list[dict]:
+    """
+    `file_entry` objects of a page of names, one `stat` each; files removed since are left out.
+    """
+    entries = []
+    for name in names:
+        try:
+            stat_result = os.stat(path / name)
+        except FileNotFoundError:
+            continue
+        entries.append(file_entry(File(stat_result.st_mtime, stat_result.st_size, name), fields))
+    return entries
+
+
+def _iter_file_entry_under_path(path: Path, filter_name: Union[str, FileFilter] = '') -> Iterator[os.DirEntry]:
+    file_filter = as_file_filter(filter_name)
+    name_match, stat_match = file_filter.name_match, file_filter.stat_match
+
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if is_upload_temp_name(entry.name):
+                continue
+            if name_match is not None and not name_match(entry.name):
+                continue
+
+            if not entry.is_file():
+                continue
+
+            if stat_match is not None:
+                # DirEntry caches the result, callers reuse it for free
+                try:
+                    if not stat_match(entry.stat()):
+                        continue
+                except FileNotFoundError:
+                    continue
+
+            yield entry
+
+
+def iter_file_under_path(
+        path: Path,
+        filter_name: Union[str, FileFilter] = '',
+        with_stat: bool = True,
+) -> Iterator[File]:
+    if not with_stat:
+        for entry in _iter_file_entry_under_path(path, filter_name):
+            yield File(None, None, entry.name)
+        return
+
+    for entry in _iter_file_entry_under_path(path, filter_name):
+        try:
+            stat_result = entry.stat()
+        except FileNotFoundError:
+            # removed between readdir and stat
+            continue
+        yield File(stat_result.st_mtime, stat_result.st_size, entry.name)
+
+
+def filter_file_under_path(
+        path: Path,
+        filter_name: Union[str, FileFilter] = '',
+        with_stat: bool = True,
+) -> list[File]:
+    """
+    List regular files directly under `path` whose name matches `filter_name` (regex search),
+    or that pass a `FileFilter`, whose metadata predicates are checked before any `File` is built.
+
+    Single `os.scandir` pass: the file type comes from the cached `DirEntry` data and at most one
+    `stat` is issued per matching entry. With `with_stat=False` no `stat` is issued at all and
+    `last_modify_time`/`size` are left as None, which is enough when sorting by name.
+    """
+    return list(iter_file_under_path(path, filter_name, with_stat))
+
+
+def iter_file_key_under_path(
+        path: Path,
+        filter_name: Union[str, FileFilter] = '',
+        sort_by: str = FileAttr.NAME.value,
+) -> Iterator[tuple]:
+    """
+    Same selection as `filter_file_under_path`, but yield bare `(sort value, name)` keys instead of `File`s.
+    """
+    if not need_stat_for_order(sort_by):
+        for entry in _iter_file_entry_under_path(path, filter_name):
+            yield entry.name, entry.name
+        return
+
+    stat_attr = 'st_size' if sort_by == FileAttr.SIZE.value else 'st_mtime'
+    for entry in _iter_file_entry_under_path(path, filter_name):
+        try:
+            yield getattr(entry.stat(), stat_attr), entry.name
+        except FileNotFoundError:
+            continue
+
+
+def sort_file_list(
+        file_list: list[File],
+        sort_by: str = FileAttr.NAME.value,
+        sort_dir: str = OrderDirection.ASCENDING.value
+) -> None:
+    file_list.sort(
+        key=attrgetter(SORT_ATTR_MAP[sort_by]),
+        reverse=(sort_dir == OrderDirection.DESCENDING.value),
+    )
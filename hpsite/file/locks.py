@@ -0,0 +1,186 @@
+"""
+Per-path reader/writer locks shared by the threads and the worker processes serving the file API.
+
+Paths are hashed onto FILE_LOCK_STRIPES stripes. Within a process every stripe is a reader/writer
+lock; across processes it is a POSIX record lock on byte `stripe` of FILE_LOCK_PATH, taken shared by
+the first reader of the process and exclusive by a writer. Readers never block each other, writers of
+one path (or of two paths on the same stripe) are serialised, and a waiting writer holds back new
+readers so it is not starved.
+"""
+import fcntl
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+
+class _Stripe:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.waiting_writers = 0
+        # a first reader is waiting for the shared record lock, outside the condition
+        self.locking_file = False
+
+
+class PathLock:
+    """
+    A held lock, released by `release` or at the end of a `with` block; releasing twice is a no-op.
+    """
+
+    def __init__(self, manager: 'PathLockManager', stripe: int, exclusive: bool):
+        self._manager = manager
+        self._stripe = stripe
+        self._exclusive = exclusive
+        self._held = True
+
+    def release(self) -> None:
+        if self._held:
+            self._held = False
+            self._manager.release(self._stripe, self._exclusive)
+
+    def __enter__(self) -> 'PathLock':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class PathLockManager:
+    def __init__(self, lock_path: Path, stripes: int):
+        self.lock_path = lock_path
+        self.stripes = [_Stripe() for _ in range(stripes)]
+        self._fd = None
+        self._fd_lock = threading.Lock()
+
+    def stripe_of(self, path: os.PathLike) -> int:
+        # crc32 rather than `hash`, which is salted per process
+        return zlib.crc32(os.path.normpath(os.path.abspath(path)).encode()) % len(self.stripes)
+
+    def _lock_fd(self) -> int:
+        if self._fd is None:
+            with self._fd_lock:
+                if self._fd is None:
+                    self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+        return self._fd
+
+    def _lock_file(self, stripe: int, operation: int, blocking: bool = True) -> bool:
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+        try:
+            fcntl.lockf(self._lock_fd(), operation, 1, stripe)
+        except BlockingIOError:
+            return False
+        except PermissionError:
+            # some systems report a held record lock as EACCES
+            if blocking:
+                raise
+            return False
+        return True
+
+    def acquire(self, stripe: int, exclusive: bool, blocking: bool = True) -> bool:
+        if not blocking:
+            return self._try_acquire(stripe, exclusive)
+
+        state = self.stripes[stripe]
+        with state.condition:
+            if exclusive:
+                state.waiting_writers += 1
+                try:
+                    state.condition.wait_for(
+                        lambda: not state.writer and not state.readers and not state.locking_file
+                    )
+                finally:
+                    state.waiting_writers -= 1
+                # reserved in the process: other threads wait for the condition meanwhile
+                state.writer = True
+            else:
+                state.condition.wait_for(
+                    lambda: not state.writer and not state.waiting_writers and not state.locking_file
+                )
+                if state.readers:
+                    # record locks belong to the process: only its first reader takes the shared lock
+                    state.readers += 1
+                    return True
+                state.locking_file = True
+
+        # the record lock may wait for another process, so it is never taken with the condition
+        # held, which would stall `try_reading` on the event loop behind it
+        locked = False
+        try:
+            self._lock_file(stripe, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            locked = True
+        finally:
+            with state.condition:
+                if exclusive:
+                    state.writer = locked
+                else:
+                    state.locking_file = False
+                    state.readers += locked
+                state.condition.notify_all()
+        return True
+
+    def _try_acquire(self, stripe: int, exclusive: bool) -> bool:
+        state = self.stripes[stripe]
+        if not state.condition.acquire(blocking=False):
+            return False
+        try:
+            if state.writer or state.locking_file:
+                return False
+            if exclusive:
+                if state.readers or not self._lock_file(stripe, fcntl.LOCK_EX, blocking=False):
+                    return False
+                state.writer = True
+            else:
+                if state.waiting_writers:
+                    return False
+                if not state.readers and not self._lock_file(stripe, fcntl.LOCK_SH, blocking=False):
+                    return False
+                state.readers += 1
+            return True
+        finally:
+            state.condition.release()
+
+    def release(self, stripe: int, exclusive: bool) -> None:
+        state = self.stripes[stripe]
+        with state.condition:
+            if exclusive:
+                state.writer = False
+            else:
+                state.readers -= 1
+            if not state.writer and not state.readers:
+                self._lock_file(stripe, fcntl.LOCK_UN)
+            state.condition.notify_all()
+
+    def reading(self, path: os.PathLike) -> PathLock:
+        """
+        Wait for the shared lock of `path` and return it held.
+        """
+        stripe = self.stripe_of(path)
+        self.acquire(stripe, exclusive=False)
+        return PathLock(self, stripe, exclusive=False)
+
+    def writing(self, path: os.PathLike) -> PathLock:
+        """
+        Wait for the exclusive lock of `path` and return it held.
+        """
+        stripe = self.stripe_of(path)
+        self.acquire(stripe, exclusive=True)
+        return PathLock(self, stripe, exclusive=True)
+
+    def try_reading(self, path: os.PathLike) -> Optional[PathLock]:
+        """
+        The shared lock of `path` if it is free of writers right now, None otherwise. Never waits, not
+        even for the stripe's condition, so it is safe on the event loop.
+        """
+        stripe = self.stripe_of(path)
+        if not self.acquire(stripe, exclusive=False, blocking=False):
+            return None
+        return PathLock(self, stripe, exclusive=False)
+
+
+path_locks = PathLockManager(settings.FILE_LOCK_PATH, settings.FILE_LOCK_STRIPES)
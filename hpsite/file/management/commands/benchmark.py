@@ -0,0 +1,84 @@
+import json
+import platform
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from file.benchmarks.suite import CASES, SIZE_DISTRIBUTIONS, compare, run
+
+RUN_OPTIONS = ('files', 'distribution', 'cases', 'repeat', 'concurrency', 'download_size', 'upload_size', 'seed')
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark listing, sorting, listing requests, downloads and uploads on synthetic trees; '
+        'write the results as JSON and optionally compare them with a baseline run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--files', type=int, nargs='+', default=[1000, 10000], help='synthetic directory sizes, up to 1000000'
+        )
+        parser.add_argument('--distribution', choices=sorted(SIZE_DISTRIBUTIONS), default='pareto')
+        parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES))
+        parser.add_argument('--repeat', type=int, default=3, help='best of this many runs is reported')
+        parser.add_argument('--concurrency', type=int, default=4, help='concurrent clients of download and upload')
+        parser.add_argument('--download-size', type=int, default=64, help='MiB')
+        parser.add_argument('--upload-size', type=int, default=16, help='MiB per client')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='write the JSON results to this file instead of stdout')
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+        parser.add_argument(
+            '--threshold', type=float, default=0.1, help='relative slowdown counted as a regression, 0.1 is 10%%'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--repeat and --concurrency must be at least 1')
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as fp:
+                baseline = json.load(fp)['results']
+
+        results = run(
+            options['files'],
+            distribution=options['distribution'],
+            cases=tuple(options['cases']),
+            repeat=options['repeat'],
+            concurrency=options['concurrency'],
+            download_mib=options['download_size'],
+            upload_mib=options['upload_size'],
+            seed=options['seed'],
+            progress=lambda message: self.stderr.write(message),
+        )
+        report = {
+            'meta': {
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'options': {name: options[name] for name in RUN_OPTIONS},
+            },
+            'results': results,
+        }
+
+        if baseline is not None:
+            report['comparison'] = compare(results, baseline, options['threshold'])
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                fp.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if baseline is not None:
+            regressions = [comparison for comparison in report['comparison'] if comparison['regression']]
+            for comparison in regressions:
+                self.stderr.write(
+                    f'regression: {comparison["case"]} {comparison["params"]} {comparison["metric"]} '
+                    f'{comparison["baseline"]:.6g} -> {comparison["value"]:.6g} ({comparison["change"]:+.1%})'
+                )
+            if regressions:
+                raise CommandError(f'{len(regressions)} results regressed beyond {options["threshold"]:.0%}')
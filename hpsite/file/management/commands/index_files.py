@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from file.index import get_indexed_directory, rescan_directory
+from file.models import IndexedDirectory
+from file.views import FileView
+
+
+class Command(BaseCommand):
+    help = 'Create or incrementally repair the file metadata index of directories (paths relative to the project root).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*')
+        parser.add_argument('--all', action='store_true', help='rescan every indexed directory')
+        parser.add_argument(
+            '--quick', action='store_true', help='skip directories whose mtime did not change since the last scan'
+        )
+        parser.add_argument('--drop', action='store_true', help='remove the given directories from the index')
+
+    def handle(self, *args, **options):
+        directories = [FileView.PROJECT_ROOT_PATH / path for path in options['paths']]
+        if options['all']:
+            directories += [FileView.PROJECT_ROOT_PATH / path for path in IndexedDirectory.objects.values_list(
+                'path', flat=True
+            )]
+        if not directories:
+            raise CommandError('give at least one directory or --all')
+
+        for directory in directories:
+            if options['drop']:
+                indexed_directory = get_indexed_directory(directory)
+                if indexed_directory is not None:
+                    indexed_directory.delete()
+                self.stdout.write(f'{directory}: dropped')
+                continue
+
+            if not directory.is_dir():
+                self.stderr.write(f'{directory}: not a directory')
+                continue
+
+            result = rescan_directory(directory, quick=options['quick'])
+            self.stdout.write(
+                f'{directory}: {result["added"]} added, {result["updated"]} updated, {result["removed"]} removed'
+            )
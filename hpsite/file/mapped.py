@@ -0,0 +1,88 @@
+"""
+File objects for download bodies. A server with `wsgi.file_wrapper` (or the ASGI zero-copy extension)
+sends them with `sendfile` through `fileno`; every other server reads them through `MappedFile.read`,
+which slices a memory map of the file instead of issuing one `read` call per chunk.
+"""
+import io
+import mmap
+import os
+from typing import Optional
+
+from django.conf import settings
+
+
+class MappedFile(io.RawIOBase):
+    """
+    Read-only binary file served from a memory map, created on the first `read`, so a file that is
+    sent with `sendfile` is never mapped.
+
+    The map is taken over the size at open time. Our own writes replace files or write past their
+    end, which a map tolerates; a file truncated in place by another program while it is being read
+    would fault the process, hence FILE_DOWNLOAD_MMAP_MIN_SIZE = None to turn mapping off.
+    """
+
+    def __init__(self, fp, size: int):
+        super().__init__()
+        self._fp = fp
+        self.name = fp.name
+        self._size = size
+        self._map: Optional[mmap.mmap] = None
+        self._position = 0
+
+    def fileno(self) -> int:
+        return self._fp.fileno()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(offset, 0)
+        # keep the descriptor in step for `sendfile`, which starts at its offset
+        self._fp.seek(self._position)
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        end = self._size if size is None or size < 0 else min(self._position + size, self._size)
+        if end <= self._position:
+            return b''
+        if self._map is None:
+            self._map = mmap.mmap(self._fp.fileno(), self._size, access=mmap.ACCESS_READ)
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+        data = self._map[self._position:end]
+        self._position = end
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._fp.close()
+        super().close()
+
+
+def open_download(path: os.PathLike):
+    """
+    `path` opened for sending: a `MappedFile` from FILE_DOWNLOAD_MMAP_MIN_SIZE bytes, else a plain file.
+    """
+    fp = open(path, 'rb')
+    min_size = settings.FILE_DOWNLOAD_MMAP_MIN_SIZE
+    if min_size is not None:
+        size = os.fstat(fp.fileno()).st_size
+        if size >= min_size:
+            return MappedFile(fp, size)
+    return fp
@@ -0,0 +1,191 @@
+"""
+In-process request metrics of the file API: per-request stage timing reported in `Server-Timing`,
+and a registry of counters and histograms exposed as Prometheus text on GET /file/_metrics/.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from rest_framework.response import Response
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        # `le` buckets: the first bound not below the value
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels: tuple, extra: str = '') -> str:
+    parts = [f'{name}="{value}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and fixed-bucket histograms keyed by name and label values.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: tuple = LATENCY_BUCKETS, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append(f'# TYPE {name} counter')
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+            for name in sorted(self._histograms):
+                lines.append(f'# TYPE {name} histogram')
+                for labels, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                        cumulative += count
+                        le = 'le="+Inf"' if bound == '+Inf' else f'le="{_format_value(bound)}"'
+                        lines.append(f'{name}_bucket{_format_labels(labels, le)} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+class StageTimer:
+    """
+    Wall time of the named stages of one request, in the order they ran.
+    """
+
+    __slots__ = ('start', 'stages')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self, total: float) -> str:
+        return ', '.join(f'{name};dur={seconds * 1000:.3f}' for name, seconds in (*self.stages, ('total', total)))
+
+
+def observe_request(view: str, method: str, status_code: int, seconds: float, sent: int, received: int) -> None:
+    metrics.observe('file_api_request_seconds', seconds, view=view, method=method, status=status_code)
+    if sent:
+        metrics.inc('file_api_bytes_sent_total', sent, view=view)
+    if received:
+        metrics.inc('file_api_bytes_received_total', received, view=view)
+
+
+def _iter_counting(chunks, view: str):
+    sent = 0
+    try:
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        metrics.inc('file_api_bytes_sent_total', sent, view=view)
+
+
+class StageTimingMixin:
+    """
+    APIView mixin: `self.timer.stage(name)` times a stage of the handler, DRF rendering is timed as
+    `render`, the stages are sent in `Server-Timing` and the request is recorded in `metrics`.
+    The body of a streaming response is counted as it is sent, its time is not part of the latency.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self.timer = StageTimer()
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        timer = getattr(self, 'timer', None)
+        if timer is None or not settings.FILE_METRICS_ENABLED:
+            return response
+
+        if isinstance(response, Response) and not response.is_rendered:
+            with timer.stage('render'):
+                response.render()
+
+        view = type(self).__name__
+        total = timer.elapsed()
+        response['Server-Timing'] = timer.server_timing(total)
+        for name, seconds in timer.stages:
+            metrics.observe('file_api_stage_seconds', seconds, view=view, stage=name)
+
+        if request.method == 'HEAD':
+            sent = 0
+        elif response.has_header('Content-Length'):
+            sent = int(response['Content-Length'])
+        elif response.streaming:
+            sent = 0
+            response.streaming_content = _iter_counting(response.streaming_content, view)
+        else:
+            sent = len(response.content)
+
+        try:
+            received = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            received = 0
+        observe_request(view, request.method, response.status_code, total, sent, received)
+        return response
@@ -0,0 +1,46 @@
+# Generated by Django 4.1.7 on 2026-10-17 11:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedDirectory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=4096, unique=True)),
+                ('scanned_mtime_ns', models.BigIntegerField(null=True)),
+                ('scanned_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='IndexedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField()),
+                ('last_modify_time', models.FloatField()),
+                ('directory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='file.indexeddirectory')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='indexedfile',
+            index=models.Index(fields=['directory', 'size', 'name'], name='file_indexedfile_size'),
+        ),
+        migrations.AddIndex(
+            model_name='indexedfile',
+            index=models.Index(fields=['directory', 'last_modify_time', 'name'], name='file_indexedfile_last_modify'),
+        ),
+        migrations.AddConstraint(
+            model_name='indexedfile',
+            constraint=models.UniqueConstraint(fields=('directory', 'name'), name='file_indexedfile_directory_name'),
+        ),
+    ]
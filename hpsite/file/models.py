@@ -1,3 +1,30 @@
 from django.db import models
 
-# Create your models here.
+
+class IndexedDirectory(models.Model):
+    path = models.CharField(max_length=4096, unique=True)
+    scanned_mtime_ns = models.BigIntegerField(null=True)
+    scanned_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.path
+
+
+class IndexedFile(models.Model):
+    directory = models.ForeignKey(IndexedDirectory, on_delete=models.CASCADE, related_name='files')
+    name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    last_modify_time = models.FloatField()
+
+    class Meta:
+        constraints = [
+            # also serves fileName ordered range scans
+            models.UniqueConstraint(fields=['directory', 'name'], name='file_indexedfile_directory_name'),
+        ]
+        indexes = [
+            models.Index(fields=['directory', 'size', 'name'], name='file_indexedfile_size'),
+            models.Index(fields=['directory', 'last_modify_time', 'name'], name='file_indexedfile_last_modify'),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,223 @@
+"""
+Single-file operations shared by `FileView` and the batch endpoint, returning (status code, response data).
+"""
+import base64
+import os
+import stat
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+from rest_framework import status
+
+from .cache import file_content_cache, listing_cache
+from .compression import compression_cache
+from .conditional import file_etag, file_last_modified, if_match_matches
+from .index import update_index_entry
+from .listing import filter_file_under_path, sort_file_list
+from .locks import path_locks
+from .upload import pwrite_chunks, write_file_atomic
+from .upload_session import parse_content_range
+from .watch import watch_registry
+
+
+class WriteQuery:
+    """
+    Where a PATCH writes its body, from the query dict (`request.GET`) and headers:
+
+    - `Content-Range: bytes start-end/*` or `?offset=N`: in place from that offset, the file grows when
+      the body runs past its end; the total of `Content-Range` is not checked
+    - `?append=true`: in place at the end of the file
+    - none of them: the whole file is replaced
+
+    `If-Match` and `?expectedSize=N` make the write conditional on the current ETag and size.
+    Raise ValueError with the client-facing message on an unavailable parameter.
+    """
+
+    def __init__(self, query, content_range: str = None, if_match: str = None):
+        self.offset = None
+        self.expect_length = None
+        self.if_match = if_match
+
+        append = query.get('append', 'false')
+        if append not in ('true', 'false'):
+            raise ValueError(f'append: {append} is not available')
+        self.append = append == 'true'
+
+        offset = query.get('offset')
+        if content_range:
+            self.offset, end = parse_content_range(content_range)
+            self.expect_length = end - self.offset + 1
+        elif offset is not None:
+            if not offset.isdigit():
+                raise ValueError(f'offset: {offset} is not available')
+            self.offset = int(offset)
+        if self.append and (content_range or offset is not None):
+            raise ValueError('append is not available with offset or Content-Range')
+
+        self.expected_size = query.get('expectedSize')
+        if self.expected_size is not None:
+            if not self.expected_size.isdigit():
+                raise ValueError(f'expectedSize: {self.expected_size} is not available')
+            self.expected_size = int(self.expected_size)
+
+    @property
+    def in_place(self) -> bool:
+        return self.append or self.offset is not None
+
+    def precondition_failed(self, stat_result: os.stat_result) -> bool:
+        if self.if_match is not None and not if_match_matches(self.if_match, file_etag(stat_result)):
+            return True
+        return self.expected_size is not None and stat_result.st_size != self.expected_size
+
+
+def path_under_root(root_path: Path, file_path: str) -> Optional[Path]:
+    """
+    `root_path / file_path`, or None when it resolves outside `root_path` through `..` or a symlink.
+    """
+    full_file_path = root_path / file_path
+    try:
+        full_file_path.resolve().relative_to(root_path.resolve())
+    except ValueError:
+        return None
+    return full_file_path
+
+
+def after_write(full_file_path: Path) -> None:
+    """
+    Keep every derived view of the file's directory in sync after one of our own writes.
+    """
+    listing_cache.invalidate_directory(full_file_path.parent)
+    file_content_cache.invalidate(full_file_path)
+    compression_cache.invalidate(full_file_path)
+    if settings.FILE_LISTING_USE_INDEX:
+        update_index_entry(full_file_path)
+    watch_registry.notify(full_file_path)
+
+
+def create_file(full_file_path: Path, file_path: str, chunks: Iterable[bytes]) -> tuple[int, str]:
+    with path_locks.writing(full_file_path):
+        if full_file_path.is_file():
+            return status.HTTP_400_BAD_REQUEST, f'/{file_path} already exist.'
+
+        try:
+            write_file_atomic(chunks, full_file_path, replace=False)
+        except FileExistsError:
+            return status.HTTP_400_BAD_REQUEST, f'/{file_path} already exist.'
+        after_write(full_file_path)
+
+    return status.HTTP_201_CREATED, f'/{file_path} created'
+
+
+def update_file(
+        full_file_path: Path,
+        file_path: str,
+        chunks: Iterable[bytes],
+        write_query: Optional[WriteQuery] = None,
+) -> tuple[int, str, Optional[str]]:
+    """
+    Returns (status code, response data, ETag of the written file); the ETag is taken before the write
+    lock is released, so it is never the ETag of a later writer's content.
+    """
+    with path_locks.writing(full_file_path):
+        try:
+            stat_result = os.stat(full_file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            stat_result = None
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return status.HTTP_400_BAD_REQUEST, f'/{file_path} not exist.', None
+
+        if write_query is not None and write_query.precondition_failed(stat_result):
+            return status.HTTP_412_PRECONDITION_FAILED, f'/{file_path} precondition failed.', None
+
+        if write_query is not None and write_query.in_place:
+            return write_file_range(full_file_path, file_path, chunks, write_query, stat_result.st_size)
+
+        write_file_atomic(chunks, full_file_path)
+        after_write(full_file_path)
+        etag = file_etag(os.stat(full_file_path))
+
+    return status.HTTP_200_OK, f'/{file_path} updated.', etag
+
+
+def write_file_range(
+        full_file_path: Path,
+        file_path: str,
+        chunks: Iterable[bytes],
+        write_query: WriteQuery,
+        size: int,
+) -> tuple[int, str, Optional[str]]:
+    """
+    Write `chunks` into the file of `size` bytes in place with `pwrite`, so the cost of an update is the
+    size of the change instead of the size of the file. Called with the write lock of the path held.
+    """
+    offset = size if write_query.append else write_query.offset
+    if offset > size:
+        return status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, f'offset {offset} is beyond size {size}', None
+
+    error = None
+    expect_length = write_query.expect_length
+    fd = os.open(full_file_path, os.O_WRONLY)
+    try:
+        try:
+            written = pwrite_chunks(fd, chunks, offset, expect_length)
+            if expect_length is not None and written != expect_length:
+                error = f'received {written} bytes, expect {expect_length}'
+        except ValueError as e:
+            error = str(e)
+        if settings.FILE_STREAM_UPLOAD_FSYNC:
+            os.fsync(fd)
+        stat_result = os.fstat(fd)
+    finally:
+        os.close(fd)
+    # bytes of a rejected body may already be in the file
+    after_write(full_file_path)
+
+    if error is not None:
+        return status.HTTP_400_BAD_REQUEST, error, None
+    return status.HTTP_200_OK, f'/{file_path} updated.', file_etag(stat_result)
+
+
+def delete_file(full_file_path: Path, file_path: str) -> tuple[int, str]:
+    with path_locks.writing(full_file_path):
+        if full_file_path.is_file():
+            os.remove(full_file_path)
+            after_write(full_file_path)
+            return status.HTTP_200_OK, f'/{file_path} removed.'
+
+    if full_file_path.is_dir():
+        return status.HTTP_400_BAD_REQUEST, f'/{file_path} is a directory.'
+
+    return status.HTTP_400_BAD_REQUEST, f'/{file_path} not exist.'
+
+
+def read_file(full_file_path: Path, file_path: str, inline_max_bytes: int = 0) -> tuple[int, object]:
+    """
+    Directory: the default listing. File: its metadata, plus its content when at most `inline_max_bytes`
+    long, as `content` when it is UTF-8 text and as `contentBase64` otherwise.
+    """
+    if full_file_path.is_dir():
+        file_list = filter_file_under_path(full_file_path, with_stat=False)
+        sort_file_list(file_list)
+        return status.HTTP_200_OK, {'isDirectory': True, 'files': [file.name for file in file_list]}
+
+    with path_locks.reading(full_file_path):
+        try:
+            with open(full_file_path, 'rb') as fp:
+                stat_result = os.fstat(fp.fileno())
+                data = {
+                    'isDirectory': False,
+                    'size': stat_result.st_size,
+                    'lastModified': file_last_modified(stat_result),
+                    'etag': file_etag(stat_result),
+                }
+                if stat_result.st_size <= inline_max_bytes:
+                    content = fp.read(inline_max_bytes + 1)
+                    try:
+                        data['content'] = content.decode('utf-8')
+                    except UnicodeDecodeError:
+                        data['contentBase64'] = base64.b64encode(content).decode('ascii')
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return status.HTTP_404_NOT_FOUND, f'/{file_path} not exist'
+
+    return status.HTTP_200_OK, data
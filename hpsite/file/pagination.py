@@ -0,0 +1,70 @@
+import base64
+import binascii
+import heapq
+import json
+from typing import Iterable, Optional
+
+from .define import FileAttr, OrderDirection
+
+
+def encode_cursor(key: tuple, sort_by: str, sort_dir: str) -> str:
+    value, name = key
+    raw = json.dumps([sort_by, sort_dir, value, name], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode('ascii')
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_dir: str) -> tuple:
+    """
+    Return the (value, name) key the cursor points after.
+    Raise ValueError when the cursor is malformed or was issued for another ordering.
+    """
+    try:
+        cursor_sort_by, cursor_sort_dir, value, name = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (binascii.Error, UnicodeError, TypeError, ValueError):
+        raise ValueError(f'cursor: {cursor} is malformed')
+
+    if cursor_sort_by != sort_by or cursor_sort_dir != sort_dir:
+        raise ValueError(f'cursor: {cursor} does not match orderBy/orderByDirection')
+
+    expect_type = str if sort_by == FileAttr.NAME.value else (int, float)
+    if not isinstance(value, expect_type) or isinstance(value, bool) or not isinstance(name, str):
+        raise ValueError(f'cursor: {cursor} is malformed')
+
+    return value, name
+
+
+def select_top_k(
+        keys: Iterable[tuple],
+        sort_dir: str,
+        limit: int,
+        after: Optional[tuple] = None,
+) -> list[tuple]:
+    """
+    Return the first `limit` (value, name) keys following `after`, in `sort_dir` order.
+
+    Keys are consumed lazily and kept in a heap bounded by `limit`, so memory is O(limit) and
+    time O(n log limit) instead of materialising and sorting the whole listing.
+    """
+    if sort_dir == OrderDirection.DESCENDING.value:
+        if after is not None:
+            keys = (key for key in keys if key < after)
+        return heapq.nlargest(limit, keys)
+
+    if after is not None:
+        keys = (key for key in keys if key > after)
+    return heapq.nsmallest(limit, keys)
+
+
+def paginated_listing(page: list[tuple], query) -> dict:
+    """
+    Response body of a page selected with `limit + 1` keys: the extra key only tells there is a next page.
+    """
+    next_cursor = None
+    if len(page) > query.limit:
+        next_cursor = encode_cursor(page[query.limit - 1], query.order_by, query.order_by_direction)
+
+    return {
+        'isDirectory': True,
+        'files': [name for _, name in page[:query.limit]],
+        'nextCursor': next_cursor,
+    }
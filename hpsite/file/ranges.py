@@ -0,0 +1,124 @@
+import re
+from typing import Iterator, Optional
+
+MAX_RANGES = 32
+BLOCK_SIZE = 64 * 1024
+
+_RANGE_SPEC_RE = re.compile(r'(\d*)-(\d*)', re.ASCII)
+
+
+def parse_range_header(header: str, size: int) -> Optional[list[tuple[int, int]]]:
+    """
+    Parse a `Range: bytes=...` header into sorted, merged, inclusive (start, end) pairs.
+
+    Return None when the header is malformed or not a byte range, in which case it must be
+    ignored, and an empty list when no range is satisfiable (416).
+    """
+    unit, _, range_set = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not range_set:
+        return None
+
+    ranges = []
+    for range_spec in range_set.split(','):
+        range_match = _RANGE_SPEC_RE.fullmatch(range_spec.strip())
+        if range_match is None:
+            return None
+        first, last = range_match.groups()
+
+        if first == '':
+            if last == '':
+                return None
+            suffix_length = int(last)
+            if suffix_length == 0 or size == 0:
+                continue
+            ranges.append((max(size - suffix_length, 0), size - 1))
+            continue
+
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= size:
+            continue
+        end = int(last) if last else size - 1
+        ranges.append((start, min(end, size - 1)))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    return merge_ranges(ranges)
+
+
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Sort inclusive (start, end) ranges and merge the overlapping or adjacent ones.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def content_range(start: int, end: int, size: int) -> str:
+    return f'bytes {start}-{end}/{size}'
+
+
+def iter_file_range(fp, start: int, end: int, block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    Yield bytes [start, end] of `fp`; the skipped prefix is never read.
+    """
+    fp.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        data = fp.read(min(block_size, remaining))
+        if not data:
+            break
+        remaining -= len(data)
+        yield data
+
+
+def iter_file_ranges(fp, ranges: list[tuple[int, int]]) -> Iterator[bytes]:
+    """
+    Yield the bytes of `ranges` of the open `fp`, which is closed once they are sent.
+    """
+    with fp:
+        for start, end in ranges:
+            yield from iter_file_range(fp, start, end)
+
+
+def multipart_byteranges(
+        fp,
+        ranges: list[tuple[int, int]],
+        size: int,
+        content_type: str,
+        boundary: str,
+) -> tuple[int, Iterator[bytes]]:
+    """
+    Return the exact Content-Length and the body iterator of a `multipart/byteranges` response of the
+    open `fp`, which the iterator closes once the ranges are sent.
+    """
+    headers = [
+        (
+            f'--{boundary}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Range: {content_range(start, end, size)}\r\n\r\n'
+        ).encode()
+        for start, end in ranges
+    ]
+    closing = f'--{boundary}--\r\n'.encode()
+    content_length = (
+        sum(len(header) + (end - start + 1) + 2 for header, (start, end) in zip(headers, ranges))
+        + len(closing)
+    )
+
+    def iter_body() -> Iterator[bytes]:
+        with fp:
+            for header, (start, end) in zip(headers, ranges):
+                yield header
+                yield from iter_file_range(fp, start, end)
+                yield b'\r\n'
+        yield closing
+
+    return content_length, iter_body()
@@ -0,0 +1,105 @@
+"""
+Listing rendering of the file API: pre-encoded JSON bodies that skip the DRF `Response` machinery,
+the line-delimited `ndjson` format, and a content negotiation with a shortcut for JSON clients.
+"""
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+from .streaming import iter_listing_json, iter_listing_ndjson, render_listing_json
+from .watch import EVENT_STREAM_CONTENT_TYPE, format_event
+
+JSON_CONTENT_TYPE = 'application/json'
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+# Accept headers of clients that take the first (JSON) renderer whatever the other renderers are
+JSON_ACCEPT_HEADERS = frozenset(('', '*/*', JSON_CONTENT_TYPE))
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    `application/x-ndjson` (`?format=ndjson`). Listings are sent one file name per line by
+    `listing_response`; any other payload, such as an error message, is one JSON line.
+    """
+
+    media_type = NDJSON_CONTENT_TYPE
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return JSONRenderer().render(data) + b'\n'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    `text/event-stream` of the watch endpoint, whose events are streamed by the view;
+    any other payload, such as an error message, is sent as one `error` event.
+    """
+
+    media_type = EVENT_STREAM_CONTENT_TYPE
+    format = 'sse'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return format_event('error', data)
+
+
+class ListingContentNegotiation(DefaultContentNegotiation):
+    """
+    Pick the first renderer without parsing the Accept header when the client asks for JSON or anything,
+    which is what nearly every request does; fall back to the full negotiation otherwise.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        if (
+                not format_suffix
+                and renderers[0].media_type == JSON_CONTENT_TYPE
+                and request.META.get('HTTP_ACCEPT', '').strip() in JSON_ACCEPT_HEADERS
+                and self.settings.URL_FORMAT_OVERRIDE not in request.query_params
+        ):
+            return renderers[0], JSON_CONTENT_TYPE
+        return super().select_renderer(request, renderers, format_suffix)
+
+
+LISTING_RENDERER_CLASSES = (*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer)
+WATCH_RENDERER_CLASSES = (*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer)
+
+
+def listing_stream_response(request, names: Iterable[str]) -> StreamingHttpResponse:
+    if request.accepted_renderer.format == NDJSONRenderer.format:
+        return StreamingHttpResponse(iter_listing_ndjson(names), content_type=NDJSON_CONTENT_TYPE)
+    return StreamingHttpResponse(iter_listing_json(names), content_type=JSON_CONTENT_TYPE)
+
+
+def listing_response(request, names: list) -> Optional[HttpResponseBase]:
+    """
+    Response of a full listing, byte-compatible with `Response({'isDirectory': True, 'files': names})`
+    rendered as JSON, streamed from `FILE_LISTING_STREAM_THRESHOLD` entries on. `names` may also hold
+    the entry objects of `?fields=`.
+    None when another renderer (e.g. the browsable API, or JSON with `indent`) was negotiated.
+    """
+    if request.accepted_renderer.format == NDJSONRenderer.format:
+        return listing_stream_response(request, names)
+    if request.accepted_renderer.format != 'json' or request.accepted_media_type != JSON_CONTENT_TYPE:
+        return None
+
+    if len(names) >= settings.FILE_LISTING_STREAM_THRESHOLD:
+        return listing_stream_response(request, names)
+    return HttpResponse(render_listing_json(names), content_type=JSON_CONTENT_TYPE)
+
+
+def wants_ndjson(query_format: Optional[str], accept: str) -> bool:
+    """
+    Cheap check for the async front end, which has no renderer negotiation.
+    """
+    return query_format == NDJSONRenderer.format or NDJSON_CONTENT_TYPE in accept
+
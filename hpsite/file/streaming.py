@@ -0,0 +1,56 @@
+import json
+from itertools import islice
+from typing import Iterable, Iterator
+
+LISTING_JSON_PREFIX = b'{"isDirectory":true,"files":['
+LISTING_JSON_SUFFIX = b']}'
+
+LISTING_CHUNK_SIZE = 10000
+
+
+def _escape_line_separators(text: str) -> str:
+    # same escaping as rest_framework.renderers.JSONRenderer, so pre-encoded bodies stay byte-compatible
+    return text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+def encode_json_names(names: list[str], separator: str = ',') -> str:
+    """
+    `"a","b"` for `names` (or any JSON values) in one call of the C encoder instead of one `json.dumps` per name.
+    JSON strings never contain a raw newline, so `separator='\\n'` gives one name per line.
+    """
+    return _escape_line_separators(json.dumps(names, ensure_ascii=False, separators=(separator, ':'))[1:-1])
+
+
+def _iter_chunks(names: Iterable[str], chunk_size: int) -> Iterator[list[str]]:
+    iterator = iter(names)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def render_listing_json(names: list[str]) -> bytes:
+    """
+    `{"isDirectory":true,"files":[...]}` as rendered by JSONRenderer, without building the dict.
+    """
+    return LISTING_JSON_PREFIX + encode_json_names(names).encode() + LISTING_JSON_SUFFIX
+
+
+def iter_listing_json(names: Iterable[str], chunk_size: int = LISTING_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield `{"isDirectory":true,"files":[...]}` incrementally, `chunk_size` names per chunk.
+    """
+    yield LISTING_JSON_PREFIX
+
+    separator = b''
+    for chunk in _iter_chunks(names, chunk_size):
+        yield separator + encode_json_names(chunk).encode()
+        separator = b','
+
+    yield LISTING_JSON_SUFFIX
+
+
+def iter_listing_ndjson(names: Iterable[str], chunk_size: int = LISTING_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield one JSON string per line, `chunk_size` names per chunk.
+    """
+    for chunk in _iter_chunks(names, chunk_size):
+        yield (encode_json_names(chunk, '\n') + '\n').encode()
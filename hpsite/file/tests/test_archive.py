@@ -0,0 +1,90 @@
+import io
+import shutil
+import tarfile
+import zipfile
+from pathlib import Path
+
+from django.test import TestCase
+from rest_framework import status
+
+from file.define import ArchiveFormat, FileAttr, OrderDirection
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestFileApiArchive(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_archive_dir'
+    TEST_FILE_NAME_CONTENT_MAP = {
+        'test_archive_1.log': 'test',
+        'test_archive_2.txt': 'test, test, test',
+        'test_archive_3.log': 'test, test',
+        'sub_1/test_archive_4.log': 'test, test, test, test',
+    }
+
+    def setUp(self) -> None:
+        for test_file_path, test_file_content in self.TEST_FILE_NAME_CONTENT_MAP.items():
+            full_path = PROJECT_ROOT_PATH / self.TEST_DIR / test_file_path
+            full_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(full_path, 'w') as fp:
+                fp.write(test_file_content)
+
+    def _get_archive(self, params: dict) -> bytes:
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data=params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('attachment', response['Content-Disposition'])
+        return b''.join(response.streaming_content)
+
+    def test_file__GET__is_dir__archive_zip(self):
+        # action
+        content = self._get_archive({'archive': ArchiveFormat.ZIP.value})
+
+        # assert
+        with zipfile.ZipFile(io.BytesIO(content)) as zip_file:
+            self.assertEqual(
+                zip_file.namelist(), ['test_archive_1.log', 'test_archive_2.txt', 'test_archive_3.log']
+            )
+            self.assertEqual(zip_file.read('test_archive_2.txt'), b'test, test, test')
+
+    def test_file__GET__is_dir__archive_tar_order_and_filter(self):
+        # arrange
+        params = {
+            'archive': ArchiveFormat.TAR.value,
+            'filterByName': r'\.log$',
+            'orderBy': FileAttr.SIZE.value,
+            'orderByDirection': OrderDirection.DESCENDING.value,
+        }
+
+        # action
+        content = self._get_archive(params)
+
+        # assert
+        self.assertEqual(len(content) % tarfile.RECORDSIZE, 0)
+        with tarfile.open(fileobj=io.BytesIO(content)) as tar_file:
+            self.assertEqual(tar_file.getnames(), ['test_archive_3.log', 'test_archive_1.log'])
+            self.assertEqual(tar_file.extractfile('test_archive_1.log').read(), b'test')
+
+    def test_file__GET__is_dir__archive_tar_gz_depth(self):
+        # action
+        content = self._get_archive({'archive': ArchiveFormat.TAR_GZ.value, 'depth': 2})
+
+        # assert
+        with tarfile.open(fileobj=io.BytesIO(content), mode='r:gz') as tar_file:
+            self.assertEqual(
+                set(tar_file.getnames()),
+                {'test_archive_1.log', 'test_archive_2.txt', 'test_archive_3.log', 'sub_1/test_archive_4.log'},
+            )
+            self.assertEqual(
+                tar_file.extractfile('sub_1/test_archive_4.log').read(), b'test, test, test, test'
+            )
+
+    def test_file__GET__is_dir__archive_not_available(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={'archive': 'rar'})
+        limit_response = self.client.get(f'/file/{self.TEST_DIR}/', data={'archive': 'zip', 'limit': 1})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(limit_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
@@ -0,0 +1,462 @@
+import asyncio
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.throttling import BaseThrottle
+
+from file.async_api import AsyncFileApplication
+from file.cache import file_content_cache
+from file.locks import path_locks
+from file.views import FileView
+from file.metrics import metrics
+from file.watch import watch_registry
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class _FallbackApplication:
+    def __init__(self):
+        self.called = False
+
+    async def __call__(self, scope, receive, send):
+        self.called = True
+
+
+class _DenyThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        return False
+
+
+class TestAsyncFileApplication(SimpleTestCase):
+    TEST_DIR = 'hpsite/file/tests/test_async_dir'
+    TEST_FILE_NAME_CONTENT_MAP = {
+        'test_async_1': b'test',
+        'test_async_2': b'test, test',
+    }
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        for test_name_path, test_file_content in self.TEST_FILE_NAME_CONTENT_MAP.items():
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / test_name_path, 'wb') as fp:
+                fp.write(test_file_content)
+
+        self.fallback = _FallbackApplication()
+        self.application = AsyncFileApplication(self.fallback)
+
+    async def _request(
+            self, path: str, query_string: bytes = b'', headers=(), method: str = 'GET', extensions: dict = None,
+            on_send=None,
+    ):
+        messages = []
+        received = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+        async def receive():
+            if received:
+                return received.pop(0)
+            # client stays connected
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.zerocopysend':
+                # what the server would `sendfile`
+                message = {**message, 'body': os.pread(message['file'].fileno(), message['count'], message['offset'])}
+            if on_send is not None:
+                on_send(message)
+            messages.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': query_string,
+            'headers': list(headers),
+            'server': ('testserver', 80),
+            'extensions': extensions or {},
+        }
+        await self.application(scope, receive, send)
+
+        if not messages:
+            return None, {}, b''
+        return (
+            messages[0]['status'],
+            dict(messages[0]['headers']),
+            b''.join(message.get('body', b'') for message in messages[1:]),
+        )
+
+    async def test_async__GET__is_file(self):
+        # action
+        status_code, headers, body = await self._request(f'/file/{self.TEST_DIR}/test_async_2/')
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body, b'test, test')
+        self.assertEqual(headers[b'content-length'], b'10')
+
+    async def test_async__GET__is_file__range(self):
+        # action
+        status_code, headers, body = await self._request(
+            f'/file/{self.TEST_DIR}/test_async_2/', headers=[(b'range', b'bytes=6-')]
+        )
+
+        # assert
+        self.assertEqual(status_code, 206)
+        self.assertEqual(body, b'test')
+        self.assertEqual(headers[b'content-range'], b'bytes 6-9/10')
+
+    async def test_async__GET__is_file__zero_copy_send(self):
+        # action
+        status_code, headers, body = await self._request(
+            f'/file/{self.TEST_DIR}/test_async_2/',
+            headers=[(b'range', b'bytes=6-')],
+            extensions={'http.response.zerocopysend': {}},
+        )
+
+        # assert
+        self.assertEqual(status_code, 206)
+        self.assertEqual(body, b'test')
+
+    async def test_async__GET__is_file__gzip_then_sidecar(self):
+        # arrange
+        content = b'2023-01-01 00:00:00 INFO test, test, test\n' * 100
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_async.log', 'wb') as fp:
+            fp.write(content)
+        cache_dir = tempfile.mkdtemp()
+        # small files are served from the in-process content cache instead of sidecars
+        content_cache_patch = mock.patch.object(file_content_cache, 'max_file_size', 0)
+
+        # action
+        with self.settings(FILE_COMPRESSION_CACHE_DIR=cache_dir), content_cache_patch:
+            status_code, headers, body = await self._request(
+                f'/file/{self.TEST_DIR}/test_async.log/', headers=[(b'accept-encoding', b'gzip')]
+            )
+            sidecar_status_code, sidecar_headers, sidecar_body = await self._request(
+                f'/file/{self.TEST_DIR}/test_async.log/', headers=[(b'accept-encoding', b'gzip')]
+            )
+        shutil.rmtree(cache_dir)
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertEqual(headers[b'content-encoding'], b'gzip')
+        self.assertNotIn(b'content-length', headers)
+        self.assertEqual(gzip.decompress(body), content)
+        self.assertEqual(sidecar_status_code, 200)
+        self.assertEqual(sidecar_headers[b'content-length'], str(len(sidecar_body)).encode())
+        self.assertEqual(gzip.decompress(sidecar_body), content)
+        self.assertEqual(headers[b'etag'], sidecar_headers[b'etag'])
+        self.assertFalse(self.fallback.called)
+
+    async def test_async__GET__is_file__multiple_ranges(self):
+        # action
+        status_code, headers, body = await self._request(
+            f'/file/{self.TEST_DIR}/test_async_2/', headers=[(b'range', b'bytes=0-3,6-')]
+        )
+
+        # assert
+        self.assertEqual(status_code, 206)
+        content_type = headers[b'content-type'].decode()
+        self.assertTrue(content_type.startswith('multipart/byteranges; boundary='))
+        boundary = content_type.split('boundary=')[1]
+        self.assertEqual(headers[b'content-length'], str(len(body)).encode())
+        self.assertIn(b'Content-Range: bytes 0-3/10\r\n\r\ntest\r\n', body)
+        self.assertIn(b'Content-Range: bytes 6-9/10\r\n\r\ntest\r\n', body)
+        self.assertTrue(body.endswith(f'--{boundary}--\r\n'.encode()))
+        self.assertFalse(self.fallback.called)
+
+    async def test_async__GET__is_file__lock_released_before_send(self):
+        # arrange
+        full_file_path = PROJECT_ROOT_PATH / self.TEST_DIR / 'test_async_2'
+        _, headers, _ = await self._request(f'/file/{self.TEST_DIR}/test_async_2/')
+        stripe = path_locks.stripe_of(full_file_path)
+        writable = []
+
+        def try_writing(message):
+            if message['type'] == 'http.response.start':
+                writable.append(path_locks.acquire(stripe, exclusive=True, blocking=False))
+                if writable[-1]:
+                    path_locks.release(stripe, exclusive=True)
+
+        # action
+        not_modified_code, _, _ = await self._request(
+            f'/file/{self.TEST_DIR}/test_async_2/', headers=[(b'if-none-match', headers[b'etag'])], on_send=try_writing
+        )
+        not_satisfiable_code, _, _ = await self._request(
+            f'/file/{self.TEST_DIR}/test_async_2/', headers=[(b'range', b'bytes=20-')], on_send=try_writing
+        )
+
+        # assert
+        self.assertEqual(not_modified_code, 304)
+        self.assertEqual(not_satisfiable_code, 416)
+        self.assertEqual(writable, [True, True])
+
+    async def test_async__GET__is_file__changed_since_stat(self):
+        # action
+        with mock.patch('file.async_api._open_version', return_value=None):
+            status_code, _, _ = await self._request(
+                f'/file/{self.TEST_DIR}/test_async_2/', headers=[(b'range', b'bytes=0-3,6-')]
+            )
+
+        # assert
+        self.assertIsNone(status_code)
+        self.assertTrue(self.fallback.called)
+
+    async def test_async__GET__is_file__preconditions(self):
+        # arrange
+        url = f'/file/{self.TEST_DIR}/test_async_2/'
+        _, headers, _ = await self._request(url)
+
+        # action
+        stale_match_code, _, _ = await self._request(url, headers=[(b'if-match', b'"stale"')])
+        unmodified_since_code, _, _ = await self._request(
+            url, headers=[(b'if-unmodified-since', b'Sat, 01 Jan 2000 00:00:00 GMT')]
+        )
+        match_code, _, body = await self._request(url, headers=[(b'if-match', headers[b'etag'])])
+        modified_since_code, _, _ = await self._request(
+            url, headers=[(b'if-modified-since', headers[b'last-modified'])]
+        )
+        directory_code, _, _ = await self._request(f'/file/{self.TEST_DIR}/', headers=[(b'if-match', b'"stale"')])
+
+        # assert
+        self.assertEqual(stale_match_code, 412)
+        self.assertEqual(unmodified_since_code, 412)
+        self.assertEqual(match_code, 200)
+        self.assertEqual(body, b'test, test')
+        self.assertEqual(modified_since_code, 304)
+        self.assertEqual(directory_code, 412)
+
+    async def test_async__GET__is_dir(self):
+        # action
+        status_code, headers, body = await self._request(
+            f'/file/{self.TEST_DIR}/', query_string=b'orderBy=size&orderByDirection=Descending'
+        )
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertEqual(json.loads(body), {'isDirectory': True, 'files': ['test_async_2', 'test_async_1']})
+
+    async def test_async__GET__is_dir__server_timing(self):
+        # arrange
+        metrics.clear()
+
+        # action
+        status_code, headers, body = await self._request(f'/file/{self.TEST_DIR}/', query_string=b'orderBy=size')
+
+        # assert
+        stage_names = [stage.split(';')[0] for stage in headers[b'server-timing'].decode().split(', ')]
+        self.assertEqual(stage_names, ['validate', 'cache', 'scan', 'sort', 'total'])
+        self.assertIn('file_api_stage_seconds_count{stage="scan",view="AsyncFileApplication"} 1\n', metrics.render())
+        self.assertIn('file_api_listing_entries_count 1\n', metrics.render())
+
+    async def test_async__GET__is_dir__limit(self):
+        # action
+        status_code, headers, body = await self._request(f'/file/{self.TEST_DIR}/', query_string=b'limit=1')
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertEqual(json.loads(body)['files'], ['test_async_1'])
+        self.assertIsNotNone(json.loads(body)['nextCursor'])
+
+    async def test_async__GET__is_dir__fields(self):
+        # action
+        status_code, headers, body = await self._request(
+            f'/file/{self.TEST_DIR}/', query_string=b'fields=size&limit=1&orderBy=size'
+        )
+        head_status_code, head_headers, head_body = await self._request(f'/file/{self.TEST_DIR}/', method='HEAD')
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertEqual(json.loads(body)['files'], [{'name': 'test_async_1', 'size': 4}])
+        self.assertEqual(head_status_code, 200)
+        self.assertIn(b'etag', head_headers)
+        self.assertEqual(head_body, b'')
+
+    async def test_async__GET__is_dir__fields_appended_outside_api(self):
+        # arrange
+        await self._request(f'/file/{self.TEST_DIR}/', query_string=b'fields=size')
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_async_1', 'ab') as fp:
+            fp.write(b', test, test')
+
+        # action
+        status_code, headers, body = await self._request(f'/file/{self.TEST_DIR}/', query_string=b'fields=size')
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertIn({'name': 'test_async_1', 'size': 16}, json.loads(body)['files'])
+        self.assertNotIn(b'etag', headers)
+
+    async def test_async__GET__is_dir__ndjson(self):
+        # action
+        status_code, headers, body = await self._request(
+            f'/file/{self.TEST_DIR}/', headers=[(b'accept', b'application/x-ndjson')]
+        )
+        page_status_code, page_headers, page_body = await self._request(
+            f'/file/{self.TEST_DIR}/', query_string=b'format=ndjson&limit=1'
+        )
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertEqual(headers[b'content-type'], b'application/x-ndjson')
+        self.assertEqual(body, b'"test_async_1"\n"test_async_2"\n')
+        self.assertEqual(page_headers[b'content-type'], b'application/x-ndjson')
+        self.assertEqual(json.loads(page_body)['files'], ['test_async_1'])
+        self.assertTrue(page_body.endswith(b'}\n'))
+        self.assertFalse(self.fallback.called)
+
+    async def test_async__GET__is_dir__ndjson_etag(self):
+        # arrange
+        _, json_headers, _ = await self._request(f'/file/{self.TEST_DIR}/')
+
+        # action
+        status_code, headers, _ = await self._request(
+            f'/file/{self.TEST_DIR}/',
+            headers=[(b'accept', b'application/x-ndjson'), (b'if-none-match', json_headers[b'etag'])],
+        )
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertNotEqual(headers[b'etag'], json_headers[b'etag'])
+        self.assertEqual(headers[b'vary'], b'Accept')
+        self.assertEqual(json_headers[b'vary'], b'Accept')
+
+    async def test_async__GET__is_dir__archive(self):
+        # action
+        status_code, headers, body = await self._request(
+            f'/file/{self.TEST_DIR}/', query_string=b'archive=zip&orderBy=size&orderByDirection=Descending'
+        )
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertEqual(headers[b'content-type'], b'application/zip')
+        self.assertEqual(headers[b'content-disposition'], b'attachment; filename="test_async_dir.zip"')
+        with zipfile.ZipFile(io.BytesIO(body)) as zip_file:
+            self.assertEqual(zip_file.namelist(), ['test_async_2', 'test_async_1'])
+            self.assertEqual(zip_file.read('test_async_2'), b'test, test')
+        self.assertFalse(self.fallback.called)
+
+    async def test_async__GET__is_dir__archive_not_available(self):
+        # action
+        await self._request(f'/file/{self.TEST_DIR}/', query_string=b'archive=rar')
+
+        # assert
+        self.assertTrue(self.fallback.called)
+
+    async def test_async__GET__is_dir__depth(self):
+        # arrange
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR / 'sub')
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'sub' / 'test_async_3', 'wb') as fp:
+            fp.write(b'test')
+
+        # action
+        status_code, headers, body = await self._request(f'/file/{self.TEST_DIR}/', query_string=b'depth=2')
+        ndjson_status_code, ndjson_headers, ndjson_body = await self._request(
+            f'/file/{self.TEST_DIR}/', query_string=b'depth=1&format=ndjson'
+        )
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertEqual(
+            sorted(json.loads(body)['files']), ['sub/test_async_3', 'test_async_1', 'test_async_2']
+        )
+        self.assertEqual(ndjson_headers[b'content-type'], b'application/x-ndjson')
+        self.assertEqual(ndjson_body.splitlines(), [b'"test_async_1"', b'"test_async_2"'])
+        self.assertFalse(self.fallback.called)
+
+    async def test_async__GET__not_exist(self):
+        # action
+        status_code, headers, body = await self._request(f'/file/{self.TEST_DIR}/not_test_file/')
+
+        # assert
+        self.assertEqual(status_code, 404)
+
+    async def test_async__GET__watch__long_poll(self):
+        # arrange
+        _, _, body = await self._request(f'/file/_watch/{self.TEST_DIR}/')
+        cursor = json.loads(body)['cursor']
+        watch = watch_registry.subscribe(PROJECT_ROOT_PATH / self.TEST_DIR)
+        watch_registry.unsubscribe(watch)
+
+        async def write_later():
+            await asyncio.sleep(0.05)
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_async_3', 'wb') as fp:
+                fp.write(b'test')
+            watch.record('test_async_3')
+
+        # action
+        writer = asyncio.ensure_future(write_later())
+        status_code, headers, body = await self._request(
+            f'/file/_watch/{self.TEST_DIR}/', query_string=f'cursor={cursor}&timeout=5'.encode()
+        )
+        await writer
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertEqual(json.loads(body)['events'], [{'type': 'created', 'name': 'test_async_3'}])
+        self.assertFalse(self.fallback.called)
+
+    async def test_async__GET__middleware_headers(self):
+        # action
+        status_code, headers, _ = await self._request(f'/file/{self.TEST_DIR}/test_async_1/')
+
+        # assert
+        self.assertEqual(status_code, 200)
+        self.assertEqual(headers[b'x-content-type-options'], b'nosniff')
+        self.assertEqual(headers[b'x-frame-options'], b'DENY')
+        self.assertEqual(headers[b'referrer-policy'], b'same-origin')
+        self.assertEqual(headers[b'cross-origin-opener-policy'], b'same-origin')
+
+    async def test_async__GET__disallowed_host__delegated(self):
+        # action
+        status_code, _, _ = await self._request(
+            f'/file/{self.TEST_DIR}/test_async_1/', headers=[(b'host', b'evil.example')]
+        )
+
+        # assert
+        self.assertIsNone(status_code)
+        self.assertTrue(self.fallback.called)
+
+    async def test_async__GET__ssl_redirect__delegated(self):
+        # action
+        with self.settings(SECURE_SSL_REDIRECT=True):
+            status_code, _, _ = await self._request(f'/file/{self.TEST_DIR}/test_async_1/')
+
+        # assert
+        self.assertIsNone(status_code)
+        self.assertTrue(self.fallback.called)
+
+    async def test_async__GET__permission_denied__delegated(self):
+        # action
+        with mock.patch.object(FileView, 'permission_classes', [IsAuthenticated]):
+            status_code, _, _ = await self._request(f'/file/{self.TEST_DIR}/test_async_1/')
+
+        # assert
+        self.assertIsNone(status_code)
+        self.assertTrue(self.fallback.called)
+
+    async def test_async__GET__throttled__delegated(self):
+        # action
+        with mock.patch.object(FileView, 'throttle_classes', [_DenyThrottle]):
+            status_code, _, _ = await self._request(f'/file/{self.TEST_DIR}/test_async_1/')
+
+        # assert
+        self.assertIsNone(status_code)
+        self.assertTrue(self.fallback.called)
+
+    async def test_async__POST__delegated(self):
+        # action
+        await self._request(f'/file/{self.TEST_DIR}/test_async_1/', method='POST')
+
+        # assert
+        self.assertTrue(self.fallback.called)
+
+    def tearDown(self) -> None:
+        watch_registry.clear()
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
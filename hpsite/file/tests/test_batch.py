@@ -0,0 +1,138 @@
+import base64
+import json
+import os
+import shutil
+from pathlib import Path
+
+from django.test import TestCase
+from rest_framework import status
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestFileApiBatch(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_batch_dir'
+    TEST_FILE_NAME_CONTENT_MAP = {
+        'test_batch_1': 'test',
+        'test_batch_2': 'test, test',
+    }
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        for test_name_path, test_file_content in self.TEST_FILE_NAME_CONTENT_MAP.items():
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / test_name_path, 'w') as fp:
+                fp.write(test_file_content)
+
+    def _batch(self, data: dict):
+        return self.client.post('/file/_batch/', data=json.dumps(data), content_type='application/json')
+
+    def test_batch__mixed_operations(self):
+        # arrange
+        operations = [
+            {'op': 'get', 'path': f'{self.TEST_DIR}/test_batch_1'},
+            {'op': 'create', 'path': f'{self.TEST_DIR}/test_batch_3', 'content': 'test three'},
+            {'op': 'create', 'path': f'{self.TEST_DIR}/test_batch_2', 'content': 'test'},
+            {'op': 'update', 'path': f'{self.TEST_DIR}/test_batch_4', 'content': 'test'},
+            {'op': 'delete', 'path': f'{self.TEST_DIR}/test_batch_2'},
+            {'op': 'move', 'path': f'{self.TEST_DIR}/test_batch_1'},
+        ]
+
+        # action
+        response = self._batch({'operations': operations, 'inlineMaxBytes': 1024})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = json.loads(response.content)['results']
+        self.assertEqual(
+            [result['status'] for result in results],
+            [
+                status.HTTP_200_OK,
+                status.HTTP_201_CREATED,
+                status.HTTP_400_BAD_REQUEST,
+                status.HTTP_400_BAD_REQUEST,
+                status.HTTP_200_OK,
+                status.HTTP_400_BAD_REQUEST,
+            ],
+        )
+        self.assertEqual(results[0]['data']['content'], 'test')
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_batch_3', 'r') as fp:
+            self.assertEqual(fp.read(), 'test three')
+        self.assertFalse(os.path.exists(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_batch_2'))
+
+    def test_batch__get_without_inline_and_binary(self):
+        # arrange
+        binary_content = b'\xff\x00\xfe'
+        content_base64 = base64.b64encode(binary_content).decode()
+        operations = [
+            {'op': 'create', 'path': f'{self.TEST_DIR}/test_batch_bin', 'contentBase64': content_base64},
+        ]
+        self._batch({'operations': operations})
+
+        # action
+        results = json.loads(self._batch({
+            'operations': [
+                {'op': 'get', 'path': f'{self.TEST_DIR}/test_batch_bin'},
+                {'op': 'get', 'path': f'{self.TEST_DIR}/test_batch_bin'},
+            ],
+            'inlineMaxBytes': 0,
+        }).content)['results']
+        inline_results = json.loads(self._batch({
+            'operations': [{'op': 'get', 'path': f'{self.TEST_DIR}/test_batch_bin'}],
+            'inlineMaxBytes': 1024,
+        }).content)['results']
+
+        # assert
+        self.assertNotIn('content', results[0]['data'])
+        self.assertEqual(results[0]['data']['size'], len(binary_content))
+        self.assertEqual(base64.b64decode(inline_results[0]['data']['contentBase64']), binary_content)
+
+    def test_batch__same_path_in_request_order(self):
+        # arrange
+        operations = [
+            {'op': 'create', 'path': f'{self.TEST_DIR}/test_batch_3', 'content': 'test'},
+            {'op': 'update', 'path': f'/{self.TEST_DIR}/test_batch_3', 'content': 'test, test'},
+            {'op': 'get', 'path': f'{self.TEST_DIR}/./test_batch_3'},
+            {'op': 'delete', 'path': f'{self.TEST_DIR}/test_batch_3'},
+            {'op': 'get', 'path': f'{self.TEST_DIR}/test_batch_3'},
+        ]
+
+        # action
+        results = json.loads(self._batch({'operations': operations, 'inlineMaxBytes': 1024}).content)['results']
+
+        # assert
+        self.assertEqual(
+            [result['status'] for result in results],
+            [
+                status.HTTP_201_CREATED,
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_404_NOT_FOUND,
+            ],
+        )
+        self.assertEqual(results[2]['data']['content'], 'test, test')
+
+    def test_batch__path_outside_root(self):
+        # arrange
+        operations = [
+            {'op': 'get', 'path': '../etc/passwd'},
+            {'op': 'create', 'path': f'{self.TEST_DIR}/../../../../../test_batch_outside', 'content': 'test'},
+        ]
+
+        # action
+        results = json.loads(self._batch({'operations': operations}).content)['results']
+
+        # assert
+        self.assertEqual([result['status'] for result in results], [status.HTTP_400_BAD_REQUEST] * 2)
+        self.assertFalse(os.path.exists(PROJECT_ROOT_PATH.parent / 'test_batch_outside'))
+
+    def test_batch__operations_not_available(self):
+        # action
+        response = self._batch({'operations': []})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import TestCase as UnitTestCase
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from file.benchmarks.suite import compare
+
+
+class TestBenchmarkCompare(UnitTestCase):
+    def test_compare__regression_by_direction(self):
+        # arrange
+        baseline = [
+            {'case': 'sort', 'params': {'files': 10}, 'metric': 'seconds', 'better': 'lower', 'value': 1.0},
+            {'case': 'upload', 'params': {'clients': 1}, 'metric': 'throughput', 'better': 'higher', 'value': 100.0},
+        ]
+        results = [
+            {'case': 'sort', 'params': {'files': 10}, 'metric': 'seconds', 'better': 'lower', 'value': 1.05},
+            {'case': 'upload', 'params': {'clients': 1}, 'metric': 'throughput', 'better': 'higher', 'value': 80.0},
+            {'case': 'sort', 'params': {'files': 20}, 'metric': 'seconds', 'better': 'lower', 'value': 9.0},
+        ]
+
+        # action
+        comparisons = compare(results, baseline, threshold=0.1)
+
+        # assert
+        self.assertEqual([comparison['regression'] for comparison in comparisons], [False, True])
+        self.assertAlmostEqual(comparisons[1]['change'], 0.2)
+
+
+class TestBenchmarkCommand(TestCase):
+    def test_benchmark__output_and_baseline(self):
+        # arrange
+        fd, output_path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        options = {'files': [20], 'repeat': 1, 'concurrency': 2, 'download_size': 1, 'upload_size': 1}
+
+        # action
+        call_command('benchmark', output=output_path, stderr=StringIO(), **options)
+        with open(output_path) as fp:
+            report = json.load(fp)
+        with self.assertRaises(CommandError):
+            call_command(
+                'benchmark', baseline=output_path, threshold=-1, cases=['sort'], stdout=StringIO(), stderr=StringIO(),
+                **options
+            )
+        os.remove(output_path)
+
+        # assert
+        expect_case_set = {
+            'filter_file_under_path',
+            'sort_file_list',
+            'listing request',
+            'listing request (cached)',
+            'download',
+            'upload',
+        }
+        self.assertEqual({result['case'] for result in report['results']}, expect_case_set)
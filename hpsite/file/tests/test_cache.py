@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from unittest import TestCase as UnitTestCase
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework import status
+
+from file.cache import LRUCache, file_content_cache, listing_cache
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestLRUCache(UnitTestCase):
+    def test_lru_cache__evict_by_entries(self):
+        # arrange
+        cache = LRUCache(max_entries=2, max_bytes=100)
+        cache.set('a', 1, 1)
+        cache.set('b', 2, 1)
+        cache.get('a')
+
+        # action
+        cache.set('c', 3, 1)
+
+        # assert
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_lru_cache__evict_by_bytes(self):
+        # arrange
+        cache = LRUCache(max_entries=10, max_bytes=10)
+        cache.set('a', 1, 6)
+
+        # action
+        cache.set('b', 2, 6)
+
+        # assert
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['bytes'], 6)
+
+    def test_lru_cache__refuse_too_large(self):
+        # arrange
+        cache = LRUCache(max_entries=10, max_bytes=10)
+
+        # action
+        stored = cache.set('a', 1, 11)
+
+        # assert
+        self.assertFalse(stored)
+        self.assertIsNone(cache.get('a'))
+
+
+class TestFileApiListingCache(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_cache_dir'
+    TEST_FILE_NAME_LIST = ['test_cache_a', 'test_cache_b']
+
+    def setUp(self) -> None:
+        listing_cache.clear()
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        for test_file_name in self.TEST_FILE_NAME_LIST:
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / test_file_name, 'w') as _:
+                pass
+
+    def test_file__GET__is_dir__cache_hit(self):
+        # arrange
+        self.client.get(f'/file/{self.TEST_DIR}/')
+        hits = listing_cache.stats()['hits']
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/')
+
+        # assert
+        self.assertEqual(json.loads(response.content)['files'], self.TEST_FILE_NAME_LIST)
+        self.assertEqual(listing_cache.stats()['hits'], hits + 1)
+
+    def test_file__GET__is_dir__invalidated_by_POST(self):
+        # arrange
+        file_name = 'test_cache_c'
+        self.client.get(f'/file/{self.TEST_DIR}/')
+
+        # action
+        self.client.post(f'/file/{self.TEST_DIR}/{file_name}/', data={'file': 'test'})
+        response = self.client.get(f'/file/{self.TEST_DIR}/')
+
+        # assert
+        self.assertEqual(json.loads(response.content)['files'], self.TEST_FILE_NAME_LIST + [file_name])
+
+    def test_cache_stats(self):
+        # action
+        response = self.client.get('/file/_cache/')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('hits', json.loads(response.content)['listing'])
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+
+class TestFileApiContentCache(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_content_cache_dir'
+    TEST_FILE_NAME = 'test_content_cache.json'
+    TEST_FILE_CONTENT = b'{"test": "test"}'
+
+    def setUp(self) -> None:
+        file_content_cache.clear()
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME, 'wb') as fp:
+            fp.write(self.TEST_FILE_CONTENT)
+
+    def _get_content(self) -> bytes:
+        response = self.client.get(f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content)
+
+    def test_file__GET__is_file__cache_hit(self):
+        # arrange
+        self._get_content()
+        hits = file_content_cache.stats()['hits']
+
+        # action
+        with mock.patch('file.download.open') as mock_open:
+            content = self._get_content()
+
+        # assert
+        self.assertEqual(content, self.TEST_FILE_CONTENT)
+        self.assertEqual(file_content_cache.stats()['hits'], hits + 1)
+        mock_open.assert_not_called()
+
+    def test_file__GET__is_file__invalidated_by_PATCH_and_DELETE(self):
+        # arrange
+        updated_content = b'{"test": "updated"}'
+        self._get_content()
+
+        # action
+        self.client.patch(
+            f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/',
+            data=updated_content,
+            content_type='application/octet-stream',
+        )
+        content = self._get_content()
+        self.client.delete(f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/')
+
+        # assert
+        self.assertEqual(content, updated_content)
+        self.assertEqual(file_content_cache.stats()['entries'], 0)
+
+    def test_file__GET__is_file__changed_outside_api(self):
+        # arrange
+        self._get_content()
+        full_file_path = PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME
+        with open(full_file_path, 'wb') as fp:
+            fp.write(b'{"test": "outside"}')
+
+        # action
+        content = self._get_content()
+
+        # assert
+        self.assertEqual(content, b'{"test": "outside"}')
+
+    def test_file__GET__is_file__too_large_not_admitted(self):
+        # action
+        with mock.patch.object(file_content_cache, 'max_file_size', len(self.TEST_FILE_CONTENT) - 1):
+            content = self._get_content()
+
+        # assert
+        self.assertEqual(content, self.TEST_FILE_CONTENT)
+        self.assertEqual(file_content_cache.stats()['entries'], 0)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
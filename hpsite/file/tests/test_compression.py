@@ -0,0 +1,136 @@
+import gzip
+import os
+import shutil
+import tempfile
+import zlib
+from pathlib import Path
+from unittest import TestCase as UnitTestCase
+from unittest import mock
+
+from django.http import FileResponse
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from file.cache import file_content_cache
+from file.compression import compression_cache, negotiate_encoding
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestNegotiateEncoding(UnitTestCase):
+    def test_negotiate_encoding(self):
+        # action & assert
+        self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'gzip')
+        self.assertEqual(negotiate_encoding('deflate;q=1.0, gzip;q=0.5'), 'deflate')
+        self.assertEqual(negotiate_encoding('*'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0, deflate;q=0'))
+        self.assertIsNone(negotiate_encoding('br'))
+        self.assertIsNone(negotiate_encoding(None))
+
+
+class TestFileApiCompression(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_compression_dir'
+    TEST_FILE_NAME = 'test_compression.log'
+    TEST_FILE_CONTENT = b'2023-01-01 00:00:00 INFO test, test, test\n' * 100
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME, 'wb') as fp:
+            fp.write(self.TEST_FILE_CONTENT)
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(FILE_COMPRESSION_CACHE_DIR=self.cache_dir)
+        self.settings_override.enable()
+        # small files are served from the in-process content cache instead of sidecars
+        self.content_cache_patch = mock.patch.object(file_content_cache, 'max_file_size', 0)
+        self.content_cache_patch.start()
+
+    def _get(self, file_name: str = TEST_FILE_NAME, **headers):
+        return self.client.get(f'/file/{self.TEST_DIR}/{file_name}/', **headers)
+
+    def test_file__GET__is_file__gzip_then_sidecar(self):
+        # action
+        response = self._get(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        content = b''.join(response.streaming_content)
+        sidecar_response = self._get(HTTP_ACCEPT_ENCODING='gzip')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertLess(len(content), len(self.TEST_FILE_CONTENT))
+        self.assertEqual(gzip.decompress(content), self.TEST_FILE_CONTENT)
+
+        self.assertIsInstance(sidecar_response, FileResponse)
+        self.assertEqual(sidecar_response['Content-Encoding'], 'gzip')
+        self.assertEqual(sidecar_response['ETag'], response['ETag'])
+        self.assertEqual(b''.join(sidecar_response.streaming_content), content)
+
+    def test_file__GET__is_file__deflate_not_modified(self):
+        # arrange
+        response = self._get(HTTP_ACCEPT_ENCODING='deflate')
+        content = b''.join(response.streaming_content)
+
+        # action
+        not_modified_response = self._get(HTTP_ACCEPT_ENCODING='deflate', HTTP_IF_NONE_MATCH=response['ETag'])
+        identity_response = self._get(HTTP_IF_NONE_MATCH=response['ETag'])
+
+        # assert
+        self.assertEqual(zlib.decompress(content), self.TEST_FILE_CONTENT)
+        self.assertEqual(not_modified_response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(identity_response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Content-Encoding', identity_response)
+
+    def test_file__GET__is_file__range_not_compressed(self):
+        # action
+        response = self._get(HTTP_ACCEPT_ENCODING='gzip', HTTP_RANGE='bytes=0-9')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(b''.join(response.streaming_content), self.TEST_FILE_CONTENT[:10])
+
+    def test_file__GET__is_file__compressed_type_not_compressed(self):
+        # arrange
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_compression.log.gz', 'wb') as fp:
+            fp.write(gzip.compress(self.TEST_FILE_CONTENT))
+
+        # action
+        response = self._get('test_compression.log.gz', HTTP_ACCEPT_ENCODING='gzip')
+
+        # assert
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotIn('Accept-Encoding', response.get('Vary', ''))
+
+    def test_file__GET__is_file__sidecar_invalidated_on_update(self):
+        # arrange
+        response = self._get(HTTP_ACCEPT_ENCODING='gzip')
+        b''.join(response.streaming_content)
+        full_file_path = PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME
+        self.assertTrue(compression_cache.source_directory(full_file_path).is_dir())
+
+        # action
+        self.client.patch(
+            f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/',
+            data=self.TEST_FILE_CONTENT * 2,
+            content_type='application/octet-stream',
+        )
+        updated_response = self._get(HTTP_ACCEPT_ENCODING='gzip')
+
+        # assert
+        self.assertNotIsInstance(updated_response, FileResponse)
+        self.assertEqual(gzip.decompress(b''.join(updated_response.streaming_content)), self.TEST_FILE_CONTENT * 2)
+
+    @override_settings(FILE_COMPRESSION_CACHE_MAX_BYTES=1)
+    def test_file__GET__is_file__sidecar_over_budget(self):
+        # action
+        b''.join(self._get(HTTP_ACCEPT_ENCODING='gzip').streaming_content)
+
+        # assert
+        self.assertEqual(compression_cache.total_bytes(), 0)
+
+    def tearDown(self) -> None:
+        self.content_cache_patch.stop()
+        self.settings_override.disable()
+        shutil.rmtree(self.cache_dir)
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
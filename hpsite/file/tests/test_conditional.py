@@ -0,0 +1,95 @@
+import os
+import shutil
+from pathlib import Path
+
+from django.test import TestCase
+from rest_framework import status
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestFileApiConditional(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_conditional_dir'
+    TEST_FILE_NAME = 'test_conditional'
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME, 'w') as fp:
+            fp.write('test')
+
+    def test_file__GET__is_file__if_none_match(self):
+        # arrange
+        etag = self.client.get(f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/')['ETag']
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/', HTTP_IF_NONE_MATCH=etag)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_file__GET__is_file__if_modified_since(self):
+        # arrange
+        last_modified = self.client.get(f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/')['Last-Modified']
+
+        # action
+        response = self.client.get(
+            f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/', HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_file__GET__is_file__etag_changed_by_PATCH(self):
+        # arrange
+        etag = self.client.get(f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/')['ETag']
+        self.client.patch(
+            f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/',
+            data='{"file": "test, test"}',
+            content_type='application/json',
+        )
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/', HTTP_IF_NONE_MATCH=etag)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_file__GET__is_dir__if_none_match(self):
+        # arrange
+        etag = self.client.get(f'/file/{self.TEST_DIR}/')['ETag']
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', HTTP_IF_NONE_MATCH=etag)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_file__GET__is_dir__etag_depends_on_query(self):
+        # arrange
+        etag = self.client.get(f'/file/{self.TEST_DIR}/')['ETag']
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={'filterByName': 'test'}, HTTP_IF_NONE_MATCH=etag)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_file__GET__is_dir__etag_changed_by_PATCH(self):
+        # arrange
+        etag = self.client.get(f'/file/{self.TEST_DIR}/', data={'orderBy': 'size'})['ETag']
+        self.client.patch(
+            f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/',
+            data='{"file": "test, test"}',
+            content_type='application/json',
+        )
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={'orderBy': 'size'}, HTTP_IF_NONE_MATCH=etag)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from unittest import TestCase as UnitTestCase
+
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from file.delta import DirectoryHistory, delta_store
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestDirectoryHistory(UnitTestCase):
+    def test_changes_since(self):
+        # arrange
+        history = DirectoryHistory({'a': (1, 1), 'b': (1, 1), 'c': (1, 1)}, max_changes=100)
+        token = history.token
+
+        # action
+        history.update({'a': (2, 2), 'c': (1, 1), 'd': (1, 1), 'e': (1, 1)})
+        middle_token = history.token
+        history.update({'a': (2, 2), 'b': (1, 1), 'c': (1, 1), 'd': (1, 1)})
+
+        # assert
+        self.assertEqual(history.changes_since(token), (['d'], ['a', 'b'], []))
+        self.assertEqual(history.changes_since(middle_token), (['b'], [], ['e']))
+        self.assertEqual(history.changes_since(history.token), ([], [], []))
+        self.assertIsNone(history.changes_since('other.0'))
+
+    def test_changes_since__expired(self):
+        # arrange
+        history = DirectoryHistory({}, max_changes=2)
+        token = history.token
+
+        # action
+        history.update({'a': (1, 1), 'b': (1, 1), 'c': (1, 1)})
+
+        # assert
+        self.assertIsNone(history.changes_since(token))
+
+
+class TestFileApiDelta(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_delta_dir'
+    TEST_FILE_NAME_CONTENT_MAP = {
+        'test_delta_a.log': 'test',
+        'test_delta_b.log': 'test, test',
+        'test_delta_c.log': 'test, test, test',
+    }
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        for test_file_name, test_file_content in self.TEST_FILE_NAME_CONTENT_MAP.items():
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / test_file_name, 'w') as fp:
+                fp.write(test_file_content)
+
+    def _sync(self, since: str) -> dict:
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={'since': since})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)
+
+    def test_file__GET__is_dir__since(self):
+        # arrange
+        full_sync = self._sync('')
+
+        # action
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_delta_d.log', 'w') as fp:
+            fp.write('test')
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_delta_a.log', 'a') as fp:
+            fp.write(', test')
+        os.remove(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_delta_b.log')
+        delta = self._sync(full_sync['token'])
+        unchanged = self._sync(delta['token'])
+
+        # assert
+        self.assertTrue(full_sync['reset'])
+        self.assertEqual(full_sync['added'], sorted(self.TEST_FILE_NAME_CONTENT_MAP.keys()))
+        self.assertNotIn('reset', delta)
+        self.assertEqual(delta['added'], ['test_delta_d.log'])
+        self.assertEqual(delta['modified'], ['test_delta_a.log'])
+        self.assertEqual(delta['removed'], ['test_delta_b.log'])
+        self.assertEqual((unchanged['added'], unchanged['modified'], unchanged['removed']), ([], [], []))
+        self.assertEqual(unchanged['token'], delta['token'])
+
+    @override_settings(FILE_DELTA_MAX_CHANGES=1)
+    def test_file__GET__is_dir__since_expired(self):
+        # arrange
+        token = self._sync('')['token']
+
+        # action
+        os.remove(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_delta_a.log')
+        os.remove(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_delta_b.log')
+        result = self._sync(token)
+
+        # assert
+        self.assertTrue(result['reset'])
+        self.assertEqual(result['added'], ['test_delta_c.log'])
+
+    def test_file__GET__is_dir__since_not_available(self):
+        for params in [{'since': '', 'limit': 1}, {'since': '', 'depth': 2}, {'since': '', 'filterByGlob': '*.log'}]:
+            # action
+            response = self.client.get(f'/file/{self.TEST_DIR}/', data=params)
+
+            # assert
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def tearDown(self) -> None:
+        delta_store.clear()
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
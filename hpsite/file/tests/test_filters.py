@@ -0,0 +1,101 @@
+import json
+import os
+import re
+import shutil
+from fnmatch import fnmatchcase
+from pathlib import Path
+from unittest import TestCase as UnitTestCase
+
+from django.test import TestCase
+from rest_framework import status
+
+from file.filters import compile_glob_pattern, compile_name_pattern
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestCompilePattern(UnitTestCase):
+    NAME_LIST = ['test', 'test.log', 'test.log\n', 'a_test.txt', 'TEST.LOG', 'log', '', 'test$', 'te.st', 'a\\b']
+
+    def test_compile_name_pattern__same_as_re_search(self):
+        # arrange
+        pattern_list = [
+            'test', '^test', 'log$', '^test\\.log$', '\\.log', 'te.st', '^te\\.st$', 'test\\$', '^', '$',
+            '[a-z]+\\.txt', 'a\\\\b', 'a\\\\$', '(?i)log',
+        ]
+
+        for pattern in pattern_list:
+            for name in self.NAME_LIST:
+                # action & assert
+                self.assertEqual(
+                    bool(compile_name_pattern(pattern)(name)), bool(re.search(pattern, name)), (pattern, name)
+                )
+
+    def test_compile_glob_pattern__same_as_fnmatchcase(self):
+        # arrange
+        pattern_list = ['test', 'test*', '*.log', 'te*og', '*st*', '*', 'te?t', '[at]*', '*.LOG', 't*s*g']
+
+        for pattern in pattern_list:
+            for name in self.NAME_LIST:
+                # action & assert
+                self.assertEqual(
+                    bool(compile_glob_pattern(pattern)(name)), fnmatchcase(name, pattern), (pattern, name)
+                )
+
+
+class TestFileApiFilter(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_filters_dir'
+    TEST_FILE_NAME_CONTENT_MAP = {
+        'test_filter_1.log': 'test',
+        'test_filter_2.log': 'test, test, test',
+        'test_filter_3.txt': 'test, test',
+    }
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        for test_file_name, test_file_content in self.TEST_FILE_NAME_CONTENT_MAP.items():
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / test_file_name, 'w') as fp:
+                fp.write(test_file_content)
+        os.utime(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_filter_1.log', (1600000000, 1600000000))
+
+    def _get_files(self, params: dict) -> list[str]:
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data=params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)['files']
+
+    def test_file__GET__is_dir__filter_by_glob(self):
+        # action
+        files = self._get_files({'filterByGlob': '*.log'})
+
+        # assert
+        self.assertEqual(files, ['test_filter_1.log', 'test_filter_2.log'])
+
+    def test_file__GET__is_dir__filter_by_size(self):
+        # action
+        files = self._get_files({'minSize': 5, 'maxSize': 10})
+        log_files = self._get_files({'filterByName': r'\.log$', 'minSize': 5})
+
+        # assert
+        self.assertEqual(files, ['test_filter_3.txt'])
+        self.assertEqual(log_files, ['test_filter_2.log'])
+
+    def test_file__GET__is_dir__filter_by_modified(self):
+        # action
+        after_files = self._get_files({'modifiedAfter': '2020-09-14T00:00:00Z'})
+        before_files = self._get_files({'modifiedBefore': 1600000001})
+
+        # assert
+        self.assertEqual(after_files, ['test_filter_2.log', 'test_filter_3.txt'])
+        self.assertEqual(before_files, ['test_filter_1.log'])
+
+    def test_file__GET__is_dir__filter_not_available(self):
+        for params in [{'minSize': '-1'}, {'modifiedAfter': 'yesterday'}, {'filterByName': '('}]:
+            # action
+            response = self.client.get(f'/file/{self.TEST_DIR}/', data=params)
+
+            # assert
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
@@ -0,0 +1,134 @@
+import json
+import os
+import shutil
+from io import StringIO
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from file.async_api import AsyncFileApplication
+from file.cache import listing_cache
+from file.define import FileAttr, OrderDirection
+from file.index import rescan_directory
+from file.models import IndexedFile
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+@override_settings(FILE_LISTING_USE_INDEX=True)
+class TestFileApiIndex(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_index_dir'
+    TEST_FILE_NAME_CONTENT_MAP = {
+        'test_index_a': 'test, test',
+        'test_index_b': 'test',
+        'test_index_c': 'test, test, test',
+    }
+
+    def setUp(self) -> None:
+        listing_cache.clear()
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        for test_name_path, test_file_content in self.TEST_FILE_NAME_CONTENT_MAP.items():
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / test_name_path, 'w') as fp:
+                fp.write(test_file_content)
+
+        call_command('index_files', self.TEST_DIR, stdout=StringIO())
+
+    def test_index_files__command(self):
+        # assert
+        self.assertEqual(
+            set(IndexedFile.objects.values_list('name', flat=True)), set(self.TEST_FILE_NAME_CONTENT_MAP.keys())
+        )
+
+    def test_file__GET__is_dir__from_index(self):
+        # arrange
+        params = {'orderBy': FileAttr.SIZE.value, 'orderByDirection': OrderDirection.DESCENDING.value}
+        IndexedFile.objects.filter(name='test_index_b').update(size=100)
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data=params)
+
+        # assert
+        self.assertEqual(json.loads(response.content)['files'], ['test_index_b', 'test_index_c', 'test_index_a'])
+
+    def test_file__GET__is_dir__from_index_filtered(self):
+        # arrange
+        params = {'filterByGlob': 'test_index_*', 'minSize': 5}
+        IndexedFile.objects.filter(name='test_index_b').update(size=100)
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data=params)
+
+        # assert
+        self.assertEqual(json.loads(response.content)['files'], ['test_index_a', 'test_index_b', 'test_index_c'])
+
+    def test_file__GET__is_dir__from_index_pages(self):
+        # arrange
+        params = {'orderBy': FileAttr.SIZE.value, 'limit': 2}
+        first_page = json.loads(self.client.get(f'/file/{self.TEST_DIR}/', data=params).content)
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={**params, 'cursor': first_page['nextCursor']})
+
+        # assert
+        self.assertEqual(first_page['files'], ['test_index_b', 'test_index_a'])
+        self.assertEqual(json.loads(response.content)['files'], ['test_index_c'])
+
+    async def test_async__GET__is_dir__from_index(self):
+        # arrange
+        await sync_to_async(IndexedFile.objects.filter(name='test_index_b').update)(size=100)
+        application = AsyncFileApplication(None)
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        async def get(query_string: bytes) -> dict:
+            messages.clear()
+            scope = {
+                'type': 'http', 'method': 'GET', 'path': f'/file/{self.TEST_DIR}/', 'query_string': query_string,
+                'headers': [], 'server': ('testserver', 80),
+            }
+            await application(scope, receive, send)
+            return json.loads(b''.join(message.get('body', b'') for message in messages[1:]))
+
+        # action
+        listing = await get(b'orderBy=size&orderByDirection=Descending')
+        page = await get(b'orderBy=size&orderByDirection=Descending&limit=1')
+
+        # assert
+        self.assertEqual(listing['files'], ['test_index_b', 'test_index_c', 'test_index_a'])
+        self.assertEqual(page['files'], ['test_index_b'])
+
+    def test_file__POST__DELETE__keep_index(self):
+        # arrange
+        file_name = 'test_index_d'
+
+        # action
+        self.client.post(f'/file/{self.TEST_DIR}/{file_name}/', data={'file': 'test'})
+        self.client.delete(f'/file/{self.TEST_DIR}/test_index_a/')
+
+        # assert
+        self.assertEqual(
+            set(IndexedFile.objects.values_list('name', flat=True)), {'test_index_b', 'test_index_c', file_name}
+        )
+
+    def test_rescan_directory__incremental(self):
+        # arrange
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_index_b', 'w') as fp:
+            fp.write('test, test, test, test')
+        os.remove(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_index_c')
+
+        # action
+        result = rescan_directory(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        # assert
+        self.assertEqual(result, {'added': 0, 'updated': 1, 'removed': 1})
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
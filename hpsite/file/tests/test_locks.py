@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase as UnitTestCase
+
+from django.test import TestCase
+from rest_framework import status
+
+from file.locks import PathLockManager, path_locks
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+def _try_exclusive(lock_path: Path, stripes: int, path: str) -> bool:
+    manager = PathLockManager(lock_path, stripes)
+    acquired = manager.acquire(manager.stripe_of(path), exclusive=True, blocking=False)
+    if acquired:
+        manager.release(manager.stripe_of(path), exclusive=True)
+    return acquired
+
+
+def _hold_exclusive(lock_path: Path, stripes: int, path: str, locked, release) -> None:
+    manager = PathLockManager(lock_path, stripes)
+    with manager.writing(path):
+        locked.set()
+        release.wait()
+
+
+class TestPathLockManager(UnitTestCase):
+    TEST_DIR = 'hpsite/file/tests/test_locks_unit_dir'
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+        self.lock_path = PROJECT_ROOT_PATH / self.TEST_DIR / 'locks'
+        self.manager = PathLockManager(self.lock_path, stripes=64)
+
+    def test_readers_share(self):
+        # action
+        with self.manager.reading('a'):
+            other_reader = self.manager.try_reading('a')
+
+        # assert
+        self.assertIsNotNone(other_reader)
+        other_reader.release()
+        self.assertIsNotNone(self.manager.try_reading('a'))
+
+    def test_writer_excludes(self):
+        # arrange
+        acquired = threading.Event()
+
+        def write():
+            with self.manager.writing('a'):
+                acquired.set()
+
+        # action
+        with self.manager.writing('a'):
+            reader = self.manager.try_reading('a')
+            thread = threading.Thread(target=write)
+            thread.start()
+            self.assertFalse(acquired.wait(0.1))
+        thread.join()
+
+        # assert
+        self.assertIsNone(reader)
+        self.assertTrue(acquired.is_set())
+
+    def test_writer_excludes_other_process(self):
+        # arrange
+        context = multiprocessing.get_context('fork')
+
+        # action
+        with context.Pool(1) as pool:
+            with self.manager.reading('a'):
+                while_reading = pool.apply(_try_exclusive, (self.lock_path, 64, 'a'))
+            after_reading = pool.apply(_try_exclusive, (self.lock_path, 64, 'a'))
+
+        # assert
+        self.assertFalse(while_reading)
+        self.assertTrue(after_reading)
+
+    def test_try_reading__writer_waits_for_other_process(self):
+        # arrange
+        context = multiprocessing.get_context('fork')
+        locked, release = context.Event(), context.Event()
+        process = context.Process(target=_hold_exclusive, args=(self.lock_path, 64, 'a', locked, release))
+        process.start()
+        locked.wait()
+        writer = threading.Thread(target=lambda: self.manager.writing('a').release())
+        writer.start()
+        writer.join(0.1)
+
+        # action
+        started = time.monotonic()
+        reader = self.manager.try_reading('a')
+        elapsed = time.monotonic() - started
+        release.set()
+        writer.join()
+        process.join()
+
+        # assert
+        self.assertIsNone(reader)
+        self.assertLess(elapsed, 0.05)
+        self.assertIsNotNone(self.manager.try_reading('a'))
+
+    def test_stripe_of__normalized(self):
+        # assert
+        self.assertEqual(self.manager.stripe_of('dir/a'), self.manager.stripe_of('dir/sub/../a'))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+
+class TestFileApiLocks(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_locks_dir'
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_locks.txt', 'w') as fp:
+            fp.write('test')
+
+    def test_file__PATCH__waits_for_reader(self):
+        # arrange
+        full_file_path = PROJECT_ROOT_PATH / self.TEST_DIR / 'test_locks.txt'
+        responses = []
+        thread = threading.Thread(target=lambda: responses.append(self.client.patch(
+            f'/file/{self.TEST_DIR}/test_locks.txt/?append=true', data=b', test', content_type='text/plain'
+        )))
+
+        # action
+        with path_locks.reading(full_file_path):
+            thread.start()
+            thread.join(0.1)
+            with open(full_file_path) as fp:
+                content_while_reading = fp.read()
+        thread.join()
+
+        # assert
+        self.assertEqual(content_while_reading, 'test')
+        self.assertEqual(responses[0].status_code, status.HTTP_200_OK)
+        with open(full_file_path) as fp:
+            self.assertEqual(fp.read(), 'test, test')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
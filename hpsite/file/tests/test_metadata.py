@@ -0,0 +1,121 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+from django.http import FileResponse
+from django.test import TestCase
+from rest_framework import status
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestFileApiMetadata(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_metadata_dir'
+    TEST_FILE_NAME_CONTENT_MAP = {
+        'test_metadata_a.txt': 'test',
+        'test_metadata_b.json': 'test, test',
+        'test_metadata_c.bin': 'test, test, test',
+    }
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        for i, (test_file_name, test_file_content) in enumerate(self.TEST_FILE_NAME_CONTENT_MAP.items()):
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / test_file_name, 'w') as fp:
+                fp.write(test_file_content)
+            os.utime(PROJECT_ROOT_PATH / self.TEST_DIR / test_file_name, (1600000000 + i, 1600000000 + i))
+
+    def test_file__GET__is_dir__fields(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={'fields': 'size,lastModified,type'})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['files'], [
+            {'name': 'test_metadata_a.txt', 'size': 4, 'lastModified': 1600000000.0, 'type': 'text/plain'},
+            {'name': 'test_metadata_b.json', 'size': 10, 'lastModified': 1600000001.0, 'type': 'application/json'},
+            {
+                'name': 'test_metadata_c.bin',
+                'size': 16,
+                'lastModified': 1600000002.0,
+                'type': 'application/octet-stream',
+            },
+        ])
+
+    def test_file__GET__is_dir__fields_with_limit(self):
+        # action
+        params = {'fields': 'size', 'limit': 2, 'orderBy': 'size', 'orderByDirection': 'Descending'}
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data=params)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            json.loads(response.content)['files'],
+            [{'name': 'test_metadata_c.bin', 'size': 16}, {'name': 'test_metadata_b.json', 'size': 10}],
+        )
+
+    def test_file__GET__is_dir__fields_appended_outside_api(self):
+        # arrange
+        url = f'/file/{self.TEST_DIR}/'
+        self.client.get(url, data={'fields': 'size'})
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_metadata_a.txt', 'a') as fp:
+            fp.write(', test')
+
+        # action
+        response = self.client.get(url, data={'fields': 'size'})
+        head_response = self.client.head(url, data={'fields': 'size'})
+        name_response = self.client.get(url, data={'fields': 'type'})
+
+        # assert
+        self.assertEqual(json.loads(response.content)['files'][0], {'name': 'test_metadata_a.txt', 'size': 10})
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('ETag', head_response)
+        self.assertIn('ETag', name_response)
+
+    def test_file__GET__is_dir__fields_not_available(self):
+        for params in [{'fields': 'owner'}, {'fields': 'size', 'depth': 2}, {'fields': 'size', 'since': ''}]:
+            # action
+            response = self.client.get(f'/file/{self.TEST_DIR}/', data=params)
+
+            # assert
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_file__HEAD__is_file(self):
+        # action
+        response = self.client.head(f'/file/{self.TEST_DIR}/test_metadata_c.bin/')
+        get_response = self.client.get(f'/file/{self.TEST_DIR}/test_metadata_c.bin/')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIsInstance(response, FileResponse)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Length'], '16')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        for header in ('Content-Type', 'ETag', 'Last-Modified'):
+            self.assertEqual(response[header], get_response[header], header)
+
+    def test_file__HEAD__is_file__not_modified(self):
+        # arrange
+        etag = self.client.head(f'/file/{self.TEST_DIR}/test_metadata_a.txt/')['ETag']
+
+        # action
+        response = self.client.head(f'/file/{self.TEST_DIR}/test_metadata_a.txt/', HTTP_IF_NONE_MATCH=etag)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_file__HEAD__is_dir(self):
+        # action
+        response = self.client.head(f'/file/{self.TEST_DIR}/', data={'orderBy': 'size'})
+        get_response = self.client.get(f'/file/{self.TEST_DIR}/', data={'orderBy': 'size'})
+        not_exist_response = self.client.head(f'/file/{self.TEST_DIR}/not_test_file/')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], get_response['ETag'])
+        self.assertEqual(not_exist_response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
@@ -0,0 +1,91 @@
+import os
+import shutil
+from pathlib import Path
+from unittest import TestCase as UnitTestCase
+
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from file.metrics import MetricsRegistry, metrics
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestMetricsRegistry(UnitTestCase):
+    def test_metrics_registry__render(self):
+        # arrange
+        registry = MetricsRegistry()
+        registry.inc('test_total', 2, view='a')
+        registry.observe('test_seconds', 0.003, buckets=(0.001, 0.01), view='a')
+        registry.observe('test_seconds', 0.5, buckets=(0.001, 0.01), view='a')
+
+        # action
+        text = registry.render()
+
+        # assert
+        self.assertIn('# TYPE test_total counter\ntest_total{view="a"} 2\n', text)
+        self.assertIn('test_seconds_bucket{view="a",le="0.001"} 0\n', text)
+        self.assertIn('test_seconds_bucket{view="a",le="0.01"} 1\n', text)
+        self.assertIn('test_seconds_bucket{view="a",le="+Inf"} 2\n', text)
+        self.assertIn('test_seconds_count{view="a"} 2\n', text)
+
+
+class TestFileApiMetrics(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_metrics_dir'
+    TEST_FILE_NAME_LIST = ['test_metrics_a', 'test_metrics_b']
+
+    def setUp(self) -> None:
+        metrics.clear()
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        for test_file_name in self.TEST_FILE_NAME_LIST:
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / test_file_name, 'w') as fp:
+                fp.write('test')
+
+    def test_file__GET__is_dir__server_timing(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={'orderBy': 'size'})
+
+        # assert
+        stage_names = [stage.split(';')[0] for stage in response['Server-Timing'].split(', ')]
+        self.assertEqual(stage_names, ['validate', 'cache', 'scan', 'sort', 'render', 'total'])
+        self.assertEqual(
+            metrics.counter_value('file_api_bytes_sent_total', view='FileView'), len(response.content)
+        )
+
+    def test_file__POST__bytes_received(self):
+        # arrange
+        content = b'test, test'
+
+        # action
+        self.client.post(
+            f'/file/{self.TEST_DIR}/test_metrics_c/', data=content, content_type='application/octet-stream'
+        )
+
+        # assert
+        self.assertEqual(metrics.counter_value('file_api_bytes_received_total', view='FileView'), len(content))
+
+    def test_metrics(self):
+        # arrange
+        self.client.get(f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME_LIST[0]}/')
+
+        # action
+        response = self.client.get('/file/_metrics/')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            'file_api_request_seconds_count{method="GET",status="200",view="FileView"} 1', response.content.decode()
+        )
+
+    @override_settings(FILE_METRICS_ENABLED=False)
+    def test_file__GET__metrics_disabled(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/')
+
+        # assert
+        self.assertNotIn('Server-Timing', response)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
@@ -0,0 +1,132 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+from unittest import TestCase as UnitTestCase
+
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from file.define import FileAttr, OrderDirection
+from file.pagination import select_top_k
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestFileApiPagination(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_pagination_dir'
+    TEST_FILE_NAME_CONTENT_MAP = {
+        'test_page_a': 'test, test',
+        'test_page_b': 'test',
+        'test_page_c': 'test, test, test',
+        'test_page_d': 'test',
+        'test_page_e': 'test, test',
+    }
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        for test_name_path, test_file_content in self.TEST_FILE_NAME_CONTENT_MAP.items():
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / test_name_path, 'w') as fp:
+                fp.write(test_file_content)
+
+    def _get_all_pages(self, params: dict) -> list[list[str]]:
+        pages = []
+        cursor = None
+        while True:
+            data = {**params, 'cursor': cursor} if cursor else params
+            response = self.client.get(f'/file/{self.TEST_DIR}/', data=data)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            content = json.loads(response.content)
+            pages.append(content['files'])
+            cursor = content['nextCursor']
+            if cursor is None:
+                return pages
+
+    def test_file__GET__is_dir__limit_name(self):
+        # action
+        pages = self._get_all_pages({'limit': 2})
+
+        # assert
+        self.assertEqual(pages, [['test_page_a', 'test_page_b'], ['test_page_c', 'test_page_d'], ['test_page_e']])
+
+    def test_file__GET__is_dir__limit_size_descending(self):
+        # arrange
+        params = {'limit': 2, 'orderBy': FileAttr.SIZE.value, 'orderByDirection': OrderDirection.DESCENDING.value}
+
+        # action
+        pages = self._get_all_pages(params)
+
+        # assert
+        self.assertEqual(pages, [['test_page_c', 'test_page_e'], ['test_page_a', 'test_page_d'], ['test_page_b']])
+
+    def test_file__GET__is_dir__cursor_for_other_order(self):
+        # arrange
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={'limit': 2})
+        cursor = json.loads(response.content)['nextCursor']
+
+        # action
+        response = self.client.get(
+            f'/file/{self.TEST_DIR}/', data={'limit': 2, 'cursor': cursor, 'orderBy': FileAttr.SIZE.value}
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_file__GET__is_dir__limit_not_available(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={'limit': 0})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(FILE_LISTING_STREAM_THRESHOLD=1)
+    def test_file__GET__is_dir__streamed(self):
+        # arrange
+        expect_content = {
+            'isDirectory': True,
+            'files': sorted(self.TEST_FILE_NAME_CONTENT_MAP.keys()),
+        }
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            json.dumps(expect_content, ensure_ascii=False, separators=(',', ':')).encode(),
+        )
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+
+class TestSelectTopK(UnitTestCase):
+    KEYS = [(3, 'c'), (1, 'a'), (2, 'b'), (2, 'a'), (5, 'e')]
+
+    def test_select_top_k__ascending(self):
+        # action
+        page = select_top_k(iter(self.KEYS), OrderDirection.ASCENDING.value, 3)
+
+        # assert
+        self.assertEqual(page, [(1, 'a'), (2, 'a'), (2, 'b')])
+
+    def test_select_top_k__descending_after(self):
+        # action
+        page = select_top_k(iter(self.KEYS), OrderDirection.DESCENDING.value, 2, after=(3, 'c'))
+
+        # assert
+        self.assertEqual(page, [(2, 'b'), (2, 'a')])
+
+    def test_select_top_k__same_as_full_sort(self):
+        # arrange
+        expect_page = sorted(self.KEYS)
+
+        # action
+        page = select_top_k(iter(self.KEYS), OrderDirection.ASCENDING.value, len(self.KEYS) + 1)
+
+        # assert
+        self.assertEqual(page, expect_page)
@@ -0,0 +1,114 @@
+import os
+import shutil
+from pathlib import Path
+
+from django.test import TestCase
+from rest_framework import status
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestFileApiPartialUpdate(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_partial_update_dir'
+    TEST_FILE_NAME = 'test_partial_update.txt'
+    TEST_FILE_CONTENT = b'0123456789'
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME, 'wb') as fp:
+            fp.write(self.TEST_FILE_CONTENT)
+
+    @property
+    def url(self) -> str:
+        return f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/'
+
+    def _patch(self, content: bytes, query: str = '', **extra):
+        return self.client.patch(f'{self.url}{query}', data=content, content_type='application/octet-stream', **extra)
+
+    def _read(self) -> bytes:
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME, 'rb') as fp:
+            return fp.read()
+
+    def test_file__PATCH__content_range(self):
+        # arrange
+        inode = os.stat(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME).st_ino
+
+        # action
+        response = self._patch(b'abc', HTTP_CONTENT_RANGE='bytes 2-4/*')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._read(), b'01abc56789')
+        self.assertEqual(os.stat(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME).st_ino, inode)
+        self.assertEqual(response['ETag'], self.client.head(self.url)['ETag'])
+
+    def test_file__PATCH__offset_past_end(self):
+        # action
+        response = self._patch(b'abcd', '?offset=8')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._read(), b'01234567abcd')
+
+    def test_file__PATCH__append(self):
+        # action
+        first_response = self._patch(b'ab', '?append=true')
+        second_response = self._patch(b'cd', '?append=true')
+
+        # assert
+        self.assertEqual(first_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._read(), b'0123456789abcd')
+        self.assertNotEqual(first_response['ETag'], second_response['ETag'])
+        self.assertEqual(second_response['ETag'], self.client.head(self.url)['ETag'])
+
+    def test_file__PATCH__precondition(self):
+        # arrange
+        etag = self.client.head(self.url)['ETag']
+
+        # action
+        stale_size_response = self._patch(b'ab', '?append=true&expectedSize=4')
+        stale_etag_response = self._patch(b'ab', '?append=true', HTTP_IF_MATCH='"stale"')
+        response = self._patch(b'ab', '?append=true&expectedSize=10', HTTP_IF_MATCH=etag)
+        replace_response = self._patch(b'new', HTTP_IF_MATCH=etag)
+
+        # assert
+        self.assertEqual(stale_size_response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(stale_etag_response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(replace_response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(self._read(), b'0123456789ab')
+
+    def test_file__PATCH__range_not_available(self):
+        # action
+        beyond_response = self._patch(b'ab', '?offset=11')
+        length_response = self._patch(b'abcd', HTTP_CONTENT_RANGE='bytes 0-1/*')
+        conflict_response = self._patch(b'ab', '?append=true&offset=0')
+        header_response = self._patch(b'ab', HTTP_CONTENT_RANGE='bytes 4-1/*')
+
+        # assert
+        self.assertEqual(beyond_response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(length_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(conflict_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(header_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._read(), self.TEST_FILE_CONTENT)
+
+    def test_file__PATCH__malformed_content_length(self):
+        # action
+        response = self._patch(b'ab', '?append=true', CONTENT_LENGTH='2x')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._read(), self.TEST_FILE_CONTENT)
+
+    def test_file__PATCH__whole_file(self):
+        # action
+        response = self.client.patch(self.url, data={'file': 'test'}, content_type='application/json')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._read(), b'test')
+        self.assertEqual(response['ETag'], self.client.head(self.url)['ETag'])
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
@@ -0,0 +1,118 @@
+import os
+import shutil
+from pathlib import Path
+from unittest import TestCase as UnitTestCase
+
+from django.test import RequestFactory, TestCase
+from rest_framework import status
+
+from file.conditional import file_etag
+from file.download import serve_file
+from file.ranges import parse_range_header
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestParseRangeHeader(UnitTestCase):
+    def test_parse_range_header__single(self):
+        self.assertEqual(parse_range_header('bytes=0-4', 10), [(0, 4)])
+
+    def test_parse_range_header__open_end_and_suffix(self):
+        self.assertEqual(parse_range_header('bytes=8-', 10), [(8, 9)])
+        self.assertEqual(parse_range_header('bytes=-3', 10), [(7, 9)])
+
+    def test_parse_range_header__merge_overlapping(self):
+        self.assertEqual(parse_range_header('bytes=5-7,0-2,2-4', 10), [(0, 7)])
+
+    def test_parse_range_header__unsatisfiable(self):
+        self.assertEqual(parse_range_header('bytes=10-20', 10), [])
+
+    def test_parse_range_header__malformed(self):
+        self.assertIsNone(parse_range_header('bytes=4-2', 10))
+        self.assertIsNone(parse_range_header('lines=0-1', 10))
+        self.assertIsNone(parse_range_header('bytes=a-1', 10))
+
+
+class TestFileApiRange(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_range_dir'
+    TEST_FILE_NAME = 'test_range.txt'
+    TEST_FILE_CONTENT = b'0123456789'
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME, 'wb') as fp:
+            fp.write(self.TEST_FILE_CONTENT)
+
+    def test_file__GET__is_file__single_range(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/', HTTP_RANGE='bytes=2-5')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+    def test_file__GET__is_file__multi_range(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/', HTTP_RANGE='bytes=0-1,-2')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        self.assertIn(b'Content-Range: bytes 0-1/10\r\n\r\n01\r\n', body)
+        self.assertIn(b'Content-Range: bytes 8-9/10\r\n\r\n89\r\n', body)
+
+    def test_file__GET__is_file__range_not_satisfiable(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/', HTTP_RANGE='bytes=20-')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_file__GET__is_file__if_range_mismatch(self):
+        # action
+        response = self.client.get(
+            f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/', HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"'
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), self.TEST_FILE_CONTENT)
+
+    def test_file__GET__is_file__range_replaced_before_sent(self):
+        # arrange
+        url = f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/'
+        response = self.client.get(url, HTTP_RANGE='bytes=2-5')
+        multi_range_response = self.client.get(url, HTTP_RANGE='bytes=0-1,-2')
+
+        # action
+        self.client.patch(url, data={'file': 'ab'}, content_type='application/json')
+
+        # assert
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        multi_range_body = b''.join(multi_range_response.streaming_content)
+        self.assertEqual(len(multi_range_body), int(multi_range_response['Content-Length']))
+        self.assertIn(b'Content-Range: bytes 8-9/10\r\n\r\n89\r\n', multi_range_body)
+
+    def test_serve_file__changed_since_stat(self):
+        # arrange
+        full_file_path = PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME
+        stale_stat = os.stat(full_file_path)
+        with open(full_file_path, 'ab') as fp:
+            fp.write(b'abc')
+
+        # action
+        response = serve_file(RequestFactory().get('/', HTTP_RANGE='bytes=8-'), full_file_path, stale_stat)
+
+        # assert
+        self.assertEqual(response['ETag'], file_etag(os.stat(full_file_path)))
+        self.assertEqual(response['Content-Range'], 'bytes 8-12/13')
+        self.assertEqual(b''.join(response.streaming_content), b'89abc')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
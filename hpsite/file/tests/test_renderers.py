@@ -0,0 +1,139 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from unittest import TestCase as UnitTestCase
+
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from file.streaming import iter_listing_json, iter_listing_ndjson, render_listing_json
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+NAME_LIST = ['test.log', 'tést "quoted"', 'line\nbreak', 'sep\u2028ara\u2029tor', 'back\\slash', '日本語.txt']
+
+
+class TestListingEncoding(UnitTestCase):
+    def test_render_listing_json__same_as_json_renderer(self):
+        # arrange
+        expect_content = JSONRenderer().render({'isDirectory': True, 'files': NAME_LIST})
+
+        # action & assert
+        self.assertEqual(render_listing_json(NAME_LIST), expect_content)
+        self.assertEqual(render_listing_json([]), JSONRenderer().render({'isDirectory': True, 'files': []}))
+
+    def test_iter_listing_json__chunked(self):
+        # arrange
+        expect_content = JSONRenderer().render({'isDirectory': True, 'files': NAME_LIST})
+
+        for chunk_size in (1, 2, 4, len(NAME_LIST), 100):
+            # action & assert
+            self.assertEqual(b''.join(iter_listing_json(iter(NAME_LIST), chunk_size)), expect_content, chunk_size)
+
+    def test_iter_listing_ndjson(self):
+        # action
+        content = b''.join(iter_listing_ndjson(NAME_LIST, chunk_size=4))
+
+        # assert
+        lines = content.decode().split('\n')
+        self.assertEqual(lines[-1], '')
+        self.assertEqual([json.loads(line) for line in lines[:-1]], NAME_LIST)
+        self.assertEqual(len(content.decode().splitlines()), len(NAME_LIST))
+
+
+class TestFileApiListingRenderer(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_renderers_dir'
+    TEST_FILE_NAME_LIST = ['test_render_a.log', 'test_render_b.log', 'test_render_ü.log']
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        for test_file_name in self.TEST_FILE_NAME_LIST:
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / test_file_name, 'w') as fp:
+                fp.write('test')
+
+    def test_file__GET__is_dir__json_byte_compatible(self):
+        # arrange
+        expect_content = JSONRenderer().render({'isDirectory': True, 'files': self.TEST_FILE_NAME_LIST})
+
+        for headers in ({}, {'HTTP_ACCEPT': '*/*'}, {'HTTP_ACCEPT': 'application/json'}):
+            # action
+            response = self.client.get(f'/file/{self.TEST_DIR}/', **headers)
+
+            # assert
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertEqual(response.content, expect_content, headers)
+            self.assertIn('Accept', response['Vary'])
+
+    def test_file__GET__is_dir__json_indent(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', HTTP_ACCEPT='application/json; indent=2')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'\n  "files"', response.content)
+        self.assertEqual(json.loads(response.content)['files'], self.TEST_FILE_NAME_LIST)
+
+    def test_file__GET__is_dir__browsable_api(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', HTTP_ACCEPT='text/html')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+
+    def test_file__GET__is_dir__ndjson(self):
+        for params, headers in (({'format': 'ndjson'}, {}), ({}, {'HTTP_ACCEPT': 'application/x-ndjson'})):
+            # action
+            response = self.client.get(f'/file/{self.TEST_DIR}/', data=params, **headers)
+
+            # assert
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            self.assertTrue(response.has_header('ETag'))
+            content = b''.join(response.streaming_content).decode()
+            self.assertEqual([json.loads(line) for line in content.splitlines()], self.TEST_FILE_NAME_LIST)
+
+    def test_file__GET__is_dir__ndjson_etag(self):
+        # arrange
+        json_response = self.client.get(f'/file/{self.TEST_DIR}/')
+
+        # action
+        response = self.client.get(
+            f'/file/{self.TEST_DIR}/', HTTP_ACCEPT='application/x-ndjson', HTTP_IF_NONE_MATCH=json_response['ETag']
+        )
+        head_response = self.client.head(f'/file/{self.TEST_DIR}/', HTTP_ACCEPT='application/x-ndjson')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], json_response['ETag'])
+        self.assertEqual(head_response['ETag'], response['ETag'])
+        self.assertIn('Accept', response['Vary'])
+
+    def test_file__GET__is_dir__ndjson_error(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={'format': 'ndjson', 'minSize': '-1'})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(json.loads(response.content), 'minSize: -1 is not available')
+
+    def test_file__GET__is_dir__depth_ndjson(self):
+        # arrange
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR / 'sub')
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'sub' / 'test_render_c.log', 'w') as fp:
+            fp.write('test')
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={'depth': 2, 'format': 'ndjson'})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('sub/test_render_c.log', [json.loads(line) for line in content.splitlines()])
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
@@ -0,0 +1,86 @@
+import json
+import shutil
+from pathlib import Path
+
+from django.test import TestCase
+from rest_framework import status
+
+from file.define import FileAttr, OrderDirection, SortScope
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestFileApiTree(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_tree_dir'
+    TEST_FILE_PATH_CONTENT_MAP = {
+        'test_tree_a.log': 'test',
+        'sub_1/test_tree_b.log': 'test, test, test',
+        'sub_1/test_tree_c.txt': 'test, test',
+        'sub_1/sub_2/test_tree_d.log': 'test, test, test, test',
+        'sub_3/test_tree_e.log': 'test, test',
+    }
+
+    def setUp(self) -> None:
+        for test_file_path, test_file_content in self.TEST_FILE_PATH_CONTENT_MAP.items():
+            full_path = PROJECT_ROOT_PATH / self.TEST_DIR / test_file_path
+            full_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(full_path, 'w') as fp:
+                fp.write(test_file_content)
+
+    def _get_files(self, params: dict) -> list[str]:
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data=params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(b''.join(response.streaming_content))['files']
+
+    def test_file__GET__is_dir__depth(self):
+        # action
+        files = self._get_files({'depth': 2})
+
+        # assert
+        self.assertEqual(
+            set(files), {'test_tree_a.log', 'sub_1/test_tree_b.log', 'sub_1/test_tree_c.txt', 'sub_3/test_tree_e.log'}
+        )
+
+    def test_file__GET__is_dir__depth_upload_temp_file_hidden(self):
+        # arrange
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'sub_3/.test_tree_f.log.ab_d12z9.upload', 'w') as fp:
+            fp.write('test')
+
+        # action
+        files = self._get_files({'depth': 2})
+
+        # assert
+        self.assertNotIn('sub_3/.test_tree_f.log.ab_d12z9.upload', files)
+
+    def test_file__GET__is_dir__depth_include_exclude(self):
+        # action
+        files = self._get_files({'depth': 3, 'include': '*.log', 'exclude': 'sub_3'})
+
+        # assert
+        self.assertEqual(set(files), {'test_tree_a.log', 'sub_1/test_tree_b.log', 'sub_1/sub_2/test_tree_d.log'})
+
+    def test_file__GET__is_dir__depth_global_sort(self):
+        # arrange
+        params = {
+            'depth': 3,
+            'orderBy': FileAttr.SIZE.value,
+            'orderByDirection': OrderDirection.DESCENDING.value,
+            'sortScope': SortScope.GLOBAL.value,
+        }
+
+        # action
+        files = self._get_files(params)
+
+        # assert
+        self.assertEqual(files[:2], ['sub_1/sub_2/test_tree_d.log', 'sub_1/test_tree_b.log'])
+        self.assertEqual(files[-1], 'test_tree_a.log')
+
+    def test_file__GET__is_dir__depth_not_available(self):
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/', data={'depth': 0})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
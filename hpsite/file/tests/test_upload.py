@@ -0,0 +1,80 @@
+import os
+import shutil
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestFileApiStreamUpload(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_upload_dir'
+    TEST_FILE_NAME = 'test_upload'
+    TEST_BINARY_CONTENT = bytes(range(256)) * 64
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME, 'w') as fp:
+            fp.write('test')
+
+    def _read(self, file_name: str) -> bytes:
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / file_name, 'rb') as fp:
+            return fp.read()
+
+    def test_file__GET__is_dir__upload_temp_file_hidden(self):
+        # arrange
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / f'.{self.TEST_FILE_NAME}.ab_d12z9.upload', 'w') as fp:
+            fp.write('test')
+
+        # action
+        response = self.client.get(f'/file/{self.TEST_DIR}/')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['files'], [self.TEST_FILE_NAME])
+
+    @override_settings(FILE_STREAM_UPLOAD_CHUNK_SIZE=1000)
+    def test_file__POST__multipart_binary(self):
+        # arrange
+        file_name = 'test_upload_binary'
+        upload = SimpleUploadedFile(file_name, self.TEST_BINARY_CONTENT)
+
+        # action
+        response = self.client.post(f'/file/{self.TEST_DIR}/{file_name}/', data={'file': upload})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._read(file_name), self.TEST_BINARY_CONTENT)
+
+    @override_settings(FILE_STREAM_UPLOAD_CHUNK_SIZE=1000, FILE_STREAM_UPLOAD_FSYNC=True)
+    def test_file__PATCH__raw_body(self):
+        # action
+        response = self.client.patch(
+            f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/',
+            data=self.TEST_BINARY_CONTENT,
+            content_type='application/octet-stream',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._read(self.TEST_FILE_NAME), self.TEST_BINARY_CONTENT)
+        self.assertEqual(os.listdir(PROJECT_ROOT_PATH / self.TEST_DIR), [self.TEST_FILE_NAME])
+
+    def test_file__POST__raw_body_already_exist(self):
+        # action
+        response = self.client.post(
+            f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/',
+            data=self.TEST_BINARY_CONTENT,
+            content_type='application/octet-stream',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._read(self.TEST_FILE_NAME), b'test')
+        self.assertEqual(os.listdir(PROJECT_ROOT_PATH / self.TEST_DIR), [self.TEST_FILE_NAME])
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
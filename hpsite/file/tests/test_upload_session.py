@@ -0,0 +1,166 @@
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from file.upload_session import UploadSession, collect_stale_sessions, session_root
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestFileApiUploadSession(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_upload_session_dir'
+    TEST_FILE_NAME = 'test_resumable'
+    TEST_FILE_CONTENT = b'0123456789abcdef'
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+        self.session_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(FILE_UPLOAD_SESSION_DIR=self.session_dir)
+        self.settings_override.enable()
+
+    def _create_session(self) -> str:
+        response = self.client.post(
+            '/file/_uploads/',
+            data=json.dumps({'path': f'{self.TEST_DIR}/{self.TEST_FILE_NAME}', 'size': len(self.TEST_FILE_CONTENT)}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return json.loads(response.content)['sessionId']
+
+    def _put_chunk(self, session_id: str, start: int, end: int):
+        return self.client.put(
+            f'/file/_uploads/{session_id}/',
+            data=self.TEST_FILE_CONTENT[start:end + 1],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.TEST_FILE_CONTENT)}',
+        )
+
+    def test_upload_session__out_of_order_chunks_and_commit(self):
+        # arrange
+        session_id = self._create_session()
+
+        # action
+        self._put_chunk(session_id, 8, 15)
+        response = self.client.get(f'/file/_uploads/{session_id}/')
+        received_ranges = json.loads(response.content)['receivedRanges']
+        self._put_chunk(session_id, 0, 7)
+        response = self.client.post(f'/file/_uploads/{session_id}/commit/')
+
+        # assert
+        self.assertEqual(received_ranges, [[8, 15]])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME, 'rb') as fp:
+            self.assertEqual(fp.read(), self.TEST_FILE_CONTENT)
+        self.assertEqual(os.listdir(self.session_dir), [])
+
+    def test_upload_session__commit_incomplete(self):
+        # arrange
+        session_id = self._create_session()
+        self._put_chunk(session_id, 0, 7)
+
+        # action
+        response = self.client.post(f'/file/_uploads/{session_id}/commit/')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(os.path.exists(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME))
+
+    def test_upload_session__chunk_length_mismatch(self):
+        # arrange
+        session_id = self._create_session()
+
+        # action
+        response = self.client.put(
+            f'/file/_uploads/{session_id}/',
+            data=self.TEST_FILE_CONTENT[:4],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-7/{len(self.TEST_FILE_CONTENT)}',
+        )
+        received_ranges = json.loads(self.client.get(f'/file/_uploads/{session_id}/').content)['receivedRanges']
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(received_ranges, [[0, 3]])
+
+    def test_upload_session__commit_while_chunk_written(self):
+        # arrange
+        session_id = self._create_session()
+        self._put_chunk(session_id, 0, 15)
+
+        # action
+        with open(Path(self.session_dir) / session_id / 'write.lock', 'a') as lock_fp:
+            fcntl.flock(lock_fp, fcntl.LOCK_SH)
+            response = self.client.post(f'/file/_uploads/{session_id}/commit/')
+            fcntl.flock(lock_fp, fcntl.LOCK_UN)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(os.path.exists(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME))
+
+    def test_upload_session__chunk_and_commit_after_commit(self):
+        # arrange
+        session_id = self._create_session()
+        self._put_chunk(session_id, 0, 15)
+        session = UploadSession(session_id)
+        (Path(self.session_dir) / session_id / 'committed').touch()
+
+        # action
+        with self.assertRaises(FileNotFoundError):
+            session.write_chunk(0, [b'x'])
+        with self.assertRaises(FileNotFoundError):
+            session.commit()
+        os.remove(Path(self.session_dir) / session_id / 'committed')
+        response = self.client.post(f'/file/_uploads/{session_id}/commit/')
+        late_chunk_response = self._put_chunk(session_id, 0, 15)
+        late_commit_response = self.client.post(f'/file/_uploads/{session_id}/commit/')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(late_chunk_response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(late_commit_response.status_code, status.HTTP_404_NOT_FOUND)
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME, 'rb') as fp:
+            self.assertEqual(fp.read(), self.TEST_FILE_CONTENT)
+
+    def test_upload_session__not_exist(self):
+        # action
+        response = self.client.get(f'/file/_uploads/{"0" * 32}/')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_upload_session__path_outside_root(self):
+        # action
+        response = self.client.post(
+            '/file/_uploads/',
+            data=json.dumps({'path': f'{self.TEST_DIR}/../../../../../{self.TEST_FILE_NAME}', 'size': 1}),
+            content_type='application/json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(os.listdir(self.session_dir), [])
+
+    def test_collect_stale_sessions(self):
+        # arrange
+        session_id = self._create_session()
+        stale_time = time.time() - 3600
+        os.utime(session_root() / session_id / 'ranges.json', (stale_time, stale_time))
+
+        # action
+        removed = collect_stale_sessions(timeout=60)
+
+        # assert
+        self.assertEqual(removed, 1)
+        self.assertEqual(os.listdir(self.session_dir), [])
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        shutil.rmtree(self.session_dir)
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
@@ -70,6 +70,33 @@ class TestFileViewUtil(TestCase):
         self.assertEqual(len(file_list), expect_file_len)
         self.assertEqual([file.name for file in file_list], expect_file_name_list)
 
+    def test_filter_file_under_path__skip_directory(self):
+        # arrange
+        dir_name = 'test_name_dir'
+        os.mkdir(self.PROJECT_ROOT_PATH / self.TEST_DIR / dir_name)
+
+        # action
+        file_list = filter_file_under_path(path=self.PROJECT_ROOT_PATH / self.TEST_DIR, filter_name='test_name')
+        os.rmdir(self.PROJECT_ROOT_PATH / self.TEST_DIR / dir_name)
+
+        # assert
+        self.assertEqual(set([file.name for file in file_list]), set(self.TEST_SORT_NAME_FILE_NAME_LIST))
+
+    def test_filter_file_under_path__without_stat(self):
+        # arrange
+        filter_name = 'test_size'
+
+        # action
+        file_list = filter_file_under_path(
+            path=self.PROJECT_ROOT_PATH / self.TEST_DIR, filter_name=filter_name, with_stat=False
+        )
+
+        # assert
+        self.assertEqual(
+            set([file.name for file in file_list]), set(self.TEST_SORT_SIZE_FILE_NAME_CONTENT_MAP.keys())
+        )
+        self.assertTrue(all(file.size is None and file.last_modify_time is None for file in file_list))
+
     def _prepare_sort_name_file_list(self) -> list[File]:
         return [
             File(
@@ -0,0 +1,232 @@
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase as UnitTestCase, mock
+
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from file.watch import DirectoryWatch, WatchRegistry, diff_snapshot, scan_snapshot, watch_registry
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestDirectoryWatch(UnitTestCase):
+    TEST_DIR = 'hpsite/file/tests/test_watch_unit_dir'
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_watch_a.log', 'w') as fp:
+            fp.write('test')
+
+    def test_diff_snapshot(self):
+        # action
+        changes = diff_snapshot({'a': (1, 1), 'b': (1, 1), 'c': (1, 1)}, {'a': (1, 1), 'b': (2, 2), 'd': (1, 1)})
+
+        # assert
+        self.assertEqual(changes, [('modified', 'b'), ('deleted', 'c'), ('created', 'd')])
+
+    def test_scan_snapshot__upload_temp_file_hidden(self):
+        # arrange
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / '.test_watch_b.log.ab_d12z9.upload', 'w') as fp:
+            fp.write('test')
+
+        # action
+        snapshot = scan_snapshot(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        # assert
+        self.assertEqual(set(snapshot), {'test_watch_a.log'})
+
+    def test_poll__out_of_band_changes(self):
+        # arrange
+        watch = DirectoryWatch(PROJECT_ROOT_PATH / self.TEST_DIR, buffer_size=16)
+        cursor = watch.cursor
+
+        # action
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_watch_b.log', 'w') as fp:
+            fp.write('test')
+        os.remove(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_watch_a.log')
+        watch.poll()
+        events, _ = watch.events_after(cursor)
+
+        # assert
+        self.assertEqual(
+            [(event_type, name) for _, event_type, name in events],
+            [('deleted', 'test_watch_a.log'), ('created', 'test_watch_b.log')],
+        )
+
+    def test_record__not_repeated_by_poll(self):
+        # arrange
+        watch = DirectoryWatch(PROJECT_ROOT_PATH / self.TEST_DIR, buffer_size=16)
+        cursor = watch.cursor
+
+        # action
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_watch_a.log', 'a') as fp:
+            fp.write(', test')
+        watch.record('test_watch_a.log')
+        watch.poll()
+        events, _ = watch.events_after(cursor)
+
+        # assert
+        self.assertEqual([(event_type, name) for _, event_type, name in events], [('modified', 'test_watch_a.log')])
+
+    def test_events_after__expired_cursor(self):
+        # arrange
+        watch = DirectoryWatch(PROJECT_ROOT_PATH / self.TEST_DIR, buffer_size=2)
+        cursor = watch.cursor
+
+        # action
+        for i in range(3):
+            with open(PROJECT_ROOT_PATH / self.TEST_DIR / f'test_watch_{i}.log', 'w') as fp:
+                fp.write('test')
+            watch.record(f'test_watch_{i}.log')
+        events, current = watch.events_after(cursor)
+        foreign_events, _ = watch.events_after('other.0')
+
+        # assert
+        self.assertIsNone(events)
+        self.assertIsNone(foreign_events)
+        self.assertEqual(watch.events_after(current), ([], current))
+
+    def test_registry__one_watch_per_path(self):
+        # arrange
+        registry = WatchRegistry()
+
+        # action
+        watch = registry.subscribe(PROJECT_ROOT_PATH / self.TEST_DIR)
+        same_watch = registry.subscribe(PROJECT_ROOT_PATH / self.TEST_DIR / 'sub' / '..')
+
+        # assert
+        self.assertIs(watch, same_watch)
+        self.assertEqual(watch.subscribers, 2)
+        registry.unsubscribe(watch)
+        registry.unsubscribe(same_watch)
+        registry.clear()
+
+    def test_registry__scan_outside_lock(self):
+        # arrange
+        registry = WatchRegistry()
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR / 'sub')
+        watch = registry.subscribe(PROJECT_ROOT_PATH / self.TEST_DIR)
+        scanning, release = threading.Event(), threading.Event()
+
+        def slow_scan_snapshot(path):
+            if path.name == 'sub':
+                scanning.set()
+                release.wait()
+            return scan_snapshot(path)
+
+        # action
+        with mock.patch('file.watch.scan_snapshot', slow_scan_snapshot):
+            thread = threading.Thread(target=registry.subscribe, args=(PROJECT_ROOT_PATH / self.TEST_DIR / 'sub',))
+            thread.start()
+            scanning.wait()
+            started = time.monotonic()
+            registry.unsubscribe(watch)
+            same_watch = registry.subscribe(PROJECT_ROOT_PATH / self.TEST_DIR)
+            elapsed = time.monotonic() - started
+            release.set()
+            thread.join()
+
+        # assert
+        self.assertLess(elapsed, 0.05)
+        self.assertIs(same_watch, watch)
+        registry.clear()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+
+class TestFileApiWatch(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_watch_dir'
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_watch_a.log', 'w') as fp:
+            fp.write('test')
+
+    def _watch(self, **params) -> dict:
+        response = self.client.get(f'/file/_watch/{self.TEST_DIR}/', data=params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)
+
+    def test_watch__long_poll__api_write(self):
+        # arrange
+        cursor = self._watch()['cursor']
+
+        # action
+        self.client.post(f'/file/{self.TEST_DIR}/test_watch_b.log/', data={'file': 'test'})
+        self.client.delete(f'/file/{self.TEST_DIR}/test_watch_a.log/')
+        result = self._watch(cursor=cursor, timeout=0)
+        idle_result = self._watch(cursor=result['cursor'], timeout=0)
+
+        # assert
+        self.assertEqual(
+            result['events'],
+            [{'type': 'created', 'name': 'test_watch_b.log'}, {'type': 'deleted', 'name': 'test_watch_a.log'}],
+        )
+        self.assertEqual(idle_result, {'cursor': result['cursor'], 'events': []})
+
+    def test_watch__long_poll__out_of_band(self):
+        # arrange
+        cursor = self._watch()['cursor']
+
+        # action
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_watch_a.log', 'a') as fp:
+            fp.write(', test')
+        watch_registry.poll_all()
+        result = self._watch(cursor=cursor, timeout=0)
+
+        # assert
+        self.assertEqual(result['events'], [{'type': 'modified', 'name': 'test_watch_a.log'}])
+
+    def test_watch__long_poll__reset(self):
+        # action
+        result = self._watch(cursor='expired.1', timeout=0)
+
+        # assert
+        self.assertTrue(result['reset'])
+
+    def test_watch__not_available(self):
+        # action
+        not_dir_response = self.client.get(f'/file/_watch/{self.TEST_DIR}/test_watch_a.log/')
+        timeout_response = self.client.get(f'/file/_watch/{self.TEST_DIR}/', data={'timeout': 3600})
+
+        # assert
+        self.assertEqual(not_dir_response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(timeout_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(FILE_WATCH_HEARTBEAT=0.01, FILE_WATCH_STREAM_MAX_SECONDS=5)
+    def test_watch__event_stream(self):
+        # arrange
+        response = self.client.get(f'/file/_watch/{self.TEST_DIR}/', HTTP_ACCEPT='text/event-stream')
+        stream = iter(response.streaming_content)
+        ready = next(stream).decode()
+
+        # action
+        self.client.post(f'/file/{self.TEST_DIR}/test_watch_b.log/', data={'file': 'test'})
+        chunk = next(stream)
+        response.close()
+
+        # assert
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn('event: ready', ready)
+        self.assertIn('event: created', chunk.decode())
+        self.assertIn('data: {"name":"test_watch_b.log"}', chunk.decode())
+
+    def test_watch__event_stream__not_iterated(self):
+        # action
+        response = self.client.head(f'/file/_watch/{self.TEST_DIR}/', HTTP_ACCEPT='text/event-stream')
+        watch = watch_registry.subscribe(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(watch.subscribers, 1)
+        watch_registry.unsubscribe(watch)
+
+    def tearDown(self) -> None:
+        watch_registry.clear()
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
@@ -0,0 +1,128 @@
+import io
+import os
+import shutil
+from pathlib import Path
+from unittest import TestCase as UnitTestCase
+
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework import status
+
+from file.download import serve_file
+from file.mapped import MappedFile, open_download
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent.parent
+
+
+class TestMappedFile(UnitTestCase):
+    TEST_DIR = 'hpsite/file/tests/test_zero_copy_unit_dir'
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_zero_copy.bin', 'wb') as fp:
+            fp.write(bytes(range(256)) * 4)
+
+    def test_read_and_seek(self):
+        # arrange
+        fp = open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_zero_copy.bin', 'rb')
+        mapped_file = MappedFile(fp, 1024)
+
+        # action
+        first = mapped_file.read(10)
+        mapped_file.seek(-4, io.SEEK_END)
+        last = mapped_file.read(100)
+        end = mapped_file.read(1)
+        mapped_file.seek(250)
+        rest = mapped_file.read()
+        mapped_file.close()
+
+        # assert
+        self.assertEqual(first, bytes(range(10)))
+        self.assertEqual(last, bytes(range(252, 256)))
+        self.assertEqual(end, b'')
+        self.assertEqual(rest, (bytes(range(256)) * 4)[250:])
+        self.assertTrue(fp.closed)
+
+    def test_seek__moves_descriptor(self):
+        # arrange
+        mapped_file = MappedFile(open(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_zero_copy.bin', 'rb'), 1024)
+
+        # action
+        mapped_file.seek(100)
+
+        # assert
+        self.assertEqual(os.lseek(mapped_file.fileno(), 0, os.SEEK_CUR), 100)
+        mapped_file.close()
+
+    @override_settings(FILE_DOWNLOAD_MMAP_MIN_SIZE=2048)
+    def test_open_download__small_file(self):
+        # action
+        with open_download(PROJECT_ROOT_PATH / self.TEST_DIR / 'test_zero_copy.bin') as fp:
+            # assert
+            self.assertNotIsInstance(fp, MappedFile)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
+
+
+class TestFileApiZeroCopy(TestCase):
+    TEST_DIR = 'hpsite/file/tests/test_zero_copy_dir'
+    TEST_FILE_NAME = 'test_zero_copy.bin'
+    TEST_FILE_CONTENT = bytes(range(256)) * 2048
+
+    def setUp(self) -> None:
+        os.mkdir(PROJECT_ROOT_PATH / self.TEST_DIR)
+        with open(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME, 'wb') as fp:
+            fp.write(self.TEST_FILE_CONTENT)
+
+    @property
+    def url(self) -> str:
+        return f'/file/{self.TEST_DIR}/{self.TEST_FILE_NAME}/'
+
+    @override_settings(FILE_DOWNLOAD_MMAP_MIN_SIZE=0, FILE_DOWNLOAD_CHUNK_SIZE=64 * 1024)
+    def test_file__GET__is_file__mapped(self):
+        # action
+        response = self.client.get(self.url)
+        range_response = self.client.get(self.url, HTTP_RANGE='bytes=1000-1999')
+        # the test client replaces the file of a FileResponse with its own iterator
+        full_file_path = PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME
+        file_response = serve_file(RequestFactory().get(self.url), full_file_path, os.stat(full_file_path))
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(file_response.file_to_stream, MappedFile)
+        self.assertEqual(file_response.block_size, 64 * 1024)
+        file_response.close()
+        self.assertEqual(b''.join(response.streaming_content), self.TEST_FILE_CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(self.TEST_FILE_CONTENT)))
+        self.assertEqual(range_response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(range_response.streaming_content), self.TEST_FILE_CONTENT[1000:2000])
+
+    @override_settings(FILE_DOWNLOAD_OFFLOAD='x-accel-redirect', FILE_DOWNLOAD_ACCEL_REDIRECT_LOCATION='/_protected/')
+    def test_file__GET__is_file__x_accel_redirect(self):
+        # action
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'], f'/_protected/{self.TEST_DIR}/{self.TEST_FILE_NAME}')
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertIn('ETag', response)
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    @override_settings(FILE_DOWNLOAD_OFFLOAD='x-sendfile')
+    def test_file__GET__is_file__x_sendfile(self):
+        # arrange
+        etag = self.client.head(self.url)['ETag']
+
+        # action
+        response = self.client.get(self.url)
+        not_modified_response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        # assert
+        self.assertEqual(response['X-Sendfile'], str(PROJECT_ROOT_PATH / self.TEST_DIR / self.TEST_FILE_NAME))
+        self.assertEqual(not_modified_response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(not_modified_response.has_header('X-Sendfile'))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROJECT_ROOT_PATH / self.TEST_DIR)
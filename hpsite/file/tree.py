@@ -0,0 +1,148 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator
+
+from django.conf import settings
+
+from .define import SortScope, check_parameter_follow_defined
+from .filters import FileFilter, compile_glob_pattern
+from .listing import File, ListingQuery, need_stat_for_order, sort_file_list
+from .upload import is_upload_temp_name
+
+_tree_executor = None
+
+
+def tree_executor() -> ThreadPoolExecutor:
+    global _tree_executor
+    if _tree_executor is None:
+        _tree_executor = ThreadPoolExecutor(max_workers=settings.FILE_TREE_WORKERS, thread_name_prefix='file-tree')
+    return _tree_executor
+
+
+class TreeQuery:
+    """
+    Recursive listing parameters: `depth` (levels of files, 1 is the directory itself),
+    `include`/`exclude` glob patterns on the relative path and `sortScope`.
+    Raise ValueError with the client-facing message on an unavailable parameter.
+    """
+
+    def __init__(self, query, listing_query: ListingQuery):
+        depth = query.get('depth', '')
+        if not depth.isdigit() or not 1 <= int(depth) <= settings.FILE_TREE_MAX_DEPTH:
+            raise ValueError(f'depth: {depth} is not available')
+        self.depth = int(depth)
+
+        if listing_query.limit is not None:
+            raise ValueError('limit is not available with depth')
+
+        self.sort_scope = query.get('sortScope') or SortScope.DIRECTORY.value
+        if not check_parameter_follow_defined(self.sort_scope, SortScope):
+            raise ValueError(f'sortScope: {self.sort_scope} is not available')
+
+        self.include = query.getlist('include')
+        self.exclude = query.getlist('exclude')
+        self._include_matches = [compile_glob_pattern(pattern) for pattern in self.include]
+        self._exclude_matches = [compile_glob_pattern(pattern) for pattern in self.exclude]
+
+    def is_excluded(self, relative_path: str) -> bool:
+        return any(match(relative_path) for match in self._exclude_matches)
+
+    def is_included(self, relative_path: str) -> bool:
+        return not self._include_matches or any(match(relative_path) for match in self._include_matches)
+
+
+def _scan_tree_directory(
+        root: Path,
+        relative_dir: str,
+        file_filter: FileFilter,
+        with_stat: bool,
+        tree_query: TreeQuery,
+) -> tuple[list[File], list[str]]:
+    prefix = f'{relative_dir}/' if relative_dir else ''
+    name_match, stat_match = file_filter.name_match, file_filter.stat_match
+    file_list = []
+    sub_dirs = []
+
+    with os.scandir(root / relative_dir) as entries:
+        for entry in entries:
+            if is_upload_temp_name(entry.name):
+                continue
+            relative_path = prefix + entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not tree_query.is_excluded(relative_path):
+                        sub_dirs.append(relative_path)
+                    continue
+
+                if not entry.is_file():
+                    continue
+                if name_match is not None and not name_match(entry.name):
+                    continue
+                if tree_query.is_excluded(relative_path) or not tree_query.is_included(relative_path):
+                    continue
+                if stat_match is not None and not stat_match(entry.stat()):
+                    continue
+
+                if with_stat:
+                    stat_result = entry.stat()
+                    file_list.append(File(stat_result.st_mtime, stat_result.st_size, relative_path))
+                else:
+                    file_list.append(File(None, None, relative_path))
+            except FileNotFoundError:
+                continue
+
+    return file_list, sub_dirs
+
+
+def iter_tree_file_list(root: Path, listing_query: ListingQuery, tree_query: TreeQuery) -> Iterator[list[File]]:
+    """
+    Walk the tree under `root` on the shared tree pool and yield each directory's files as soon as
+    that directory is scanned (sorted per directory). Symlinked directories are not followed.
+    """
+    with_stat = need_stat_for_order(listing_query.order_by)
+    executor = tree_executor()
+    max_in_flight = settings.FILE_TREE_WORKERS * 2
+
+    backlog = deque([('', 1)])
+    in_flight = {}
+    try:
+        while backlog or in_flight:
+            while backlog and len(in_flight) < max_in_flight:
+                relative_dir, level = backlog.popleft()
+                future = executor.submit(
+                    _scan_tree_directory, root, relative_dir, listing_query.file_filter, with_stat, tree_query
+                )
+                in_flight[future] = level
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                level = in_flight.pop(future)
+                try:
+                    file_list, sub_dirs = future.result()
+                except (FileNotFoundError, NotADirectoryError, PermissionError):
+                    continue
+
+                if level < tree_query.depth:
+                    backlog.extend((sub_dir, level + 1) for sub_dir in sub_dirs)
+
+                if file_list:
+                    sort_file_list(file_list, listing_query.order_by, listing_query.order_by_direction)
+                    yield file_list
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def iter_tree_file_names(root: Path, listing_query: ListingQuery, tree_query: TreeQuery) -> Iterator[str]:
+    file_lists = iter_tree_file_list(root, listing_query, tree_query)
+
+    if tree_query.sort_scope == SortScope.GLOBAL.value:
+        all_file_list = [file for file_list in file_lists for file in file_list]
+        sort_file_list(all_file_list, listing_query.order_by, listing_query.order_by_direction)
+        file_lists = [all_file_list]
+
+    for file_list in file_lists:
+        for file in file_list:
+            yield file.name
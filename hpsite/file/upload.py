@@ -0,0 +1,146 @@
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+
+FORM_MEDIA_TYPES = ('multipart/form-data', 'application/x-www-form-urlencoded')
+JSON_MEDIA_TYPE = 'application/json'
+
+UPLOAD_TEMP_SUFFIX = '.upload'
+# `.{name}.XXXXXXXX.upload` of `write_file_atomic`, XXXXXXXX being the random part of `tempfile.mkstemp`
+_UPLOAD_TEMP_NAME_RE = re.compile(r'\..+\.[a-z0-9_]{8}\.upload', re.ASCII | re.DOTALL)
+
+# read once at import time, `os.umask` can only be queried by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def iter_stream_chunks(stream, chunk_size: int) -> Iterator[bytes]:
+    if stream is None:
+        return
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_request_file_chunks(request, field: str = 'file') -> Iterator[bytes]:
+    """
+    Yield the uploaded file content of a DRF request in bounded chunks.
+
+    - multipart/form-data: `field` as an uploaded file (spooled by Django's upload handlers) or as a form value
+    - application/x-www-form-urlencoded and application/json: `field` as a text value
+    - any other content type: the raw request body, read incrementally and never held in memory at once
+    """
+    chunk_size = settings.FILE_STREAM_UPLOAD_CHUNK_SIZE
+    media_type = request.content_type.split(';')[0].strip().lower()
+
+    # a generator, so nothing is parsed or read before the caller starts writing
+    if media_type in FORM_MEDIA_TYPES:
+        uploaded_file = request.FILES.get(field)
+        if uploaded_file is not None:
+            yield from uploaded_file.chunks(chunk_size)
+        else:
+            yield request.POST.get(field, '').encode()
+
+    elif media_type == JSON_MEDIA_TYPE:
+        yield request.data.get(field, '').encode()
+
+    else:
+        yield from iter_stream_chunks(request.stream, chunk_size)
+
+
+def raw_body_length(request) -> Optional[int]:
+    """
+    Content-Length of a body `iter_request_file_chunks` streams as is, None for form and JSON bodies.
+    Raise ValueError when the header is not a length.
+    """
+    media_type = request.content_type.split(';')[0].strip().lower()
+    content_length = request.META.get('CONTENT_LENGTH')
+    if media_type in FORM_MEDIA_TYPES or media_type == JSON_MEDIA_TYPE or not content_length:
+        return None
+    if not content_length.isdigit():
+        raise ValueError(f'Content-Length: {content_length} is not available')
+    return int(content_length)
+
+
+def is_upload_temp_name(name: str) -> bool:
+    """
+    Whether `name` is the temp file of a write in progress, which listings, archives and watches skip.
+    """
+    return name.endswith(UPLOAD_TEMP_SUFFIX) and _UPLOAD_TEMP_NAME_RE.fullmatch(name) is not None
+
+
+def apply_upload_permissions(path: os.PathLike) -> None:
+    permissions = settings.FILE_UPLOAD_PERMISSIONS
+    os.chmod(path, permissions if permissions is not None else 0o666 & ~_UMASK)
+
+
+def fsync_directory(directory: Path) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_file_atomic(chunks: Iterable[bytes], target: Path, replace: bool = True, fsync: bool = None) -> int:
+    """
+    Write `chunks` to a temp file next to `target` and move it into place atomically,
+    so readers only ever see the old or the complete new content.
+
+    With `replace=False` the move fails with FileExistsError instead of overwriting an existing `target`.
+    Return the number of bytes written.
+    """
+    if fsync is None:
+        fsync = settings.FILE_STREAM_UPLOAD_FSYNC
+
+    fd, temp_path = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.', suffix=UPLOAD_TEMP_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            written = 0
+            for chunk in chunks:
+                fp.write(chunk)
+                written += len(chunk)
+
+            if fsync:
+                fp.flush()
+                os.fsync(fp.fileno())
+
+        apply_upload_permissions(temp_path)
+
+        if replace:
+            os.replace(temp_path, target)
+        else:
+            os.link(temp_path, target)
+            os.unlink(temp_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    if fsync:
+        fsync_directory(target.parent)
+    return written
+
+
+def pwrite_chunks(fd: int, chunks: Iterable[bytes], offset: int, max_length: int = None) -> int:
+    """
+    Write `chunks` at `offset` of `fd`, leaving every other byte of the file untouched. Raise ValueError
+    instead of writing more than `max_length` bytes. Return the number of bytes written.
+    """
+    position = offset
+    for chunk in chunks:
+        if max_length is not None and position - offset + len(chunk) > max_length:
+            raise ValueError(f'received more than {max_length} bytes')
+        view = memoryview(chunk)
+        while view:
+            written = os.pwrite(fd, view, position)
+            view = view[written:]
+            position += written
+    return position - offset
@@ -0,0 +1,240 @@
+import errno
+import fcntl
+import json
+import os
+import re
+import secrets
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable
+
+from django.conf import settings
+
+from .ranges import merge_ranges
+from .upload import apply_upload_permissions, fsync_directory, iter_stream_chunks, write_file_atomic
+
+SESSION_ID_RE = re.compile(r'[0-9a-f]{32}')
+CONTENT_RANGE_RE = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)', re.ASCII)
+
+
+def session_root() -> Path:
+    return Path(settings.FILE_UPLOAD_SESSION_DIR)
+
+
+def parse_content_range(header: str) -> tuple[int, int]:
+    """
+    Parse `Content-Range: bytes start-end/total` into an inclusive (start, end) pair.
+    """
+    content_range_match = CONTENT_RANGE_RE.fullmatch(header.strip())
+    if content_range_match is None:
+        raise ValueError(f'Content-Range: {header} is not available')
+
+    start, end = int(content_range_match.group(1)), int(content_range_match.group(2))
+    if end < start:
+        raise ValueError(f'Content-Range: {header} is not available')
+    return start, end
+
+
+class UploadSession:
+    """
+    A resumable upload staged under FILE_UPLOAD_SESSION_DIR/<session id>/:
+
+    - `meta.json`: target path and total size
+    - `data`: sparse file the chunks are written into at their offsets
+    - `ranges.json`: received inclusive byte ranges, updated under an exclusive `flock` on `lock`
+    - `write.lock`: `flock`ed shared by every chunk write and exclusive by `commit`
+    - `committed`: marker left by `commit` until the session directory is removed
+
+    Chunks of one session may be written concurrently, from any thread or worker process; they never
+    overlap a commit, and a chunk of a committed session is refused like one of a removed session.
+    """
+
+    def __init__(self, session_id: str):
+        if not SESSION_ID_RE.fullmatch(session_id):
+            raise FileNotFoundError(f'upload session {session_id} not exist')
+
+        self.session_id = session_id
+        self.path = session_root() / session_id
+        try:
+            with open(self.path / 'meta.json') as fp:
+                meta = json.load(fp)
+        except FileNotFoundError:
+            raise FileNotFoundError(f'upload session {session_id} not exist')
+
+        self.target = Path(meta['target'])
+        self.size = meta['size']
+        self.overwrite = meta['overwrite']
+
+    @classmethod
+    def create(cls, target: Path, size: int, overwrite: bool = False) -> 'UploadSession':
+        collect_stale_sessions()
+
+        session_id = secrets.token_hex(16)
+        path = session_root() / session_id
+        path.mkdir(parents=True)
+
+        with open(path / 'data', 'wb') as fp:
+            fp.truncate(size)
+        with open(path / 'ranges.json', 'w') as fp:
+            json.dump([], fp)
+        with open(path / 'meta.json', 'w') as fp:
+            json.dump({'target': str(target), 'size': size, 'overwrite': overwrite}, fp)
+
+        return cls(session_id)
+
+    def _not_exist(self) -> FileNotFoundError:
+        return FileNotFoundError(f'upload session {self.session_id} not exist')
+
+    @contextmanager
+    def _locked(self, name: str = 'lock', operation: int = fcntl.LOCK_EX):
+        try:
+            lock_fp = open(self.path / name, 'a')
+        except FileNotFoundError:
+            # removed by a commit or an abort
+            raise self._not_exist()
+        with lock_fp:
+            fcntl.flock(lock_fp, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_fp, fcntl.LOCK_UN)
+
+    def _is_committed(self) -> bool:
+        return (self.path / 'committed').exists() or not (self.path / 'data').exists()
+
+    def _read_ranges(self) -> list[tuple[int, int]]:
+        with open(self.path / 'ranges.json') as fp:
+            return [tuple(received_range) for received_range in json.load(fp)]
+
+    def received_ranges(self) -> list[tuple[int, int]]:
+        with self._locked():
+            return self._read_ranges()
+
+    def write_chunk(
+            self,
+            offset: int,
+            chunks: Iterable[bytes],
+            expect_length: int = None,
+    ) -> list[tuple[int, int]]:
+        """
+        Write `chunks` at `offset` and record the bytes that reached the file, even when the body
+        is cut short, so the client can resume right after them. Return the received ranges.
+        Raise FileNotFoundError once the session is committed or removed.
+        """
+        if offset > self.size:
+            raise ValueError(f'offset {offset} is beyond size {self.size}')
+
+        with self._locked('write.lock', fcntl.LOCK_SH):
+            if self._is_committed():
+                raise self._not_exist()
+
+            error = None
+            position = offset
+            fd = os.open(self.path / 'data', os.O_WRONLY)
+            try:
+                for chunk in chunks:
+                    if position + len(chunk) > self.size:
+                        raise ValueError(f'chunk at offset {offset} is beyond size {self.size}')
+                    view = memoryview(chunk)
+                    while view:
+                        written = os.pwrite(fd, view, position)
+                        view = view[written:]
+                        position += written
+                if settings.FILE_STREAM_UPLOAD_FSYNC:
+                    os.fsync(fd)
+            except Exception as e:
+                error = e
+            finally:
+                os.close(fd)
+
+            received_ranges = self._record_range(offset, position)
+
+        if error is not None:
+            raise error
+        if expect_length is not None and position - offset != expect_length:
+            raise ValueError(f'received {position - offset} bytes, expect {expect_length}')
+        return received_ranges
+
+    def _record_range(self, offset: int, position: int) -> list[tuple[int, int]]:
+        with self._locked():
+            received_ranges = self._read_ranges()
+            if position > offset:
+                received_ranges = merge_ranges(received_ranges + [(offset, position - 1)])
+                temp_path = self.path / 'ranges.json.tmp'
+                with open(temp_path, 'w') as fp:
+                    json.dump(received_ranges, fp)
+                os.replace(temp_path, self.path / 'ranges.json')
+            return received_ranges
+
+    def is_complete(self) -> bool:
+        return self.size == 0 or self.received_ranges() == [(0, self.size - 1)]
+
+    def commit(self) -> None:
+        """
+        Move the assembled file to its target and drop the session. Raise BlockingIOError while a
+        chunk is being written, FileNotFoundError when the session was committed or removed meanwhile.
+        """
+        with self._locked('write.lock', fcntl.LOCK_EX | fcntl.LOCK_NB):
+            if self._is_committed():
+                raise self._not_exist()
+            if not self.is_complete():
+                raise ValueError(f'upload session {self.session_id} is incomplete')
+
+            data_path = self.path / 'data'
+            apply_upload_permissions(data_path)
+            try:
+                if self.overwrite:
+                    os.replace(data_path, self.target)
+                else:
+                    os.link(data_path, self.target)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # session dir on another filesystem, copy next to the target instead
+                with open(data_path, 'rb') as fp:
+                    chunks = iter_stream_chunks(fp, settings.FILE_STREAM_UPLOAD_CHUNK_SIZE)
+                    write_file_atomic(chunks, self.target, replace=self.overwrite)
+            (self.path / 'committed').touch()
+
+        if settings.FILE_STREAM_UPLOAD_FSYNC:
+            fsync_directory(self.target.parent)
+        self.abort()
+
+    def abort(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def to_dict(self) -> dict:
+        return {
+            'sessionId': self.session_id,
+            'size': self.size,
+            'receivedRanges': self.received_ranges(),
+        }
+
+
+def collect_stale_sessions(timeout: float = None) -> int:
+    """
+    Remove sessions that have not received a chunk for `timeout` seconds (FILE_UPLOAD_SESSION_TIMEOUT).
+    """
+    if timeout is None:
+        timeout = settings.FILE_UPLOAD_SESSION_TIMEOUT
+
+    root = session_root()
+    if not root.is_dir():
+        return 0
+
+    deadline = time.time() - timeout
+    removed = 0
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if not SESSION_ID_RE.fullmatch(entry.name) or not entry.is_dir():
+                continue
+            try:
+                last_active = os.stat(Path(entry.path) / 'ranges.json').st_mtime
+            except FileNotFoundError:
+                last_active = entry.stat().st_mtime
+            if last_active < deadline:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+    return removed
@@ -4,5 +4,12 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('_batch/', views.BatchView.as_view()),
+    path('_cache/', views.cache_stats, name='cache_stats'),
+    path('_metrics/', views.metrics_text, name='metrics'),
+    path('_uploads/', views.UploadSessionCreateView.as_view()),
+    path('_uploads/<str:session_id>/', views.UploadSessionView.as_view()),
+    path('_uploads/<str:session_id>/commit/', views.UploadSessionCommitView.as_view()),
+    re_path(r'^_watch/(?P<file_path>.+)/$', views.WatchView.as_view()),
     re_path(r'^(?P<file_path>.+)/$', views.FileView.as_view()),
 ]
\ No newline at end of file
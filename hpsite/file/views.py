@@ -1,15 +1,56 @@
 import os
-import re
+import stat
 from pathlib import Path
+from typing import Optional
 
-from django.db import transaction
-from django.http import FileResponse
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .define import FileAttr, OrderDirection, check_parameter_follow_defined
+from .archive import archive_response, parse_archive_format
+from .batch import run_batch
+from .cache import directory_validator, file_content_cache, listing_cache
+from .conditional import listing_etag
+from .delta import delta_store
+from .download import head_file, serve_file
+from .index import get_indexed_directory, query_index
+from .listing import (
+    File,
+    ListingQuery,
+    filter_file_under_path,
+    iter_file_key_under_path,
+    listing_entries,
+    need_stat_for_order,
+    sort_file_list,
+    stat_listing_entries,
+)
+from .locks import path_locks
+from .metrics import COUNT_BUCKETS, StageTimingMixin, metrics
+from .operations import WriteQuery, after_write, create_file, delete_file, path_under_root, update_file
+from .pagination import paginated_listing, select_top_k
+from .renderers import (
+    JSON_CONTENT_TYPE,
+    LISTING_RENDERER_CLASSES,
+    WATCH_RENDERER_CLASSES,
+    EventStreamRenderer,
+    ListingContentNegotiation,
+    listing_response,
+    listing_stream_response,
+)
+from .tree import TreeQuery, iter_tree_file_names
+from .upload import iter_request_file_chunks, iter_stream_chunks, raw_body_length
+from .upload_session import UploadSession, parse_content_range
+from .watch import (
+    EVENT_STREAM_CONTENT_TYPE,
+    iter_event_stream,
+    parse_watch_timeout,
+    watch_payload,
+    watch_registry,
+)
 
 
 @api_view(['GET'])
@@ -18,108 +59,407 @@ def index(request):
     return Response('Hello, World. This is simple Response for index!', status=status.HTTP_200_OK)
 
 
-class File:
-    def __init__(self, last_modify_time: float, size: int, name: str):
-        self.last_modify_time = last_modify_time
-        self.size = size
-        self.name = name
+@api_view(['GET'])
+def metrics_text(request):
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
-def filter_file_under_path(path: Path, filter_name: str = '') -> list[File]:
-    return [
-        File(
-            last_modify_time=os.path.getmtime(path / file_name),
-            size=os.path.getsize(path / file_name),
-            name=file_name,
-        )
-        for file_name in os.listdir(path)
-        if re.compile(rf'{filter_name}').search(file_name) and os.path.isfile(path / file_name)
-    ]
-
-
-def sort_file_list(
-        file_list: list[File],
-        sort_by: str = FileAttr.NAME.value,
-        sort_dir: str = OrderDirection.ASCENDING.value
-) -> None:
-    file_list.sort(
-        key=lambda file: {
-            FileAttr.LAST_MODIFY.value: file.last_modify_time,
-            FileAttr.SIZE.value: file.size,
-            FileAttr.NAME.value: file.name,
-        }[sort_by],
-        reverse=(sort_dir == OrderDirection.DESCENDING.value),
+@api_view(['GET'])
+def cache_stats(request):
+    return Response(
+        {'listing': listing_cache.stats(), 'content': file_content_cache.stats(), 'delta': delta_store.stats()},
+        status=status.HTTP_200_OK
     )
 
 
-class FileView(APIView):
+def _stat(full_file_path: Path) -> Optional[os.stat_result]:
+    try:
+        return os.stat(full_file_path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+class FileView(StageTimingMixin, APIView):
     PROJECT_ROOT_PATH = Path(__file__).parent.parent.parent
+    renderer_classes = LISTING_RENDERER_CLASSES
+    content_negotiation_class = ListingContentNegotiation
 
-    @transaction.atomic
     def get(self, reqeust, file_path):
         full_file_path = self.PROJECT_ROOT_PATH / file_path
 
-        if full_file_path.is_dir():
-            order_by = reqeust.GET.get('orderBy') or FileAttr.NAME.value
-            if not check_parameter_follow_defined(order_by, FileAttr):
-                return Response(f'orderBy: {order_by} is not available', status.HTTP_400_BAD_REQUEST)
+        # one `stat` picks the branch; a file is validated, opened and checked against it (`serve_file`) under
+        # the lock it was taken under, as in `AsyncFileApplication.handle_file`; the lock is not held while
+        # its body is sent
+        with path_locks.reading(full_file_path):
+            stat_result = _stat(full_file_path)
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                with self.timer.stage('file'):
+                    return serve_file(reqeust, full_file_path, stat_result)
 
-            order_by_direction = reqeust.GET.get('orderByDirection') or OrderDirection.ASCENDING.value
-            if not check_parameter_follow_defined(order_by_direction, OrderDirection):
-                return Response(f'orderByDirection: {order_by_direction} is not available', status.HTTP_400_BAD_REQUEST)
+        if stat_result is not None and stat.S_ISDIR(stat_result.st_mode):
+            try:
+                query = ListingQuery(reqeust.GET)
+            except ValueError as e:
+                return Response(str(e), status.HTTP_400_BAD_REQUEST)
 
-            filter_by_name = reqeust.GET.get('filterByName', '')
+            try:
+                archive_format = parse_archive_format(reqeust.GET, query)
+            except ValueError as e:
+                return Response(str(e), status.HTTP_400_BAD_REQUEST)
 
-            file_list = filter_file_under_path(full_file_path, filter_by_name)
-            sort_file_list(file_list, order_by, order_by_direction)
+            if query.fields and (archive_format is not None or 'depth' in reqeust.GET or 'since' in reqeust.GET):
+                return Response('fields is not available with depth, archive or since', status.HTTP_400_BAD_REQUEST)
 
-            return Response(
-                {
-                    'isDirectory': True,
-                    'files': [file.name for file in file_list],
-                },
-                status=status.HTTP_200_OK
-            )
-        elif full_file_path.is_file():
-            return FileResponse(open(full_file_path, 'rb'))
+            if 'since' in reqeust.GET:
+                file_filter = query.file_filter
+                if (
+                        query.limit is not None or archive_format is not None or 'depth' in reqeust.GET
+                        or file_filter.name_match is not None or file_filter.stat_match is not None
+                ):
+                    return Response(
+                        'since is not available with limit, depth, archive or filters', status.HTTP_400_BAD_REQUEST
+                    )
+                with self.timer.stage('delta'):
+                    payload = delta_store.delta_listing(full_file_path, reqeust.GET['since'])
+                return Response(payload, status=status.HTTP_200_OK)
+
+            if 'depth' in reqeust.GET:
+                try:
+                    tree_query = TreeQuery(reqeust.GET, query)
+                except ValueError as e:
+                    return Response(str(e), status.HTTP_400_BAD_REQUEST)
+
+                names = iter_tree_file_names(full_file_path, query, tree_query)
+                if archive_format is not None:
+                    return archive_response(full_file_path, names, archive_format)
+
+                return listing_stream_response(reqeust, names)
+
+            if archive_format is not None:
+                with self.timer.stage('scan'):
+                    file_list = filter_file_under_path(
+                        full_file_path, query.file_filter, with_stat=need_stat_for_order(query.order_by)
+                    )
+                with self.timer.stage('sort'):
+                    sort_file_list(file_list, query.order_by, query.order_by_direction)
+                return archive_response(full_file_path, (file.name for file in file_list), archive_format)
+
+            etag = None
+            if query.directory_validated:
+                with self.timer.stage('validate'):
+                    directory_stat = directory_validator(full_file_path, stat_result)
+                    etag = listing_etag(
+                        directory_stat, listing_cache.generation(full_file_path), reqeust.GET,
+                        reqeust.accepted_renderer.media_type,
+                    )
+                    response = get_conditional_response(reqeust, etag=etag)
+                if response is not None:
+                    response['ETag'] = etag
+                    return response
+
+            indexed_directory = None
+            if settings.FILE_LISTING_USE_INDEX:
+                indexed_directory = get_indexed_directory(full_file_path)
+
+            if query.limit is not None:
+                if indexed_directory is not None:
+                    with self.timer.stage('index'):
+                        page = query_index(indexed_directory, query)
+                else:
+                    # scan, filter and top-k selection run interleaved in one pass
+                    with self.timer.stage('scan'):
+                        keys = iter_file_key_under_path(full_file_path, query.file_filter, query.order_by)
+                        page = select_top_k(keys, query.order_by_direction, query.limit + 1, query.after)
+                metrics.observe('file_api_listing_entries', len(page), COUNT_BUCKETS)
+
+                payload = paginated_listing(page, query)
+                if query.fields:
+                    with self.timer.stage('stat'):
+                        payload['files'] = stat_listing_entries(full_file_path, payload['files'], query.fields)
+                response = Response(payload, status=status.HTTP_200_OK)
+                if etag is not None:
+                    response['ETag'] = etag
+                return response
+
+            entries = None
+            if query.directory_validated:
+                with self.timer.stage('cache'):
+                    entries = listing_cache.get_listing(full_file_path, query.cache_params, directory_stat)
+
+            if entries is None:
+                if indexed_directory is not None and not query.fields:
+                    with self.timer.stage('index'):
+                        entries = [name for _, name in query_index(indexed_directory, query)]
+                else:
+                    # name filters are applied during the scan
+                    with self.timer.stage('scan'):
+                        file_list = filter_file_under_path(full_file_path, query.file_filter, with_stat=query.with_stat)
+                    with self.timer.stage('sort'):
+                        sort_file_list(file_list, query.order_by, query.order_by_direction)
+                        entries = listing_entries(file_list, query.fields)
+                if query.directory_validated:
+                    listing_cache.set_listing(full_file_path, query.cache_params, directory_stat, entries)
+            metrics.observe('file_api_listing_entries', len(entries), COUNT_BUCKETS)
+
+            with self.timer.stage('render'):
+                response = listing_response(reqeust, entries)
+            if response is None:
+                response = Response(
+                    {
+                        'isDirectory': True,
+                        'files': entries,
+                    },
+                    status=status.HTTP_200_OK
+                )
+            if etag is not None:
+                response['ETag'] = etag
+            return response
 
         return Response(f'/{file_path} not exist', status=status.HTTP_404_NOT_FOUND)
 
-    @transaction.atomic
-    def post(self, request, file_path):
+    def head(self, request, file_path):
+        """
+        The headers of the matching GET from `stat` calls only: no directory scan, no file open.
+        A directory answers with its listing ETag, a file with its length, type and validators.
+        """
         full_file_path = self.PROJECT_ROOT_PATH / file_path
 
-        if full_file_path.is_file():
-            return Response(f'/{file_path} already exist.', status=status.HTTP_400_BAD_REQUEST)
+        with path_locks.reading(full_file_path):
+            stat_result = _stat(full_file_path)
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                with self.timer.stage('file'):
+                    return head_file(request, full_file_path, stat_result)
+
+        if stat_result is not None and stat.S_ISDIR(stat_result.st_mode):
+            try:
+                query = ListingQuery(request.GET)
+            except ValueError as e:
+                return Response(str(e), status.HTTP_400_BAD_REQUEST)
+
+            if not query.directory_validated:
+                return HttpResponse(content_type=JSON_CONTENT_TYPE)
+
+            with self.timer.stage('validate'):
+                directory_stat = directory_validator(full_file_path, stat_result)
+                etag = listing_etag(
+                    directory_stat, listing_cache.generation(full_file_path), request.GET,
+                    request.accepted_renderer.media_type,
+                )
+                response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = HttpResponse(content_type=JSON_CONTENT_TYPE)
+            response['ETag'] = etag
+            return response
 
-        file_content = request.POST.get('file', '')
-        with open(full_file_path, 'w') as fp:
-            fp.write(file_content)
+        return Response(f'/{file_path} not exist', status=status.HTTP_404_NOT_FOUND)
+
+    def post(self, request, file_path):
+        full_file_path = self.PROJECT_ROOT_PATH / file_path
 
-        return Response(f'/{file_path} created', status=status.HTTP_201_CREATED)
+        with self.timer.stage('write'):
+            status_code, message = create_file(full_file_path, file_path, iter_request_file_chunks(request))
+        return Response(message, status=status_code)
 
-    @transaction.atomic
     def patch(self, request, file_path):
         full_file_path = self.PROJECT_ROOT_PATH / file_path
 
-        if not full_file_path.is_file():
-            return Response(f'/{file_path} not exist.', status=status.HTTP_400_BAD_REQUEST)
+        try:
+            write_query = WriteQuery(
+                request.GET, request.META.get('HTTP_CONTENT_RANGE'), request.META.get('HTTP_IF_MATCH')
+            )
+            body_length = raw_body_length(request)
+        except ValueError as e:
+            return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
 
-        file_content = request.data.get('file', '')
-        with open(full_file_path, 'w') as fp:
-            fp.write(file_content)
+        if write_query.expect_length is not None and body_length not in (None, write_query.expect_length):
+            # refused before a byte of the file is touched
+            return Response(
+                f'Content-Length: {body_length} does not match Content-Range', status=status.HTTP_400_BAD_REQUEST
+            )
 
-        return Response(f'/{file_path} updated.', status=status.HTTP_200_OK)
+        with self.timer.stage('write'):
+            status_code, message, etag = update_file(
+                full_file_path, file_path, iter_request_file_chunks(request), write_query
+            )
+        response = Response(message, status=status_code)
+        if etag is not None:
+            response['ETag'] = etag
+        return response
 
-    @transaction.atomic
     def delete(self, request, file_path):
         full_file_path = self.PROJECT_ROOT_PATH / file_path
 
-        if full_file_path.is_file():
-            os.remove(full_file_path)
-            return Response(f'/{file_path} removed.', status=status.HTTP_200_OK)
+        with self.timer.stage('write'):
+            status_code, message = delete_file(full_file_path, file_path)
+        return Response(message, status=status_code)
+
+
+class UploadSessionCreateView(StageTimingMixin, APIView):
+    PROJECT_ROOT_PATH = FileView.PROJECT_ROOT_PATH
+
+    def post(self, request):
+        file_path = request.data.get('path')
+        if not isinstance(file_path, str) or not file_path.strip('/'):
+            return Response(f'path: {file_path} is not available', status.HTTP_400_BAD_REQUEST)
+        file_path = file_path.strip('/')
+
+        size = request.data.get('size')
+        if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+            return Response(f'size: {size} is not available', status.HTTP_400_BAD_REQUEST)
+
+        overwrite = request.data.get('overwrite', False) is True
+        full_file_path = path_under_root(self.PROJECT_ROOT_PATH, file_path)
+
+        if full_file_path is None or not full_file_path.parent.is_dir() or full_file_path.is_dir():
+            return Response(f'/{file_path} is not available', status=status.HTTP_400_BAD_REQUEST)
+        if full_file_path.is_file() and not overwrite:
+            return Response(f'/{file_path} already exist.', status=status.HTTP_400_BAD_REQUEST)
+
+        session = UploadSession.create(full_file_path, size, overwrite)
+        return Response(session.to_dict(), status=status.HTTP_201_CREATED)
+
+
+class UploadSessionView(StageTimingMixin, APIView):
+
+    def get(self, request, session_id):
+        try:
+            payload = UploadSession(session_id).to_dict()
+        except FileNotFoundError as e:
+            return Response(str(e), status=status.HTTP_404_NOT_FOUND)
+
+        return Response(payload, status=status.HTTP_200_OK)
+
+    def put(self, request, session_id):
+        try:
+            session = UploadSession(session_id)
+        except FileNotFoundError as e:
+            return Response(str(e), status=status.HTTP_404_NOT_FOUND)
+
+        expect_length = None
+        content_range = request.META.get('HTTP_CONTENT_RANGE')
+        try:
+            if content_range:
+                offset, end = parse_content_range(content_range)
+                expect_length = end - offset + 1
+            else:
+                offset = int(request.GET.get('offset', '0'))
+                if offset < 0:
+                    raise ValueError(f'offset: {offset} is not available')
+
+            received_ranges = session.write_chunk(
+                offset,
+                iter_stream_chunks(request.stream, settings.FILE_STREAM_UPLOAD_CHUNK_SIZE),
+                expect_length,
+            )
+        except ValueError as e:
+            return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
+        except FileNotFoundError as e:
+            return Response(str(e), status=status.HTTP_404_NOT_FOUND)
+
+        return Response(
+            {
+                'sessionId': session.session_id,
+                'size': session.size,
+                'receivedRanges': received_ranges,
+            },
+            status=status.HTTP_200_OK
+        )
+
+    patch = put
+
+    def delete(self, request, session_id):
+        try:
+            session = UploadSession(session_id)
+        except FileNotFoundError as e:
+            return Response(str(e), status=status.HTTP_404_NOT_FOUND)
+
+        session.abort()
+        return Response(f'upload session {session_id} removed.', status=status.HTTP_200_OK)
+
+
+class UploadSessionCommitView(StageTimingMixin, APIView):
+
+    def post(self, request, session_id):
+        try:
+            session = UploadSession(session_id)
+        except FileNotFoundError as e:
+            return Response(str(e), status=status.HTTP_404_NOT_FOUND)
+
+        with path_locks.writing(session.target):
+            try:
+                session.commit()
+            except ValueError as e:
+                return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
+            except FileExistsError:
+                return Response(f'{session.target} already exist.', status=status.HTTP_400_BAD_REQUEST)
+            except BlockingIOError:
+                return Response(
+                    f'upload session {session_id} has chunks being written.', status=status.HTTP_409_CONFLICT
+                )
+            except FileNotFoundError as e:
+                return Response(str(e), status=status.HTTP_404_NOT_FOUND)
+            after_write(session.target)
+
+        return Response(f'upload session {session_id} committed.', status=status.HTTP_201_CREATED)
+
+
+class BatchView(StageTimingMixin, APIView):
+    PROJECT_ROOT_PATH = FileView.PROJECT_ROOT_PATH
+
+    def post(self, request):
+        operations = request.data.get('operations')
+        if not isinstance(operations, list) or not 0 < len(operations) <= settings.FILE_BATCH_MAX_OPERATIONS:
+            return Response(
+                f'operations: up to {settings.FILE_BATCH_MAX_OPERATIONS} operations are available',
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        inline_max_bytes = request.data.get('inlineMaxBytes', 0)
+        if not isinstance(inline_max_bytes, int) or isinstance(inline_max_bytes, bool) or inline_max_bytes < 0:
+            return Response(f'inlineMaxBytes: {inline_max_bytes} is not available', status.HTTP_400_BAD_REQUEST)
+        inline_max_bytes = min(inline_max_bytes, settings.FILE_BATCH_INLINE_MAX_BYTES)
+
+        with self.timer.stage('batch'):
+            results = run_batch(self.PROJECT_ROOT_PATH, operations, inline_max_bytes)
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+class WatchView(StageTimingMixin, APIView):
+    """
+    Changes of a directory: a long-poll batch after `?cursor=` (waiting up to `?timeout=` seconds),
+    or server-sent events with `Accept: text/event-stream`. Without a cursor, a long poll returns the
+    current cursor right away.
+    """
+    PROJECT_ROOT_PATH = FileView.PROJECT_ROOT_PATH
+    renderer_classes = WATCH_RENDERER_CLASSES
+
+    def get(self, request, file_path):
+        full_file_path = self.PROJECT_ROOT_PATH / file_path
+        if not full_file_path.is_dir():
+            return Response(f'/{file_path} is not a directory', status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            timeout = parse_watch_timeout(request.GET)
+        except ValueError as e:
+            return Response(str(e), status.HTTP_400_BAD_REQUEST)
+        cursor = request.GET.get('cursor') or request.META.get('HTTP_LAST_EVENT_ID')
 
-        elif full_file_path.is_dir():
-            return Response(f'/{file_path} is a directory.', status=status.HTTP_400_BAD_REQUEST)
+        if request.accepted_renderer.format == EventStreamRenderer.format:
+            # the stream subscribes on its first chunk and unsubscribes when it ends or is closed
+            response = StreamingHttpResponse(
+                iter_event_stream(full_file_path, cursor, watch_registry), content_type=EVENT_STREAM_CONTENT_TYPE
+            )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
 
-        return Response(f'/{file_path} not exist.', status=status.HTTP_400_BAD_REQUEST)
+        watch = watch_registry.subscribe(full_file_path)
+        try:
+            if cursor is None:
+                events, cursor = [], watch.cursor
+            else:
+                with self.timer.stage('wait'):
+                    events, cursor = watch.wait(cursor, timeout)
+        finally:
+            watch_registry.unsubscribe(watch)
+        return Response(watch_payload(events, cursor), status=status.HTTP_200_OK)
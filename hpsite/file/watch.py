@@ -0,0 +1,358 @@
+"""
+Change feed of directories, served on GET /file/_watch/<dir>/ as long-poll batches or server-sent events.
+
+There is one `DirectoryWatch` per watched directory, shared by all of its subscribers. It keeps a
+snapshot (name -> size, mtime) of the files in the directory and a bounded buffer of numbered events.
+Writes made through the API publish their change right away (`after_write`). Out-of-band changes are
+found by a single polling thread that diffs the snapshots of all watched directories every
+FILE_WATCH_POLL_INTERVAL seconds, so the scan cost does not grow with the number of subscribers.
+"""
+import asyncio
+import json
+import os
+import secrets
+import stat
+import threading
+import time
+from collections import deque
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterator, Optional
+
+from django.conf import settings
+
+from .define import WatchEventType
+from .upload import is_upload_temp_name
+
+EVENT_STREAM_CONTENT_TYPE = 'text/event-stream'
+
+
+def _version(stat_result: os.stat_result) -> tuple[int, int]:
+    return stat_result.st_size, stat_result.st_mtime_ns
+
+
+def scan_snapshot(path: Path) -> dict[str, tuple[int, int]]:
+    """
+    `{name: (size, mtime_ns)}` of the files in `path`, empty when the directory is gone.
+    """
+    snapshot = {}
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if is_upload_temp_name(entry.name):
+                    continue
+                try:
+                    if entry.is_file():
+                        snapshot[entry.name] = _version(entry.stat())
+                except FileNotFoundError:
+                    # removed between readdir and stat
+                    continue
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return snapshot
+
+
+def _stat_version(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        stat_result = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return _version(stat_result) if stat.S_ISREG(stat_result.st_mode) else None
+
+
+def _change(old_version: Optional[tuple], new_version: Optional[tuple]) -> Optional[str]:
+    if old_version == new_version:
+        return None
+    if old_version is None:
+        return WatchEventType.CREATED.value
+    if new_version is None:
+        return WatchEventType.DELETED.value
+    return WatchEventType.MODIFIED.value
+
+
+def diff_snapshot(old: dict, new: dict) -> list[tuple[str, str]]:
+    """
+    `(event type, name)` changes turning snapshot `old` into `new`.
+    """
+    changes = [
+        (_change(old.get(name), version), name) for name, version in new.items() if old.get(name) != version
+    ]
+    changes.extend((WatchEventType.DELETED.value, name) for name in old.keys() - new.keys())
+    # only the changes are sorted, a poll of an unchanged directory stays linear
+    changes.sort(key=itemgetter(1))
+    return changes
+
+
+class DirectoryWatch:
+    """
+    Events of one directory, numbered from 1. A cursor `<epoch>.<number>` names the last event a
+    subscriber has seen; the epoch changes with every new watch, so cursors of a dropped watch are
+    detected instead of silently skipping events.
+    """
+
+    def __init__(self, path: Path, buffer_size: int):
+        self.path = path
+        self.epoch = secrets.token_hex(4)
+        self.subscribers = 0
+        self.idle_since = time.monotonic()
+
+        self.snapshot = scan_snapshot(path)
+        self.events = deque(maxlen=buffer_size)
+        self.last_number = 0
+
+        self._condition = threading.Condition()
+        self._poll_lock = threading.Lock()
+        # names recorded by API writes while a poll scans, their snapshot entries are newer than the scan
+        self._recorded = set()
+        self._async_waiters = set()
+
+    @property
+    def cursor(self) -> str:
+        return f'{self.epoch}.{self.last_number}'
+
+    def _publish(self, changes: list[tuple[str, str]]) -> None:
+        # called with the condition held
+        if not changes:
+            return
+        for event_type, name in changes:
+            self.last_number += 1
+            self.events.append((self.last_number, event_type, name))
+
+        self._condition.notify_all()
+        for loop, event in self._async_waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def record(self, name: str) -> None:
+        """
+        Publish the change of `name` made by the API, without waiting for the next poll.
+        """
+        with self._condition:
+            old_version = self.snapshot.get(name)
+            new_version = _stat_version(self.path / name)
+            if new_version is None:
+                self.snapshot.pop(name, None)
+            else:
+                self.snapshot[name] = new_version
+            self._recorded.add(name)
+
+            event_type = _change(old_version, new_version)
+            if event_type is not None:
+                self._publish([(event_type, name)])
+
+    def poll(self) -> None:
+        with self._poll_lock:
+            with self._condition:
+                self._recorded.clear()
+            snapshot = scan_snapshot(self.path)
+
+            with self._condition:
+                for name in self._recorded:
+                    version = self.snapshot.get(name)
+                    if version is None:
+                        snapshot.pop(name, None)
+                    else:
+                        snapshot[name] = version
+                changes = diff_snapshot(self.snapshot, snapshot)
+                self.snapshot = snapshot
+                self._publish(changes)
+
+    def _number_of(self, cursor: Optional[str]) -> Optional[int]:
+        epoch, _, number = (cursor or '').partition('.')
+        if epoch != self.epoch or not number.isdigit():
+            return None
+
+        number = int(number)
+        first_number = self.events[0][0] if self.events else self.last_number + 1
+        if not first_number - 1 <= number <= self.last_number:
+            # events after it left the buffer
+            return None
+        return number
+
+    def _pending(self, cursor: Optional[str]) -> Optional[list[tuple[int, str, str]]]:
+        # called with the condition held
+        number = self._number_of(cursor)
+        if number is None:
+            return None
+        first_number = self.events[0][0] if self.events else self.last_number + 1
+        return list(islice(self.events, max(number - first_number + 1, 0), None))
+
+    def events_after(self, cursor: Optional[str]) -> tuple[Optional[list], str]:
+        """
+        `(events after cursor, current cursor)`, events being None when the cursor is unknown or expired.
+        """
+        with self._condition:
+            return self._pending(cursor), self.cursor
+
+    def wait(self, cursor: Optional[str], timeout: float) -> tuple[Optional[list], str]:
+        """
+        `events_after(cursor)`, waiting up to `timeout` seconds for at least one event.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending(cursor) != [], timeout)
+            return self._pending(cursor), self.cursor
+
+    async def wait_async(self, cursor: Optional[str], timeout: float) -> tuple[Optional[list], str]:
+        """
+        `wait` for the event loop: the coroutine is woken by `_publish`, no thread is held while waiting.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._condition:
+            if self._pending(cursor) != []:
+                return self._pending(cursor), self.cursor
+            self._async_waiters.add(waiter)
+
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._condition:
+                self._async_waiters.discard(waiter)
+        return self.events_after(cursor)
+
+
+class WatchRegistry:
+    """
+    The shared `DirectoryWatch` of every watched directory, and the thread polling them. A watch is
+    kept FILE_WATCH_IDLE_TIMEOUT seconds after its last subscriber left, so long-poll clients can come
+    back with their cursor; the thread stops when nothing is watched.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._watches = {}
+        self._thread = None
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return os.path.normpath(os.path.abspath(path))
+
+    def subscribe(self, path: Path) -> DirectoryWatch:
+        key = self._key(path)
+        watch = self._watches.get(key)
+        if watch is None:
+            # the first scan runs without the registry lock, the watch of a concurrent subscriber may win
+            watch = DirectoryWatch(Path(key), settings.FILE_WATCH_BUFFER_SIZE)
+        with self._lock:
+            watch = self._watches.setdefault(key, watch)
+            watch.subscribers += 1
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='file-watch', daemon=True)
+                self._thread.start()
+        return watch
+
+    def unsubscribe(self, watch: DirectoryWatch) -> None:
+        with self._lock:
+            watch.subscribers -= 1
+            if not watch.subscribers:
+                watch.idle_since = time.monotonic()
+
+    def notify(self, full_file_path: Path) -> None:
+        """
+        Called after every write of the API, a dict lookup when the directory is not watched.
+        """
+        watch = self._watches.get(self._key(full_file_path.parent))
+        if watch is not None:
+            watch.record(full_file_path.name)
+
+    def poll_all(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key, watch in list(self._watches.items()):
+                if not watch.subscribers and now - watch.idle_since > settings.FILE_WATCH_IDLE_TIMEOUT:
+                    del self._watches[key]
+            watches = list(self._watches.values())
+
+        for watch in watches:
+            watch.poll()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(settings.FILE_WATCH_POLL_INTERVAL)
+            self.poll_all()
+            with self._lock:
+                if not self._watches:
+                    self._thread = None
+                    return
+
+    def clear(self) -> None:
+        with self._lock:
+            self._watches.clear()
+
+
+watch_registry = WatchRegistry()
+
+
+def parse_watch_timeout(query) -> float:
+    """
+    Long-poll wait of `?timeout=` seconds, FILE_WATCH_LONG_POLL_TIMEOUT by default and at most.
+    """
+    value = query.get('timeout')
+    if value is None:
+        return settings.FILE_WATCH_LONG_POLL_TIMEOUT
+    try:
+        timeout = float(value)
+    except ValueError:
+        timeout = -1.0
+    if not 0 <= timeout <= settings.FILE_WATCH_LONG_POLL_TIMEOUT:
+        raise ValueError(f'timeout: {value} is not available')
+    return timeout
+
+
+def _event_dict(event: tuple[int, str, str]) -> dict:
+    _, event_type, name = event
+    return {'type': event_type, 'name': name}
+
+
+def watch_payload(events: Optional[list], cursor: str) -> dict:
+    """
+    Long-poll response. `reset` tells the client its cursor expired: list the directory again and
+    continue from the new cursor.
+    """
+    if events is None:
+        return {'cursor': cursor, 'events': [], 'reset': True}
+    return {'cursor': cursor, 'events': [_event_dict(event) for event in events]}
+
+
+def format_event(event_type: str, data, event_id: str = None) -> bytes:
+    lines = [] if event_id is None else [f'id: {event_id}']
+    lines.append(f'event: {event_type}')
+    lines.append('data: ' + json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+KEEPALIVE = b': keepalive\n\n'
+
+
+def format_events(watch: DirectoryWatch, events: Optional[list], cursor: str) -> bytes:
+    if events is None:
+        return format_event('reset', {'cursor': cursor}, cursor)
+    return b''.join(
+        format_event(event_type, {'name': name}, f'{watch.epoch}.{number}') for number, event_type, name in events
+    )
+
+
+def iter_event_stream(path: Path, cursor: Optional[str], registry: WatchRegistry) -> Iterator[bytes]:
+    """
+    Server-sent events of the directory `path` after `cursor` (`Last-Event-ID`), with a comment line
+    every FILE_WATCH_HEARTBEAT seconds, for FILE_WATCH_STREAM_MAX_SECONDS; `EventSource` then reconnects.
+
+    The directory is subscribed to when the first chunk is asked for and unsubscribed when the stream
+    ends or is closed, so a stream that is never iterated (a HEAD request, a client gone before the
+    first chunk) leaves no subscriber behind.
+    """
+    deadline = time.monotonic() + settings.FILE_WATCH_STREAM_MAX_SECONDS
+    watch = registry.subscribe(path)
+    try:
+        if cursor is None:
+            cursor = watch.cursor
+        yield format_event('ready', {'cursor': cursor}, cursor)
+
+        while (remaining := deadline - time.monotonic()) > 0:
+            events, current = watch.wait(cursor, min(settings.FILE_WATCH_HEARTBEAT, remaining))
+            yield format_events(watch, events, current) if events != [] else KEEPALIVE
+            cursor = current
+    finally:
+        registry.unsubscribe(watch)
@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hpsite.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported after Django setup, serves file downloads/listings without blocking the event loop
+from file.async_api import AsyncFileApplication  # noqa: E402
+
+application = AsyncFileApplication(django_application)
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'file',
 ]
 
 MIDDLEWARE = [
@@ -122,3 +123,84 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# File API
+
+# Directory listings with at least this many entries are streamed as incrementally written JSON
+FILE_LISTING_STREAM_THRESHOLD = 1000
+
+# In-process cache of sorted directory listings, 0 entries disables it
+FILE_LISTING_CACHE_MAX_ENTRIES = 256
+FILE_LISTING_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Uploads are copied to a temp file next to the target in chunks of this size, then renamed into place
+FILE_STREAM_UPLOAD_CHUNK_SIZE = 1024 * 1024
+FILE_STREAM_UPLOAD_FSYNC = False
+
+# Downloads are sent by the server's `wsgi.file_wrapper` (sendfile) when it has one; otherwise files of at least
+# FILE_DOWNLOAD_MMAP_MIN_SIZE bytes are read from a memory map (None disables it) in FILE_DOWNLOAD_CHUNK_SIZE chunks.
+# FILE_DOWNLOAD_OFFLOAD = 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd) leaves identity bodies to the
+# fronting proxy: X-Accel-Redirect names FILE_DOWNLOAD_ACCEL_REDIRECT_LOCATION + the path under
+# FILE_DOWNLOAD_OFFLOAD_ROOT, X-Sendfile the absolute path of the file
+FILE_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+FILE_DOWNLOAD_MMAP_MIN_SIZE = 1024 * 1024
+FILE_DOWNLOAD_OFFLOAD = None
+FILE_DOWNLOAD_OFFLOAD_ROOT = BASE_DIR.parent
+FILE_DOWNLOAD_ACCEL_REDIRECT_LOCATION = '/_protected/'
+
+# Resumable upload sessions are staged here and removed after this many seconds without a chunk
+FILE_UPLOAD_SESSION_DIR = BASE_DIR / 'upload_sessions'
+FILE_UPLOAD_SESSION_TIMEOUT = 24 * 60 * 60
+
+# Per-path reader/writer locks of the file API, hashed onto FILE_LOCK_STRIPES stripes; worker processes share
+# them through record locks on FILE_LOCK_PATH, which must be on a local filesystem
+FILE_LOCK_PATH = BASE_DIR / 'file_locks'
+FILE_LOCK_STRIPES = 1024
+
+# ASGI file API (hpsite/asgi.py): blocking filesystem calls run on a pool of this many threads
+FILE_ASYNC_IO_WORKERS = 32
+FILE_ASYNC_SCAN_BATCH_SIZE = 1000
+FILE_ASYNC_READ_BLOCK_SIZE = 256 * 1024
+
+# Serve listings of directories indexed by `manage.py index_files` from the SQLite metadata index
+FILE_LISTING_USE_INDEX = False
+
+# Recursive listings (?depth=N) scan subdirectories concurrently on a pool of this many threads
+FILE_TREE_WORKERS = 16
+FILE_TREE_MAX_DEPTH = 64
+
+# POST /file/_batch/ runs up to FILE_BATCH_MAX_OPERATIONS operations on a pool of FILE_BATCH_WORKERS threads
+FILE_BATCH_WORKERS = 8
+FILE_BATCH_MAX_OPERATIONS = 1000
+FILE_BATCH_INLINE_MAX_BYTES = 64 * 1024
+
+# In-process cache of the content of files up to FILE_CONTENT_CACHE_MAX_FILE_SIZE bytes, 0 entries disables it
+FILE_CONTENT_CACHE_MAX_ENTRIES = 4096
+FILE_CONTENT_CACHE_MAX_BYTES = 128 * 1024 * 1024
+FILE_CONTENT_CACHE_MAX_FILE_SIZE = 256 * 1024
+
+# Text-like downloads of at least FILE_COMPRESSION_MIN_SIZE bytes are gzip/deflate compressed per Accept-Encoding;
+# compressed copies are kept in FILE_COMPRESSION_CACHE_DIR up to FILE_COMPRESSION_CACHE_MAX_BYTES, 0 disables it
+FILE_COMPRESSION_MIN_SIZE = 1024
+FILE_COMPRESSION_LEVEL = 6
+FILE_COMPRESSION_CACHE_DIR = BASE_DIR / 'compression_cache'
+FILE_COMPRESSION_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# GET /file/_watch/<dir>/: one shared thread diffs the watched directories every FILE_WATCH_POLL_INTERVAL seconds,
+# the last FILE_WATCH_BUFFER_SIZE events of a directory are kept until FILE_WATCH_IDLE_TIMEOUT s without subscribers
+FILE_WATCH_POLL_INTERVAL = 1.0
+FILE_WATCH_BUFFER_SIZE = 1024
+FILE_WATCH_IDLE_TIMEOUT = 60
+FILE_WATCH_LONG_POLL_TIMEOUT = 30
+FILE_WATCH_HEARTBEAT = 15
+FILE_WATCH_STREAM_MAX_SECONDS = 300
+
+# Delta listings (?since=<token>): change history of up to FILE_DELTA_MAX_DIRECTORIES directories, keeping the
+# last FILE_DELTA_MAX_CHANGES changes of each; older tokens get a full listing flagged `reset`
+FILE_DELTA_MAX_DIRECTORIES = 256
+FILE_DELTA_MAX_BYTES = 256 * 1024 * 1024
+FILE_DELTA_MAX_CHANGES = 100000
+
+# Server-Timing header on file API responses and the in-process metrics served on /file/_metrics/
+FILE_METRICS_ENABLED = True